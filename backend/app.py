@@ -3,36 +3,148 @@ FastAPI Backend for AI Research Paper Visualizer
 Integrates Serper API, web scraping, and Scenario API
 """
 
-import json
+import time
+
+# Start of module import, for the startup budget reported in /api/stats
+_IMPORT_STARTED = time.perf_counter()
+
+import os
+import hmac
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, status
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from .serper_client import SerperClient
 from .scenario_client import ScenarioClient
 from .scraper import PaperScraper
+from concurrent.futures import ThreadPoolExecutor
+from .job_queue import JobQueue, MemoryJobQueue, get_job_queue
+from .worker import process_one
+from .image_store import ImageStore, get_image_store
+from .paper_index import PaperIndex, get_paper_index
+from .pipeline import build_image_prompt, has_more, next_page, run_pipeline
+from .search_sessions import decode_cursor, encode_cursor, get_search_sessions
+from .job_events import extract_job_id, get_job_event_hub, webhooks_enabled
+from .poll_stats import get_job_duration_stats
+from .scenario_scheduler import get_default_scheduler
+from .responses import FastJSONResponse
+from .compression import CompressionMiddleware
+from .log_setup import configure_logging, logging_stats, shutdown_logging
+from .shared_cache import get_shared_cache
+from .hedging import get_hedge_budget, get_host_latency_stats
+from .retry_policy import retry_stats
+from .key_pool import key_pool_stats
+from .selector_stats import get_selector_stats
+from .transfer_stats import get_transfer_stats
+from .cancellation import RequestCancelled, get_cancellation_stats
+from .profiling import Profile, get_profile_store, start_profile
+from .memory import get_memory_stats, start_debug_tracing
+from .export import stream_export
+from .http_cache import ResponseCache, etag_matches, get_response_cache, make_etag
 from .models import (
     ProcessPapersRequest,
     ProcessPapersResponse,
-    ProcessedPaper,
+    NextPageRequest,
+    ExportRequest,
     GenerateImageRequest,
-    GenerateImageResponse
+    GenerateImageResponse,
+    JobStatusResponse
 )
 
-# Configure logging with colors
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
+# Read .env once for every backend module
+load_dotenv()
+
 logger = logging.getLogger(__name__)
 
+
+# Milliseconds spent importing this module and in each start-up step
+_startup_timings: Dict[str, float] = {}
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def warmup_enabled() -> bool:
+    """Whether to pre-connect to upstream hosts at start-up (WARMUP_UPSTREAMS)"""
+    return os.getenv('WARMUP_UPSTREAMS', '').strip().lower() in ('1', 'true', 'yes')
+
+
+def warm_up_clients() -> None:
+    """Open pooled connections to Serper, Scenario and the paper hosts"""
+    started = time.perf_counter()
+    for client in list(_clients.values()):
+        client.warm_up()
+    _startup_timings['warmup_ms'] = _elapsed_ms(started)
+    logger.info("Upstream warm-up finished in %sms", _startup_timings['warmup_ms'])
+
+
+def startup() -> None:
+    """
+    Build and validate clients and local stores once, before the first request
+
+    Missing credentials are logged rather than fatal so the server still
+    starts; the affected endpoints keep returning 500 until they are set.
+    """
+    started = time.perf_counter()
+    steps = (
+        ('serper', get_serper_client),
+        ('scenario', get_scenario_client),
+        ('scraper', get_scraper),
+        ('queue', get_queue),
+        ('index', get_index),
+        ('store', get_store),
+    )
+    for name, build in steps:
+        step_started = time.perf_counter()
+        try:
+            build()
+        except HTTPException:
+            pass  # Already logged by the getter
+        _startup_timings[f"{name}_ms"] = _elapsed_ms(step_started)
+    _startup_timings['lifespan_ms'] = _elapsed_ms(started)
+
+    total = _startup_timings['import_ms'] + _startup_timings['lifespan_ms']
+    budget = float(os.getenv('STARTUP_BUDGET_MS', '1500'))
+    if total > budget:
+        logger.warning("Start-up took %.0fms (budget %.0fms): %s", total, budget, _startup_timings)
+    else:
+        logger.info("Start-up took %.0fms", total)
+
+    if warmup_enabled():
+        # Runs in the background so it never delays readiness
+        threading.Thread(target=warm_up_clients, name='upstream-warmup', daemon=True).start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application start-up and shutdown"""
+    configure_logging()
+    if start_debug_tracing():
+        logger.warning("MEMORY_DEBUG is set: tracemalloc is tracing allocations (slow)")
+    startup()
+    yield
+    for client in list(_clients.values()):
+        client.session.close()
+    _clients.clear()
+    get_selector_stats().save()
+    shutdown_logging()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Research Visualizer API",
     description="Search Google Scholar, scrape abstracts, and generate visual representations of research papers",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -44,12 +156,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# zstd/br/gzip for JSON and text bodies above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Clients are built once and shared across requests (failures are not cached)
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def _cached_client(name: str, factory: Callable):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+
 def get_serper_client() -> SerperClient:
-    """Get Serper client"""
+    """Get the shared Serper client"""
     try:
-        return SerperClient()
+        return _cached_client('serper', SerperClient)
     except Exception as e:
-        logger.error(f"Failed to initialize Serper API: {e}")
+        logger.error("Failed to initialize Serper API: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Serper API not configured"
@@ -57,17 +188,132 @@ def get_serper_client() -> SerperClient:
 
 
 def get_scenario_client() -> ScenarioClient:
-    """Get Scenario client"""
+    """
+    Get the shared Scenario client
+
+    This process serves the webhook route, so with SCENARIO_WEBHOOK_ENABLED
+    its client waits on completion callbacks; queue workers and the batch
+    CLI never receive them and keep regular polling.
+    """
     try:
-        return ScenarioClient()
+        return _cached_client(
+            'scenario',
+            lambda: ScenarioClient(event_hub=get_job_event_hub() if webhooks_enabled() else None)
+        )
     except Exception as e:
-        logger.error(f"Failed to initialize Scenario API: {e}")
+        logger.error("Failed to initialize Scenario API: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Scenario API not configured"
         )
 
 
+def get_scraper() -> PaperScraper:
+    """Get the shared paper scraper"""
+    return _cached_client('scraper', PaperScraper)
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_loaded = False
+
+
+def get_queue() -> Optional[JobQueue]:
+    """Get the image job queue (None when generation runs inline)"""
+    global _job_queue, _job_queue_loaded
+    if not _job_queue_loaded:
+        _job_queue = get_job_queue()
+        _job_queue_loaded = True
+        if _job_queue:
+            logger.info("Image generation queue enabled: %s", type(_job_queue).__name__)
+    return _job_queue
+
+
+# Preview-mode jobs run in this process when no broker is configured
+_background_jobs = MemoryJobQueue()
+_background_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='image-job')
+# Cancel events of the in-process jobs now running, by job ID
+_background_cancel: Dict[str, threading.Event] = {}
+
+# Preview render settings (low resolution, few steps)
+PREVIEW_SIZE = int(os.getenv('SCENARIO_PREVIEW_SIZE', '512'))
+PREVIEW_STEPS = int(os.getenv('SCENARIO_PREVIEW_STEPS', '8'))
+
+
+_paper_index: Optional[PaperIndex] = None
+_paper_index_loaded = False
+
+
+def get_index() -> Optional[PaperIndex]:
+    """Get the local paper index (None when disabled)"""
+    global _paper_index, _paper_index_loaded
+    if not _paper_index_loaded:
+        _paper_index = get_paper_index()
+        _paper_index_loaded = True
+    return _paper_index
+
+
+_image_store: Optional[ImageStore] = None
+_image_store_loaded = False
+
+
+def get_store() -> Optional[ImageStore]:
+    """Get the local image mirror (None when mirroring is disabled)"""
+    global _image_store, _image_store_loaded
+    if not _image_store_loaded:
+        _image_store = get_image_store()
+        _image_store_loaded = True
+        if _image_store:
+            logger.info("Image mirroring enabled: %s", _image_store.root)
+    return _image_store
+
+
+def local_image_urls(base_url: str, image_urls: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Mirror generated images locally when IMAGE_MIRROR_DIR is set (blocking)
+
+    Args:
+        base_url: Server base URL used to build absolute URLs
+        image_urls: Remote Scenario image URLs
+
+    Returns:
+        (image_urls, thumbnail_urls) - local WebP and thumbnail URLs, or the
+        remote URLs and no thumbnails when mirroring is off or fails
+    """
+    store = get_store()
+    if store is None or not image_urls:
+        return image_urls, []
+
+    digests = store.mirror_many(image_urls)
+    if not digests:
+        return image_urls, []
+
+    base_url = base_url.rstrip('/')
+    full_variant = 'webp' if store.path_for(digests[0], 'webp') else 'original'
+    full_urls = [f"{base_url}/api/images/{digest}?variant={full_variant}" for digest in digests]
+    thumbnail_urls = [
+        f"{base_url}/api/images/{digest}?variant=thumb"
+        for digest in digests
+        if store.path_for(digest, 'thumb')
+    ]
+    return full_urls, thumbnail_urls
+
+
+async def mirror_images(http_request: Request, image_urls: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Mirror generated images locally when IMAGE_MIRROR_DIR is set
+
+    Args:
+        http_request: Incoming request (used to build absolute URLs)
+        image_urls: Remote Scenario image URLs
+
+    Returns:
+        (image_urls, thumbnail_urls) - see local_image_urls
+    """
+    if get_store() is None or not image_urls:
+        return image_urls, []
+    return await asyncio.to_thread(local_image_urls, str(http_request.base_url), image_urls)
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -78,126 +324,736 @@ async def health_check():
     }
 
 
-@app.post("/api/process", response_model=ProcessPapersResponse)
-async def process_papers(request: ProcessPapersRequest):
+@app.get("/api/stats")
+async def get_stats():
     """
-    Fast pipeline: Search papers and return immediately (no image generation)
-    Images can be loaded progressively via /api/generate-image endpoint
+    Runtime statistics for tuning (Scenario polling, scheduling, webhooks,
+    start-up timings, log sampling, shared cache, scrape hedging, retries,
+    work cancelled by client disconnects, memory, response cache, per-key
+    API usage, abstract selectors learned per host, scrape bytes on the wire
+    vs decoded)
     """
-    try:
-        logger.info(f"Processing papers for query: {request.query}")
-        logger.info(f"Request params - num_papers: {request.num_papers}")
-        
-        # Step 1: Search with Serper API (fast!)
-        logger.info("=" * 60)
-        logger.info("SERPER API - SEARCHING PAPERS")
-        logger.info("=" * 60)
-        serper = get_serper_client()
-        papers = serper.search_scholar(
-            query=request.query,
-            num_results=request.num_papers
+    shared_cache = get_shared_cache()
+    return {
+        "scenario_polling": get_job_duration_stats().export(),
+        "scenario_scheduler": get_default_scheduler().stats(),
+        "scenario_webhooks": get_job_event_hub().stats(),
+        "startup": dict(_startup_timings),
+        "logging": logging_stats(),
+        "shared_cache": shared_cache.stats() if shared_cache else None,
+        "scrape_hedging": {
+            **get_hedge_budget().stats(),
+            "hosts": get_host_latency_stats().export(),
+        },
+        "retries": retry_stats(),
+        "cancellation": get_cancellation_stats().stats(),
+        "memory": get_memory_stats().stats(),
+        "response_cache": get_response_cache().stats(),
+        "api_keys": key_pool_stats(),
+        "abstract_selectors": get_selector_stats().export(),
+        "scrape_transfer": {
+            "accept_encoding": PaperScraper.HEADERS['Accept-Encoding'],
+            **get_transfer_stats().export(),
+        },
+    }
+
+
+def processed_paper_dict(paper: Dict) -> Dict:
+    """Pipeline paper dict in the ProcessedPaper response shape"""
+    return {
+        'title': paper['title'],
+        'link': paper['link'],
+        'snippet': paper.get('snippet') or '',
+        'year': paper.get('year'),
+        'abstract': paper.get('abstract'),
+        'image_urls': []  # Empty - will be loaded progressively
+    }
+
+
+# Status sent when the client went away before the response was ready
+CLIENT_CLOSED_REQUEST = 499
+
+
+def client_closed(e: RequestCancelled) -> HTTPException:
+    """Count a request abandoned by its client and build its (unread) error response"""
+    get_cancellation_stats().add('requests_cancelled')
+    logger.info("Client disconnected - work cancelled: %s", e)
+    return HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+
+def require_admin(http_request: Request) -> None:
+    """
+    Reject requests without the ADMIN_TOKEN in the X-Admin-Token header
+
+    Admin features are disabled while ADMIN_TOKEN is unset.
+    """
+    token = os.getenv('ADMIN_TOKEN')
+    provided = http_request.headers.get('X-Admin-Token', '')
+    if not token or not hmac.compare_digest(provided.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
         )
+
+
+def profiling_requested(http_request: Request) -> bool:
+    """Whether an admin asked to profile this request with ?profile=1"""
+    if http_request.query_params.get('profile', '').lower() not in ('1', 'true'):
+        return False
+    require_admin(http_request)
+    return True
+
+
+def profile_headers(profile: Optional[Profile]) -> Optional[Dict[str, str]]:
+    """Headers pointing at a finished profile"""
+    if profile is None:
+        return None
+    return {'X-Profile-Id': profile.id, 'Server-Timing': profile.server_timing()}
+
+
+def compute_process_response(
+    request: ProcessPapersRequest,
+    cancel_event: Optional[threading.Event] = None,
+    session_ttl: Optional[float] = None
+) -> Dict:
+    """
+    Run the pipeline for a search and build the /api/process response body
+
+    Built directly in the ProcessPapersResponse shape: the pipeline output
+    is already well-formed, so response-model validation is skipped.
+
+    Args:
+        request: Search parameters
+        cancel_event: When set, outstanding scrapes are cancelled
+        session_ttl: Least seconds the cursor's session is kept (a cached
+            body must not outlive its cursor)
+
+    Returns:
+        The body; its next_cursor is the same for every client the body is
+        served to, so it can be cached and ETagged as a whole
+    """
+    session: Dict = {}
+    scraped_papers = run_pipeline(
+        query=request.query,
+        num_papers=request.num_papers,
+        serper=get_serper_client(),
+        scraper=get_scraper(),
+        index=get_index(),
+        local_first=request.local_first,
+        session=session,
+        cancel_event=cancel_event
+    )
+    
+    next_cursor = None
+    offset = len(scraped_papers)
+    if session and has_more(session, offset):
+        session['issued'] = offset
+        session_id = get_search_sessions().create(session, ttl=session_ttl)
+        next_cursor = encode_cursor(session_id, offset)
+    
+    return {
+        'query': request.query,
+        'papers': [processed_paper_dict(paper) for paper in scraped_papers],
+        'next_cursor': next_cursor
+    }
+
+
+def process_etag(content: Dict) -> str:
+    """ETag of a /api/process body (a new cursor is a new representation)"""
+    return make_etag(content)
+
+
+def cache_lifetime(cache: ResponseCache) -> float:
+    """Seconds a cached /api/process body can still be served or revalidated"""
+    return cache.max_age + cache.stale_seconds
+
+
+def conditional_response(http_request: Request, content: Dict, headers: Dict[str, str]) -> Response:
+    """
+    304 Not Modified for a GET whose If-None-Match matches, else the body
+
+    If-None-Match on other methods is ignored: RFC 9110 only allows a 304
+    in answer to GET and HEAD.
+    """
+    if http_request.method in ('GET', 'HEAD') and etag_matches(http_request.headers.get('if-none-match'), headers['ETag']):
+        get_response_cache().add('not_modified')
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FastJSONResponse(content, headers=headers)
+
+
+# Background refreshes of stale responses (kept referenced until done)
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+def refresh_in_background(cache: ResponseCache, key: str, request: ProcessPapersRequest) -> None:
+    """Recompute a stale cached response unless a refresh is already running"""
+    if not cache.begin_refresh(key):
+        return
+
+    async def refresh():
+        try:
+            content = await asyncio.to_thread(compute_process_response, request, None, cache_lifetime(cache))
+            await asyncio.to_thread(cache.put, key, content, process_etag(content))
+        except Exception as e:
+            cache.add('refresh_errors')
+            logger.warning("Background refresh failed for %r: %s", request.query, e)
+        finally:
+            cache.end_refresh(key)
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def process_request(request: ProcessPapersRequest, http_request: Request) -> Response:
+    """Shared body of POST and GET /api/process"""
+    profile = start_profile(f"/api/process {request.query!r}") if profiling_requested(http_request) else None
+    cache = get_response_cache()
+    # Profiled requests always run the pipeline
+    use_cache = cache.enabled and profile is None
+    try:
+        logger.info("Processing papers for query: %s", request.query)
+        logger.info("Request params - num_papers: %s, local_first: %s", request.num_papers, request.local_first)
         
-        logger.info(f"Found {len(papers)} papers")
-        
-        # Step 2: Scrape abstracts from paper URLs
-        logger.info("\n" + "=" * 60)
-        logger.info("WEB SCRAPER - EXTRACTING ABSTRACTS")
-        logger.info("=" * 60)
-        scraper = PaperScraper()
-        scraped_papers = scraper.scrape_papers(papers)
+        if use_cache:
+            key = cache.key(request.query, request.num_papers, request.local_first)
+            entry = await asyncio.to_thread(cache.get, key)
+            if entry is not None:
+                if cache.is_fresh(entry):
+                    cache.add('hits')
+                else:
+                    cache.add('stale_hits')
+                    refresh_in_background(cache, key, request)
+                return conditional_response(http_request, entry['content'], cache.headers(entry))
+            cache.add('misses')
         
-        logger.info(f"Scraped {len(scraped_papers)} papers")
+        cancel_event = threading.Event()
+        session_ttl = cache_lifetime(cache) if use_cache else None
+        work = lambda: compute_process_response(request, cancel_event, session_ttl)
+        if profile is not None:
+            work = profile.wrap(work, 'pipeline')
+        try:
+            content = await run_until_disconnect(http_request, work, cancel_event)
+        finally:
+            if profile is not None:
+                get_profile_store().save(profile.stop())
         
-        # Step 3: Convert to ProcessedPaper objects
-        processed_papers = [
-            ProcessedPaper(
-                title=paper['title'],
-                link=paper['link'],
-                snippet=paper['snippet'],
-                year=paper.get('year'),
-                abstract=paper.get('abstract'),
-                image_urls=[]  # Empty - will be loaded progressively
-            )
-            for paper in scraped_papers
-        ]
+        etag = process_etag(content)
+        if use_cache:
+            entry = await asyncio.to_thread(cache.put, key, content, etag)
+            return conditional_response(http_request, content, cache.headers(entry))
+        if profile is not None:
+            return FastJSONResponse(content, headers={**profile_headers(profile), 'Cache-Control': 'no-store'})
+        return conditional_response(http_request, content, cache.headers(None, etag))
         
-        return ProcessPapersResponse(
-            query=request.query,
-            papers=processed_papers
+    except RequestCancelled as e:
+        raise client_closed(e)
+    except Exception as e:
+        logger.exception("Pipeline error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Pipeline error: {str(e)}"
         )
-        
+
+
+@app.post("/api/process", response_model=ProcessPapersResponse)
+async def process_papers(request: ProcessPapersRequest, http_request: Request):
+    """
+    Fast pipeline: Search papers and return immediately (no image generation)
+    Images can be loaded progressively via /api/generate-image endpoint
+
+    With local_first=true, previously seen papers are answered from the
+    local index and Serper is only called to top up missing results.
+    
+    When more results are available, next_cursor can be passed to
+    /api/process/next to load them without repeating this search.
+    
+    Responses are cached for PROCESS_CACHE_MAX_AGE seconds and carry an
+    ETag; use GET /api/process to let browsers and CDNs cache them too.
+    
+    If the client disconnects, scrapes that have not started are cancelled.
+    
+    Admins can add ?profile=1 (with the X-Admin-Token header) to run the
+    request under the sampling profiler; the X-Profile-Id response header
+    names the result at /api/profiles/{profile_id}.
+    """
+    return await process_request(request, http_request)
+
+
+@app.get("/api/process", response_model=ProcessPapersResponse)
+async def process_papers_get(
+    http_request: Request,
+    query: str = Query(..., description="Search query"),
+    num_papers: int = Query(5, ge=1, le=20, description="Number of papers to process"),
+    local_first: bool = Query(False, description="Answer from the local paper index first")
+):
+    """
+    Cacheable form of POST /api/process (same parameters, in the query string)
+
+    Responses carry ETag, Cache-Control (public, max-age,
+    stale-while-revalidate) and Age headers, and a request whose
+    If-None-Match matches the current ETag gets 304 Not Modified. The
+    next_cursor of a cached body is shared by every client it is served to
+    and stays valid for as long as the body can be.
+    """
+    request = ProcessPapersRequest(query=query, num_papers=num_papers, local_first=local_first)
+    return await process_request(request, http_request)
+
+
+@app.post("/api/process/next", response_model=ProcessPapersResponse)
+async def process_next_page(request: NextPageRequest, http_request: Request):
+    """
+    Load the next results of a search started with /api/process
+    
+    Reuses the results already fetched for the search and only scrapes the
+    returned slice; Serper is asked for its next page only when they run
+    out. Sending the same cursor again returns the same slice. Only offsets
+    the server issued a cursor for are accepted, so a crafted cursor cannot
+    make one request fetch many Serper pages.
+    """
+    try:
+        session_id, offset = decode_cursor(request.cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    sessions = get_search_sessions()
+    session = await asyncio.to_thread(sessions.get, session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cursor expired or unknown - start a new search"
+        )
+    if offset > session.get('issued', len(session['results'])):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    try:
+        logger.info("Loading results %s+ for query: %s", offset, session['query'])
+        serper = get_serper_client()
+        scraper = get_scraper()
+        index = get_index()
+        cancel_event = threading.Event()
+        papers = await run_until_disconnect(
+            http_request,
+            lambda: next_page(
+                session,
+                offset,
+                serper=serper,
+                scraper=scraper,
+                index=index,
+                cancel_event=cancel_event
+            ),
+            cancel_event
+        )
+        end = offset + len(papers)
+        # Every client served a cached body shares its session: keep the
+        # copy that fetched further if another request saved one meanwhile
+        latest = await asyncio.to_thread(sessions.get, session_id)
+        if latest is not None and len(latest['results']) > len(session['results']):
+            latest['issued'] = max(latest.get('issued', 0), session.get('issued', 0))
+            session = latest
+        next_cursor = None
+        if papers and has_more(session, end):
+            session['issued'] = max(session.get('issued', 0), end)
+            next_cursor = encode_cursor(session_id, end)
+        await asyncio.to_thread(sessions.save, session_id, session)
+        return FastJSONResponse({
+            'query': session['query'],
+            'papers': [processed_paper_dict(paper) for paper in papers],
+            'next_cursor': next_cursor
+        })
+    
+    except HTTPException:
+        raise
+    except RequestCancelled as e:
+        raise client_closed(e)
     except Exception as e:
-        import traceback
-        logger.error(f"Pipeline error: {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Pipeline error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Pipeline error: {str(e)}"
         )
 
 
+@app.post("/api/export")
+async def export_papers(request: ExportRequest, http_request: Request):
+    """
+    Stream processed papers for many queries as NDJSON
+    
+    Up to `concurrency` queries run at once and each one's rows (query,
+    title, link, year, abstract, image_urls) are sent as soon as it
+    finishes, in completion order. A failed query yields a row with an
+    "error" field. Memory use does not grow with the number of queries.
+    
+    The export never starts renders: image_urls lists a paper's image
+    only if it was already rendered (e.g. from the web UI) and is still in
+    the shared render cache, mirrored locally when IMAGE_MIRROR_DIR is set.
+    Without SHARED_CACHE_PATH it is always empty.
+    """
+    serper = get_serper_client()
+    scraper = get_scraper()
+    index = get_index()
+    scenario = get_scenario_client() if get_shared_cache() is not None else None
+    base_url = str(http_request.base_url)
+    logger.info("Exporting %s queries (concurrency=%s)", len(request.queries), request.concurrency)
+    
+    def run_query(query: str, cancel_event: threading.Event) -> List[Dict]:
+        papers = run_pipeline(
+            query=query,
+            num_papers=request.num_papers,
+            serper=serper,
+            scraper=scraper,
+            index=index,
+            local_first=request.local_first,
+            cancel_event=cancel_event
+        )
+        if scenario is not None:
+            for paper in papers:
+                image_urls = scenario.cached_images(build_image_prompt(paper))
+                paper['image_urls'] = local_image_urls(base_url, image_urls)[0]
+        return papers
+    
+    return StreamingResponse(
+        stream_export(request.queries, run_query, request.concurrency),
+        media_type='application/x-ndjson'
+    )
+
+
+def job_finished(job: Dict) -> bool:
+    """Whether a job has reached a final state"""
+    return job['status'] in ('success', 'failure')
+
+
+def preview_ready(job: Dict) -> bool:
+    """Whether a job has a preview result (or has already finished)"""
+    return job_finished(job) or bool((job.get('result') or {}).get('preview_urls'))
+
+
+async def wait_for_job(
+    queue: JobQueue,
+    job_id: str,
+    timeout: float,
+    interval: float = 1.0,
+    ready: Callable[[Dict], bool] = job_finished,
+    http_request: Optional[Request] = None
+) -> Optional[Dict]:
+    """
+    Wait for a queued job without blocking the event loop
+
+    Args:
+        queue: Job queue holding the task
+        job_id: Job ID to wait for
+        timeout: Maximum seconds to wait
+        interval: Seconds between result store lookups
+        ready: Predicate that ends the wait (default: job finished)
+        http_request: Request to watch; if its client disconnects, the
+            job is cancelled while still queued, and a job already running
+            in this process has its renders stopped
+
+    Returns:
+        The job dict once ready, or the last seen state if the timeout expired
+
+    Raises:
+        RequestCancelled: If the client disconnected while waiting
+    """
+    deadline = time.monotonic() + timeout
+    job = await asyncio.to_thread(queue.get, job_id)
+    while job and not ready(job) and time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        if http_request is not None and await http_request.is_disconnected():
+            stats = get_cancellation_stats()
+            if await asyncio.to_thread(queue.cancel, job_id, 'Cancelled: client disconnected'):
+                stats.add('queue_jobs_cancelled')
+            elif _background_cancel.get(job_id) is not None:
+                # The Scenario client counts the renders dropped or abandoned
+                _background_cancel[job_id].set()
+            else:
+                stats.add('queue_jobs_abandoned')
+            raise RequestCancelled(f"Stopped waiting for job {job_id}")
+        job = await asyncio.to_thread(queue.get, job_id)
+    return job
+
+
+async def run_until_disconnect(
+    http_request: Request,
+    func: Callable,
+    cancel_event: threading.Event,
+    check_interval: float = 0.5
+):
+    """
+    Run blocking work in a thread, setting cancel_event if the client disconnects
+
+    Args:
+        http_request: Incoming request to watch for disconnects
+        func: Blocking callable that honours cancel_event
+        cancel_event: Event set once the client has gone away
+        check_interval: Seconds between disconnect checks
+
+    Returns:
+        Whatever func returns
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(func))
+    while not task.done():
+        done, _ = await asyncio.wait({task}, timeout=check_interval)
+        if not done and not cancel_event.is_set() and await http_request.is_disconnected():
+            logger.info("Client disconnected - cancelling queued work")
+            cancel_event.set()
+    return task.result()
+
+
+# Seconds a finished render's response may be reused (Scenario asset URLs
+# are signed and expire, so this stays short)
+FINISHED_IMAGE_MAX_AGE = 300
+
+
+def image_response(response: GenerateImageResponse) -> Response:
+    """
+    Image generation response with its ETag
+
+    Only a finished, successful render may be reused by the client;
+    queued, preview and failed responses are not stored.
+    """
+    content = response.model_dump()
+    final = response.success and not response.preview and response.status in (None, 'success')
+    return FastJSONResponse(content, headers={
+        'ETag': make_etag(content),
+        'Cache-Control': f"private, max-age={FINISHED_IMAGE_MAX_AGE}" if final else 'no-store',
+    })
+
+
 @app.post("/api/generate-image", response_model=GenerateImageResponse)
-async def generate_image(request: GenerateImageRequest):
+async def generate_image(request: GenerateImageRequest, http_request: Request):
     """
     Generate image for a single paper (called progressively by frontend)
+
+    In queue mode (IMAGE_QUEUE_BACKEND set) the task is handed to a worker
+    process; with wait=false the job ID is returned immediately and can be
+    polled via /api/jobs/{job_id}.
+
+    With preview=true a fast low-resolution render is returned as soon as
+    it completes (preview=true in the response) while the full render keeps
+    running as job_id.
     """
     try:
         paper = request.paper
-        logger.info("=" * 60)
-        logger.info("SCENARIO API - GENERATING IMAGE")
-        logger.info("=" * 60)
-        logger.info(f"Paper: {paper.title[:50]}...")
-        
-        scenario = get_scenario_client()
-        
-        # Prepare paper data for image generation
-        paper_dict = paper.model_dump()
+        logger.debug("SCENARIO API - GENERATING IMAGE")
+        logger.info("Paper: %s...", paper.title[:50])
         
-        # Truncate abstract for faster image generation (keep first 500 chars)
-        if paper_dict.get('abstract') and len(paper_dict['abstract']) > 500:
-            paper_dict['abstract'] = paper_dict['abstract'][:500] + "..."
-        
-        # CRITICAL: Remove snippet to prevent query contamination
-        # The snippet field may contain search-highlighted text that leaks user query terms
-        paper_dict.pop('snippet', None)
+        # Build prompt with only title, abstract, and year
+        prompt = build_image_prompt(paper.model_dump())
+        logger.info("Generated prompt length: %s characters", len(prompt))
         
-        # Also remove fields not needed for image generation
-        paper_dict.pop('image_urls', None)
-        paper_dict.pop('link', None)
+        payload = {
+            'prompt': prompt,
+            'width': 1024,
+            'height': 1024,
+            'samples': 1,
+            'steps': 28,
+            'priority': request.priority
+        }
+        if request.preview:
+            payload['preview'] = {
+                'width': PREVIEW_SIZE,
+                'height': PREVIEW_SIZE,
+                'steps': PREVIEW_STEPS
+            }
         
-        paper_json = json.dumps(paper_dict, indent=2)
+        queue = get_queue()
+        run_in_process = queue is None and request.preview
+        if run_in_process:
+            # No broker configured: the full render still needs a pollable
+            # job, so run the task in this process behind an in-memory store
+            queue = _background_jobs
         
-        # Build prompt with only title, abstract, and year
-        prompt = f"""Create an engaging, informative scientific visualization that captures the essence of this research paper.
-        Paper Data:
-        {paper_json}
-
-        Style: Modern, professional scientific illustration with clean design.
-        Goal: Grab reader attention and convey the research's key concepts visually.
-        Make it informative, insightful, and visually compelling for academic audiences."""
+        if queue is not None:
+            job_id = await asyncio.to_thread(queue.enqueue, payload, request.priority)
+            if run_in_process:
+                _background_executor.submit(process_one, queue, get_scenario_client(), 'api', _background_cancel)
+            if not request.wait:
+                return image_response(GenerateImageResponse(image_urls=[], success=True, job_id=job_id, status='queued'))
+            
+            timeout = float(os.getenv('IMAGE_QUEUE_WAIT_TIMEOUT', '300'))
+            job = await wait_for_job(
+                queue,
+                job_id,
+                timeout,
+                ready=preview_ready if request.preview else job_finished,
+                http_request=http_request
+            )
+            job_status = job['status'] if job else 'failure'
+            result = (job.get('result') or {}) if job else {}
+            
+            if job_status != 'success' and result.get('preview_urls'):
+                # Preview is ready; the full render keeps running behind it
+                return image_response(GenerateImageResponse(
+                    image_urls=result['preview_urls'],
+                    success=True,
+                    preview=True,
+                    job_id=job_id,
+                    status=job_status
+                ))
             
-        logger.info(f"Generated prompt length: {len(prompt)} characters")
-        logger.info(f"Paper data sent to Scenario: title={paper_dict.get('title', 'N/A')[:50]}..., has_abstract={bool(paper_dict.get('abstract'))}")
+            image_urls, thumbnail_urls = await mirror_images(http_request, result.get('image_urls', []))
+            return image_response(GenerateImageResponse(
+                image_urls=image_urls,
+                thumbnail_urls=thumbnail_urls,
+                success=job_status == 'success',
+                job_id=job_id,
+                status=job_status
+            ))
         
-        image_urls = scenario.generate_image(
-            prompt=prompt,
-            width=1024,
-            height=1024,
-            samples=1
+        scenario = get_scenario_client()
+        cancel_event = threading.Event()
+        image_urls = await run_until_disconnect(
+            http_request,
+            lambda: scenario.generate_image(
+                prompt=prompt,
+                width=1024,
+                height=1024,
+                samples=1,
+                priority=request.priority,
+                cancel_event=cancel_event
+            ),
+            cancel_event
         )
+        image_urls, thumbnail_urls = await mirror_images(http_request, image_urls)
         
-        return GenerateImageResponse(
+        return image_response(GenerateImageResponse(
             image_urls=image_urls,
+            thumbnail_urls=thumbnail_urls,
             success=True
-        )
+        ))
         
+    except RequestCancelled as e:
+        raise client_closed(e)
     except Exception as e:
-        logger.error(f"Image generation error: {e}")
-        return GenerateImageResponse(
+        logger.error("Image generation error: %s", e)
+        return image_response(GenerateImageResponse(
             image_urls=[],
             success=False
+        ))
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, http_request: Request):
+    """
+    Get the status of a queued image generation job
+
+    Preview-mode jobs report preview_urls as soon as the preview render is
+    done and image_urls once the full-quality render has finished.
+    
+    Send the last ETag in If-None-Match to get 304 Not Modified while the
+    job is unchanged.
+    """
+    queue = get_queue()
+    job = await asyncio.to_thread(queue.get, job_id) if queue else None
+    if job is None:
+        job = _background_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job not found: {job_id}"
+        )
+    result = job.get('result') or {}
+    image_urls, thumbnail_urls = await mirror_images(http_request, result.get('image_urls', []))
+    content = JobStatusResponse(
+        job_id=job_id,
+        status=job['status'],
+        image_urls=image_urls,
+        thumbnail_urls=thumbnail_urls,
+        preview_urls=result.get('preview_urls', []),
+        error=job.get('error')
+    ).model_dump()
+    # Pollers revalidate every time: an unchanged job costs a bodiless 304
+    cache_control = f"private, max-age={FINISHED_IMAGE_MAX_AGE}" if job_finished(job) else 'no-cache'
+    return conditional_response(http_request, content, {'ETag': make_etag(content), 'Cache-Control': cache_control})
+
+
+@app.post("/api/webhooks/scenario")
+async def scenario_webhook(http_request: Request):
+    """
+    Scenario job completion callback
+
+    Wakes the generation request waiting on the job so it resolves without
+    waiting for its next poll. When SCENARIO_WEBHOOK_SECRET is set, the
+    caller must send it in the X-Webhook-Secret header or ?token= parameter.
+    """
+    secret = os.getenv('SCENARIO_WEBHOOK_SECRET')
+    if secret:
+        provided = http_request.headers.get('X-Webhook-Secret') or http_request.query_params.get('token', '')
+        if not hmac.compare_digest(provided.encode(), secret.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid webhook secret"
+            )
+
+    try:
+        payload = await http_request.json()
+    except ValueError:
+        payload = None
+    job_id = extract_job_id(payload) if isinstance(payload, dict) else None
+    if not job_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job ID not found in callback"
+        )
+
+    waiting = get_job_event_hub().notify(job_id, payload)
+    logger.info("Scenario callback for job %s (waiter: %s)", job_id, waiting)
+    return {"received": True, "job_id": job_id, "waiting": waiting}
+
+
+@app.get("/api/images/{digest}")
+async def get_image(digest: str, variant: str = 'original'):
+    """
+    Serve a mirrored image (supports Range requests)
+
+    Blobs are content-addressed, so responses are cacheable forever.
+    """
+    store = get_store()
+    path = store.path_for(digest, variant) if store else None
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    return FileResponse(
+        path,
+        media_type=store.media_type(path),
+        headers={
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'ETag': f'"{digest}-{variant}"'
+        }
+    )
+
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str, http_request: Request, format: str = 'json'):
+    """
+    Retrieve a request profile (admin only)
+
+    format=json returns per-stage wall times with the folded stacks;
+    format=folded returns only the stacks, ready for flamegraph.pl or
+    speedscope.
+    """
+    require_admin(http_request)
+    result = get_profile_store().get(profile_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
         )
+    if format == 'folded':
+        return PlainTextResponse(result['folded'])
+    return result
+
+
+_startup_timings['import_ms'] = _elapsed_ms(_IMPORT_STARTED)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""
+Request Cancellation
+Shared exception and wasted-work counters for work abandoned when the
+HTTP client disconnects
+"""
+
+import threading
+from typing import Dict
+
+
+class RequestCancelled(Exception):
+    """Raised when work is stopped because its request was cancelled"""
+    pass
+
+
+class CancellationStats:
+    """
+    Counts work skipped or thrown away after a client disconnect
+
+    Counters ending in '_cancelled' are work that never ran; counters
+    ending in '_abandoned' are work already under way whose result is
+    discarded (the wasted part).
+    """
+
+    COUNTERS = (
+        'requests_cancelled',
+        'scrapes_cancelled',
+        'scrapes_abandoned',
+        'scenario_submissions_cancelled',
+        'scenario_jobs_abandoned',
+        'queue_jobs_cancelled',
+        'queue_jobs_abandoned',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+
+    def add(self, counter: str, count: int = 1) -> None:
+        """Increase a counter"""
+        with self._lock:
+            self._counts[counter] += count
+
+    def stats(self) -> Dict[str, int]:
+        """Current counters for monitoring"""
+        with self._lock:
+            return dict(self._counts)
+
+
+_stats = CancellationStats()
+
+
+def get_cancellation_stats() -> CancellationStats:
+    """Get the process-wide cancellation counters"""
+    return _stats
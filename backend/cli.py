@@ -0,0 +1,387 @@
+"""
+Batch Processing CLI
+Precomputes papers (and optionally images) for a file of queries across
+a process pool, with a checkpoint so an interrupted run resumes
+
+Usage:
+    python -m backend.cli queries.txt -o results.jsonl [--images] [--processes 4]
+
+Rerunning the same command after an interruption skips completed queries
+and papers already written to the output file.
+"""
+
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .serper_client import SerperClient
+from .scenario_client import ScenarioClient
+from .scraper import PaperScraper
+from .paper_index import get_paper_index
+from .dedup import deduplicate_papers
+from .pipeline import build_image_prompt, scrape_missing
+from .export import export_row
+from .log_setup import configure_logging, shutdown_logging
+
+# Get logger (don't configure - let the entry point handle it)
+logger = logging.getLogger(__name__)
+
+
+def read_queries(path: str) -> List[str]:
+    """
+    Read one query per line, skipping blank lines, '#' comments and repeats
+
+    Args:
+        path: Query file
+
+    Returns:
+        Queries in file order
+    """
+    queries = []
+    seen = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            query = line.strip()
+            if not query or query.startswith('#') or query in seen:
+                continue
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+def _read_rows(path: str) -> List[Dict]:
+    """
+    Parse a JSONL file, cutting off a partly written last line
+
+    A run killed mid-write can leave an incomplete line; it is truncated so
+    the next append starts on a fresh line.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        data = f.read()
+    complete = data.rfind(b'\n') + 1
+    if complete < len(data):
+        logger.warning("Dropping incomplete last line of %s", path)
+        with open(path, 'r+b') as f:
+            f.truncate(complete)
+    rows = []
+    for line in data[:complete].splitlines():
+        if line.strip():
+            rows.append(json.loads(line))
+    return rows
+
+
+class Checkpoint:
+    """
+    Progress of a batch run
+
+    Rows in the output file are the completed papers; the checkpoint file
+    lists queries whose papers have all been written. Each record is
+    flushed and synced as it is written, so at most the tasks in flight
+    are redone after a crash.
+    """
+
+    def __init__(self, output_path: str, checkpoint_path: Optional[str] = None):
+        """
+        Load progress from an earlier run, if any
+
+        Args:
+            output_path: JSONL results file (appended to)
+            checkpoint_path: Completed-query log (default: output_path + '.checkpoint')
+        """
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+        self.done_queries: Set[str] = {row['query'] for row in _read_rows(self.checkpoint_path)}
+        self.done_papers: Dict[str, Set[str]] = {}
+        for row in _read_rows(output_path):
+            self.done_papers.setdefault(row['query'], set()).add(row['link'])
+        self._output = open(output_path, 'a', encoding='utf-8')
+        self._checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8')
+
+    def papers_done(self, query: str) -> Set[str]:
+        """Links of the query's papers already in the output"""
+        return self.done_papers.get(query, set())
+
+    def _append(self, f, row: Dict) -> None:
+        f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    def write_paper(self, query: str, paper: Dict) -> None:
+        """Append a finished paper to the output"""
+        self._append(self._output, export_row(query, paper))
+        self.done_papers.setdefault(query, set()).add(paper['link'])
+
+    def mark_done(self, query: str) -> None:
+        """Record that all of a query's papers are written"""
+        self._append(self._checkpoint, {'query': query})
+        self.done_queries.add(query)
+
+    def close(self) -> None:
+        self._output.close()
+        self._checkpoint.close()
+
+
+# Per-process clients and cross-process upstream limits, set by init_worker
+_worker: Dict = {}
+
+
+def report_pid(pids) -> None:
+    """Record this pool process's PID so abort_pool can stop it"""
+    pids.put(os.getpid())
+
+
+def init_worker(serper_slots, scenario_slots, pids=None) -> None:
+    """
+    Set up a pool process
+
+    Args:
+        serper_slots: Semaphore shared by all processes bounding Serper calls
+        scenario_slots: Semaphore shared by all processes bounding Scenario renders
+        pids: Queue the process reports its PID to (see abort_pool)
+    """
+    if pids is not None:
+        report_pid(pids)
+    from dotenv import load_dotenv
+    load_dotenv()
+    if configure_logging():
+        # Pool processes skip atexit handlers; flush queued records on exit
+        multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=10)
+    _worker['serper_slots'] = serper_slots
+    _worker['scenario_slots'] = scenario_slots
+
+
+def _client(name: str, factory: Callable):
+    # Factories may return None (e.g. no paper index); that is cached too
+    if name not in _worker:
+        _worker[name] = factory()
+    return _worker[name]
+
+
+def search_task(query: str, num_papers: int, skip_links: Set[str]) -> List[Dict]:
+    """
+    Search a query and scrape the papers not written yet (runs in a pool process)
+
+    Args:
+        query: Search query
+        num_papers: Papers wanted for the query
+        skip_links: Links already in the output
+
+    Returns:
+        Paper dicts still to be written
+    """
+    serper = _client('serper', SerperClient)
+    scraper = _client('scraper', PaperScraper)
+    index = _client('index', get_paper_index)
+    with _worker['serper_slots']:
+        results = serper.search_scholar(query=query, num_results=num_papers, keep_extra=True)
+    if index is not None:
+        index.add_papers(results)
+    papers = deduplicate_papers(results)[:num_papers]
+    papers = [paper for paper in papers if paper['link'] not in skip_links]
+    scrape_missing(papers, scraper, index)
+    return papers
+
+
+def image_task(paper: Dict) -> List[str]:
+    """Render a paper's image (runs in a pool process)"""
+    scenario = _client('scenario', ScenarioClient)
+    prompt = build_image_prompt({
+        'title': paper['title'],
+        'year': paper.get('year'),
+        'abstract': paper.get('abstract'),
+    })
+    with _worker['scenario_slots']:
+        return scenario.generate_image(prompt=prompt)
+
+
+def run_batch(
+    queries: Iterable[str],
+    checkpoint: Checkpoint,
+    executor: Executor,
+    num_papers: int = 5,
+    images: bool = False,
+    max_searches: int = 4,
+    search: Callable = search_task,
+    render: Callable = image_task
+) -> Dict[str, int]:
+    """
+    Process queries on an executor, writing each paper as it completes
+
+    At most `max_searches` searches are queued at a time, so image renders
+    for finished searches are not stuck behind the rest of the query list.
+    A query is marked done once all its papers are written; failed searches
+    or renders leave it open for the next run.
+
+    Args:
+        queries: Search queries
+        checkpoint: Progress and output of this run
+        executor: Pool running search and render tasks
+        num_papers: Papers per query
+        images: Render an image for every paper
+        max_searches: Searches submitted at once
+        search: Task (query, num_papers, skip_links) -> papers
+        render: Task (paper) -> image URLs
+
+    Returns:
+        Counters: queries, skipped, completed, failed, papers, images_failed
+    """
+    summary = dict.fromkeys(('queries', 'skipped', 'completed', 'failed', 'papers', 'images_failed'), 0)
+    todo = []
+    for query in queries:
+        summary['queries'] += 1
+        if query in checkpoint.done_queries:
+            summary['skipped'] += 1
+        else:
+            todo.append(query)
+    pending = iter(todo)
+    running: Dict[Future, Tuple[str, Optional[Dict]]] = {}
+    outstanding: Dict[str, int] = {}
+    failed: Set[str] = set()
+
+    def launch() -> None:
+        searches = sum(1 for _, paper in running.values() if paper is None)
+        while searches < max_searches:
+            query = next(pending, None)
+            if query is None:
+                return
+            running[executor.submit(search, query, num_papers, checkpoint.papers_done(query))] = (query, None)
+            searches += 1
+
+    def finish(query: str) -> None:
+        if query in failed:
+            summary['failed'] += 1
+        else:
+            checkpoint.mark_done(query)
+            summary['completed'] += 1
+
+    launch()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            query, paper = running.pop(future)
+            if paper is None:
+                try:
+                    papers = future.result()
+                except Exception as e:
+                    logger.error("Search failed for query %r: %s", query, e)
+                    summary['failed'] += 1
+                    continue
+                if not images:
+                    for found in papers:
+                        checkpoint.write_paper(query, found)
+                    summary['papers'] += len(papers)
+                    finish(query)
+                    continue
+                if not papers:
+                    finish(query)
+                outstanding[query] = len(papers)
+                for found in papers:
+                    running[executor.submit(render, found)] = (query, found)
+                continue
+
+            try:
+                paper['image_urls'] = future.result()
+            except Exception as e:
+                logger.error("Image failed for %r: %s", paper['title'][:50], e)
+                summary['images_failed'] += 1
+                failed.add(query)
+            else:
+                checkpoint.write_paper(query, paper)
+                summary['papers'] += 1
+            outstanding[query] -= 1
+            if not outstanding[query]:
+                finish(query)
+        launch()
+    return summary
+
+
+def abort_pool(executor: Executor, pids) -> None:
+    """
+    Stop a pool without waiting for the tasks it is running
+
+    Queued tasks are cancelled and the pool processes terminated. Their
+    papers are not in the checkpoint, so the next run redoes them.
+
+    Args:
+        executor: Process pool
+        pids: Queue its processes reported their PIDs to (see report_pid)
+    """
+    executor.shutdown(wait=False, cancel_futures=True)
+    while not pids.empty():
+        pid = pids.get()
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            # Already exited
+            pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.cli',
+        description='Precompute papers and images for a file of queries (one per line)'
+    )
+    parser.add_argument('queries', help='Query file, one query per line')
+    parser.add_argument('-o', '--output', required=True, help='JSONL results file (appended to)')
+    parser.add_argument('--checkpoint', help='Progress file (default: OUTPUT.checkpoint)')
+    parser.add_argument('-n', '--num-papers', type=int, default=5, help='Papers per query (default: 5)')
+    parser.add_argument('--images', action='store_true', help='Generate an image for every paper')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count() or 4,
+                        help='Pool processes (default: CPU count)')
+    parser.add_argument('--serper-concurrency', type=int, default=2,
+                        help='Serper searches in flight across all processes (default: 2)')
+    parser.add_argument('--scenario-concurrency', type=int, default=4,
+                        help='Scenario renders in flight across all processes (default: 4)')
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    configure_logging()
+    queries = read_queries(args.queries)
+    checkpoint = Checkpoint(args.output, args.checkpoint)
+    # spawn: pool processes must not inherit this process's logging thread
+    context = multiprocessing.get_context('spawn')
+    pids = context.SimpleQueue()
+    executor = ProcessPoolExecutor(
+        max_workers=args.processes,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(
+            context.BoundedSemaphore(args.serper_concurrency),
+            context.BoundedSemaphore(args.scenario_concurrency),
+            pids
+        )
+    )
+    logger.info(
+        "Processing %s queries (%s already done) with %s processes",
+        len(queries), len(checkpoint.done_queries & set(queries)), args.processes
+    )
+    try:
+        summary = run_batch(
+            queries, checkpoint, executor,
+            num_papers=args.num_papers,
+            images=args.images,
+            max_searches=args.processes
+        )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; rerun the same command to resume")
+        abort_pool(executor, pids)
+        return 130
+    finally:
+        executor.shutdown(cancel_futures=True)
+        checkpoint.close()
+        shutdown_logging()
+    print(json.dumps(summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
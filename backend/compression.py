@@ -0,0 +1,221 @@
+"""
+Response Compression
+ASGI middleware that negotiates zstd, brotli or gzip with the client and
+compresses responses above a size threshold
+"""
+
+import os
+import zlib
+from typing import Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd is not offered without it
+    zstandard = None
+
+# Server preference when the client weights encodings equally
+PREFERRED_ENCODINGS = ('zstd', 'br', 'gzip')
+
+# Content types worth compressing (images are already compressed)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/', 'application/javascript')
+
+
+def available_encodings() -> tuple:
+    """Encodings this process can produce, in server preference order"""
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return tuple(name for name in PREFERRED_ENCODINGS if installed[name])
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Pick a content encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, br;q=0.9"
+        available: Encodings the server can produce, most preferred first
+
+    Returns:
+        Chosen encoding, or None to send the response uncompressed
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class _Compressor:
+    """Incremental compressor with one interface over gzip, brotli and zstd"""
+
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 4
+    ZSTD_LEVEL = 3
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self._impl = zlib.compressobj(self.GZIP_LEVEL, zlib.DEFLATED, 31)
+        elif encoding == 'br':
+            self._impl = brotli.Compressor(quality=self.BROTLI_QUALITY)
+        else:
+            self._impl = zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress a chunk, flushing it unless more input follows at once"""
+        if self.encoding == 'br':
+            output = self._impl.process(data)
+            return output + self._impl.flush() if flush else output
+        output = self._impl.compress(data)
+        if not flush:
+            return output
+        if self.encoding == 'gzip':
+            return output + self._impl.flush(zlib.Z_SYNC_FLUSH)
+        return output + self._impl.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        """Compress any remaining input and end the stream"""
+        if self.encoding == 'br':
+            return self._impl.finish()
+        return self._impl.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress compressible responses for clients that accept it
+
+    Complete bodies smaller than `minimum_size` are sent as they are, since
+    the framing overhead outweighs the savings. Streamed bodies are
+    compressed chunk by chunk. Responses that already carry a
+    Content-Encoding, partial (Range) responses and non-text content such
+    as images pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        """
+        Initialize the middleware
+
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Smallest body in bytes worth compressing
+                (default: COMPRESSION_MIN_SIZE or 1024)
+        """
+        self.app = app
+        if minimum_size is None:
+            minimum_size = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accept = ''
+        for key, value in scope.get('headers', []):
+            if key == b'accept-encoding':
+                accept = value.decode('latin-1')
+                break
+        encoding = negotiate_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Per-request send wrapper that decides on and applies compression"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _compressible(self, headers: Dict[bytes, bytes], status: int) -> bool:
+        if status == 206 or b'content-encoding' in headers or b'content-range' in headers:
+            return False
+        content_type = headers.get(b'content-type', b'').decode('latin-1').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def __call__(self, message):
+        message_type = message['type']
+        if message_type == 'http.response.start':
+            headers = {key.lower(): value for key, value in message.get('headers', [])}
+            self.passthrough = not self._compressible(headers, message['status'])
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Held back until the first body chunk shows whether it streams
+                self.start_message = message
+            return
+
+        if message_type != 'http.response.body' or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(start)
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            headers = [
+                (key, value) for key, value in start.get('headers', [])
+                if key.lower() not in (b'content-length', b'vary')
+            ]
+            vary = next((value for key, value in start.get('headers', []) if key.lower() == b'vary'), b'')
+            # The compressed bytes differ from the identity body, so a strong
+            # validator becomes weak (If-None-Match still matches it)
+            headers = [
+                (key, b'W/' + value if key.lower() == b'etag' and not value.startswith(b'W/') else value)
+                for key, value in headers
+            ]
+            headers.append((b'vary', vary + b', Accept-Encoding' if vary else b'Accept-Encoding'))
+            headers.append((b'content-encoding', self.encoding.encode()))
+
+            if not more_body:
+                data = self.compressor.compress(body, flush=False) + self.compressor.finish()
+                headers.append((b'content-length', str(len(data)).encode()))
+                await self.send({**start, 'headers': headers})
+                await self.send({'type': 'http.response.body', 'body': data})
+                return
+            await self.send({**start, 'headers': headers})
+
+        if more_body:
+            data = self.compressor.compress(body) if body else b''
+            if data:
+                await self.send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        else:
+            data = self.compressor.compress(body, flush=False) + self.compressor.finish()
+            await self.send({'type': 'http.response.body', 'body': data})
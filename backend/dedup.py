@@ -0,0 +1,196 @@
+"""
+Near-Duplicate Paper Detection
+Clusters search results that are copies of the same work (arXiv, PubMed,
+ResearchGate mirrors) and keeps the most scrapable copy of each
+"""
+
+import re
+import zlib
+import logging
+import unicodedata
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# Lower is better: hosts we scrape most reliably come first
+SCRAPE_PREFERENCE = {
+    'arxiv.org': 0,
+    'pubmed.ncbi.nlm.nih.gov': 1,
+    'researchgate.net': 2,
+}
+UNKNOWN_HOST_PREFERENCE = 3
+
+# Feature-hashing width for character shingles
+HASH_BUCKETS = 1 << 12
+SHINGLE_SIZE = 3
+
+
+# Result decorations that differ between mirrors of the same paper
+_TITLE_NOISE = re.compile(
+    r'^\s*\[(?:pdf|html|citation|book)\]\s*|\s*[-|:]\s*(?:researchgate|arxiv|pubmed|ncbi)\b.*$',
+    re.IGNORECASE
+)
+
+
+def _clean_title(title: str) -> str:
+    """Strip mirror decorations such as "[PDF]" or "- ResearchGate" from a title"""
+    return _TITLE_NOISE.sub('', title or '')
+
+
+def _numbers(text: str) -> frozenset:
+    """Numeric tokens in a text (part numbers, versions, model sizes)"""
+    return frozenset(re.findall(r'\d+', text))
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^a-z0-9]+', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def _shingle_matrix(texts: List[str]) -> "np.ndarray":
+    """
+    Build an L2-normalized TF-IDF matrix of hashed character shingles
+
+    Args:
+        texts: One text per paper
+
+    Returns:
+        Array of shape (len(texts), HASH_BUCKETS)
+    """
+    import numpy as np
+
+    counts = np.zeros((len(texts), HASH_BUCKETS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f" {_normalize(text)} "
+        if len(padded) < SHINGLE_SIZE:
+            continue
+        buckets = [
+            zlib.crc32(padded[i:i + SHINGLE_SIZE].encode()) % HASH_BUCKETS
+            for i in range(len(padded) - SHINGLE_SIZE + 1)
+        ]
+        np.add.at(counts[row], buckets, 1.0)
+
+    # Smoothed IDF over this batch
+    doc_freq = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + doc_freq)) + 1.0
+    weighted = counts * idf
+
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return weighted / norms
+
+
+def _host_preference(link: str) -> int:
+    """Scrapability rank of a paper's host (lower is better)"""
+    host = urlparse(link or '').netloc.lower()
+    for domain, rank in SCRAPE_PREFERENCE.items():
+        if host == domain or host.endswith('.' + domain):
+            return rank
+    return UNKNOWN_HOST_PREFERENCE
+
+
+def find_duplicate_clusters(
+    papers: List[Dict],
+    title_threshold: float = 0.85,
+    combined_threshold: float = 0.7
+) -> List[List[int]]:
+    """
+    Group papers that describe the same work
+
+    Two papers are linked when their title shingles are very similar, or
+    when title and snippet are both moderately similar (mirrors often trim
+    or reformat titles), unless their titles carry different numbers.
+    Links are merged transitively.
+
+    Args:
+        papers: Paper dicts with 'title' and 'snippet'
+        title_threshold: Title cosine similarity that alone marks a duplicate
+        combined_threshold: Mean of title and snippet similarity that marks a duplicate
+
+    Returns:
+        Clusters of paper indices, ordered by first appearance
+    """
+    n = len(papers)
+    if n < 2:
+        return [[i] for i in range(n)]
+
+    # Imported on first use: numpy adds ~70ms to backend start-up
+    import numpy as np
+
+    clean_titles = [_clean_title(paper.get('title', '')) for paper in papers]
+    titles = _shingle_matrix(clean_titles)
+    snippets = _shingle_matrix([paper.get('snippet', '') for paper in papers])
+    title_sim = titles @ titles.T
+    snippet_sim = snippets @ snippets.T
+
+    duplicate = (title_sim >= title_threshold) | ((title_sim + snippet_sim) / 2 >= combined_threshold)
+    np.fill_diagonal(duplicate, False)
+
+    # "Part 1" vs "Part 2" or "v3" vs "v4" are different works even when
+    # nearly every shingle matches
+    numbers = [_numbers(title) for title in clean_titles]
+
+    # Union-find over duplicate pairs
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(duplicate))):
+        if numbers[i] and numbers[j] and numbers[i] != numbers[j]:
+            continue
+        root_i, root_j = find(int(i)), find(int(j))
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def deduplicate_papers(papers: List[Dict], limit: Optional[int] = None, **thresholds) -> List[Dict]:
+    """
+    Keep the most scrapable copy of each duplicate cluster
+
+    A copy that already has an abstract wins (nothing to scrape), then the
+    host with the best scrape success, then the earlier result. The kept
+    copy takes the position of the cluster's first member, and a missing
+    year is filled in from the other copies.
+
+    Args:
+        papers: Paper dicts from SerperClient.search_scholar
+        limit: Return at most this many papers
+        **thresholds: Passed to find_duplicate_clusters
+
+    Returns:
+        Deduplicated paper dicts
+    """
+    clusters = find_duplicate_clusters(papers, **thresholds)
+
+    kept = []
+    for members in clusters:
+        best = min(
+            members,
+            key=lambda i: (not papers[i].get('abstract'), _host_preference(papers[i].get('link', '')), i)
+        )
+        paper = papers[best]
+        if paper.get('year') is None:
+            paper['year'] = next((papers[i]['year'] for i in members if papers[i].get('year')), None)
+        kept.append(paper)
+
+    removed = len(papers) - len(kept)
+    if removed:
+        logger.info("Removed %s near-duplicate papers (%s unique)", removed, len(kept))
+    return kept[:limit] if limit is not None else kept
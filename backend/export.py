@@ -0,0 +1,85 @@
+"""
+Bulk Export
+Streams processed papers for many queries as NDJSON, running a bounded
+number of queries at a time
+"""
+
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Tuple
+from .responses import dumps
+from .cancellation import get_cancellation_stats
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# Paper fields written to each export row
+EXPORT_FIELDS = ('title', 'link', 'year', 'abstract', 'image_urls')
+
+
+def export_row(query: str, paper: Dict) -> Dict:
+    """One NDJSON row for a processed paper"""
+    row = {'query': query}
+    for field in EXPORT_FIELDS:
+        row[field] = paper.get(field)
+    row['image_urls'] = row['image_urls'] or []
+    return row
+
+
+async def stream_export(
+    queries: Iterable[str],
+    run_query: Callable[[str, threading.Event], List[Dict]],
+    concurrency: int = 4
+) -> AsyncIterator[bytes]:
+    """
+    Process queries with bounded parallelism and yield NDJSON as each finishes
+
+    At most `concurrency` queries are in flight and each query's papers
+    are written out as soon as it completes, so memory depends on the
+    concurrency, not on the number of queries. A failed query produces a
+    {"query", "error"} row instead of ending the stream.
+
+    Args:
+        queries: Search queries, in submission order
+        run_query: Blocking callable (query, cancel_event) -> paper dicts;
+            run in a worker thread
+        concurrency: Queries processed at the same time
+
+    Yields:
+        NDJSON lines (one chunk per completed query)
+    """
+    pending = iter(queries)
+    running: Dict[asyncio.Future, Tuple[str, threading.Event]] = {}
+
+    def launch() -> None:
+        while len(running) < concurrency:
+            query = next(pending, None)
+            if query is None:
+                return
+            cancel_event = threading.Event()
+            task = asyncio.ensure_future(asyncio.to_thread(run_query, query, cancel_event))
+            running[task] = (query, cancel_event)
+
+    try:
+        launch()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                query, _ = running.pop(task)
+                try:
+                    papers = task.result()
+                except Exception as e:
+                    logger.error("Export failed for query %r: %s", query, e)
+                    yield dumps({'query': query, 'error': str(e)}) + b'\n'
+                    continue
+                yield b''.join(dumps(export_row(query, paper)) + b'\n' for paper in papers)
+            launch()
+    finally:
+        # The client went away (or the stream failed): stop in-flight queries
+        if running:
+            get_cancellation_stats().add('requests_cancelled')
+            logger.info("Export stopped with %s queries in flight", len(running))
+        for task, (query, cancel_event) in running.items():
+            cancel_event.set()
+            task.cancel()
@@ -0,0 +1,154 @@
+"""
+Hedged Requests
+Per-host latency statistics and a process-wide budget that decide when a
+slow fetch gets a second, racing request
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional
+from .poll_stats import quantile
+
+
+class HostLatencyStats:
+    """
+    Rolling fetch latencies per host
+
+    The hedge delay for a host is its observed p90: nine in ten fetches
+    finish before it, so a fetch still running then is likely in the tail.
+    """
+
+    # Samples needed before a host's own p90 is trusted
+    MIN_SAMPLES = 10
+
+    # Hedge delay bounds (seconds)
+    MIN_DELAY = 0.2
+    MAX_DELAY = 5.0
+
+    def __init__(self, window: int = 100, default_delay: float = 2.0):
+        """
+        Initialize the statistics store
+
+        Args:
+            window: Latencies kept per host
+            default_delay: Hedge delay for hosts without enough samples
+        """
+        self.window = window
+        self.default_delay = default_delay
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+
+    def record(self, host: str, seconds: float) -> None:
+        """Record the latency of a completed fetch"""
+        with self._lock:
+            self._latencies.setdefault(host, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, host: str) -> float:
+        """Seconds to wait on a fetch to this host before hedging it"""
+        with self._lock:
+            samples = sorted(self._latencies.get(host, ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return self.default_delay
+        return min(self.MAX_DELAY, max(self.MIN_DELAY, quantile(samples, 0.9)))
+
+    def export(self) -> Dict:
+        """Latency quantiles per host, for tuning"""
+        with self._lock:
+            hosts = {host: sorted(latencies) for host, latencies in self._latencies.items()}
+        return {
+            host: {
+                'samples': len(samples),
+                'p50': round(quantile(samples, 0.5), 3),
+                'p90': round(quantile(samples, 0.9), 3),
+                'hedge_delay': round(self.hedge_delay(host), 3),
+            }
+            for host, samples in hosts.items()
+        }
+
+
+class HedgeBudget:
+    """
+    Caps hedges at a fraction of primary requests
+
+    Every primary request earns `ratio` of a token (up to `burst`); each
+    hedge spends a whole token. With ratio=0.1, hedging can add at most
+    about 10% to upstream load, even when a host slows down across the board.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        """
+        Initialize the hedge budget
+
+        Args:
+            ratio: Hedges allowed per primary request
+            burst: Most tokens that can be saved up
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self.primaries = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.denied = 0
+
+    def on_primary(self) -> None:
+        """Credit the budget for a primary request"""
+        with self._lock:
+            self.primaries += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_hedge(self) -> bool:
+        """Spend a token for a hedge, if one is available"""
+        with self._lock:
+            if self.ratio > 0 and self._tokens >= 1:
+                self._tokens -= 1
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+
+    def on_hedge_won(self) -> None:
+        """Count a hedge that answered before its primary"""
+        with self._lock:
+            self.hedges_won += 1
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'primaries': self.primaries,
+                'hedges': self.hedges,
+                'hedges_won': self.hedges_won,
+                'denied': self.denied,
+                'tokens': round(self._tokens, 2),
+            }
+
+
+_latency_stats: Optional[HostLatencyStats] = None
+_budget: Optional[HedgeBudget] = None
+_lock = threading.Lock()
+
+
+def get_host_latency_stats() -> HostLatencyStats:
+    """
+    Get the process-wide host latency statistics
+
+    Built on first use, after the entry point has loaded .env:
+    SCRAPE_HEDGE_DEFAULT_DELAY (default 2.0 seconds).
+    """
+    global _latency_stats
+    with _lock:
+        if _latency_stats is None:
+            _latency_stats = HostLatencyStats(default_delay=float(os.getenv('SCRAPE_HEDGE_DEFAULT_DELAY', '2.0')))
+        return _latency_stats
+
+
+def get_hedge_budget() -> HedgeBudget:
+    """Get the process-wide hedge budget (SCRAPE_HEDGE_RATIO; 0 disables hedging)"""
+    global _budget
+    with _lock:
+        if _budget is None:
+            _budget = HedgeBudget(ratio=float(os.getenv('SCRAPE_HEDGE_RATIO', '0.1')))
+        return _budget
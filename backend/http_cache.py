@@ -0,0 +1,213 @@
+"""
+HTTP Caching
+ETags, conditional requests and Cache-Control for API responses, and the
+/api/process response cache with stale-while-revalidate
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from .shared_cache import SharedCache, get_shared_cache
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+def make_etag(content: Any) -> str:
+    """
+    Strong ETag for JSON-compatible content
+
+    Keys are sorted before hashing, so equal content always gets the same
+    ETag whichever process or request built it.
+    """
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return '"' + hashlib.blake2b(encoded, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag
+
+    Uses the weak comparison required for If-None-Match, so a W/ prefix
+    added by a proxy (e.g. after recompressing) still matches.
+
+    Args:
+        if_none_match: Header value (None if absent)
+        etag: Current ETag of the resource
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Recent /api/process responses with their ETags
+
+    Entries are fresh for `max_age` seconds. For `stale_seconds` after
+    that they are still served, while a single background refresh
+    recomputes them (stale-while-revalidate). Entries live in the shared
+    cache when one is configured, so every worker answers a query with
+    the same body and ETag; otherwise they are kept in this process.
+    """
+
+    COUNTERS = ('hits', 'stale_hits', 'misses', 'refreshes', 'refresh_errors', 'not_modified')
+
+    def __init__(
+        self,
+        cache: Optional[SharedCache] = None,
+        max_age: float = 300,
+        stale_seconds: float = 600,
+        max_entries: int = 256
+    ):
+        """
+        Initialize the response cache
+
+        Args:
+            cache: Shared cache to store entries in (None keeps them in memory)
+            max_age: Seconds an entry is fresh (0 disables caching)
+            stale_seconds: Further seconds a stale entry is served while refreshing
+            max_entries: In-memory entries kept before the oldest is dropped
+        """
+        self.cache = cache
+        self.max_age = max_age
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._refreshing = set()
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age > 0
+
+    def key(self, *parts: Any) -> str:
+        """Cache key for a request's parameters"""
+        digest = hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+        return f"response:{digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up an entry
+
+        Returns:
+            {'content', 'etag', 'created'}, or None if missing or past its
+            stale window
+        """
+        if self.cache is not None:
+            entry = self.cache.get(key)
+        else:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+        if entry is None or self.age(entry) > self.max_age + self.stale_seconds:
+            return None
+        return entry
+
+    def put(self, key: str, content: Dict, etag: str) -> Dict:
+        """Store a freshly computed response and return its entry"""
+        entry = {'content': content, 'etag': etag, 'created': time.time()}
+        if self.cache is not None:
+            self.cache.set(key, entry, self.max_age + self.stale_seconds)
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def age(self, entry: Dict) -> float:
+        """Seconds since the entry was computed"""
+        return max(0.0, time.time() - entry['created'])
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return self.age(entry) <= self.max_age
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim the background refresh of a stale entry (False if one is running)"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counts['refreshes'] += 1
+            return True
+
+    def end_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def headers(self, entry: Optional[Dict], etag: Optional[str] = None) -> Dict[str, str]:
+        """
+        ETag, Cache-Control and Age headers for a response
+
+        Args:
+            entry: Cache entry served (None for an uncached response)
+            etag: ETag of an uncached response
+
+        Returns:
+            Headers; shared caches may keep the response for max_age
+            seconds from when it was computed (Age tells them how much of
+            that is used up) and serve it stale while revalidating
+        """
+        if entry is None:
+            return {'ETag': etag, 'Cache-Control': 'no-cache'}
+        return {
+            'ETag': entry['etag'],
+            'Cache-Control': f"public, max-age={int(self.max_age)}, stale-while-revalidate={int(self.stale_seconds)}",
+            'Age': str(int(self.age(entry))),
+        }
+
+    def add(self, counter: str) -> None:
+        """Increase a counter"""
+        with self._lock:
+            self._counts[counter] += 1
+
+    def stats(self) -> Dict:
+        """Counters and settings for monitoring"""
+        with self._lock:
+            return {
+                'max_age': self.max_age,
+                'stale_seconds': self.stale_seconds,
+                'shared': self.cache is not None,
+                'refreshing': len(self._refreshing),
+                **self._counts,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide /api/process response cache
+
+    Settings: PROCESS_CACHE_MAX_AGE (default 300 seconds; 0 disables),
+    PROCESS_CACHE_STALE_SECONDS (default 600).
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                cache=get_shared_cache(),
+                max_age=float(os.getenv('PROCESS_CACHE_MAX_AGE', '300')),
+                stale_seconds=float(os.getenv('PROCESS_CACHE_STALE_SECONDS', '600'))
+            )
+        return _response_cache
@@ -0,0 +1,230 @@
+"""
+Local Image Mirror
+Downloads finished Scenario images once into a content-addressed store
+and produces thumbnail and WebP variants for serving from the API
+"""
+
+import os
+import re
+import hashlib
+import logging
+import tempfile
+from io import BytesIO
+from typing import List, Optional
+import requests
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class ImageStoreError(Exception):
+    """Custom exception for image mirroring errors"""
+    pass
+
+
+class ImageStore:
+    """
+    Content-addressed blob store for generated images
+
+    Layout under `root`:
+        <d[:2]>/<d>.<ext>        original bytes, d = sha256 of the content
+        <d[:2]>/<d>_thumb.webp   thumbnail variant
+        <d[:2]>/<d>_full.webp    full-size WebP variant
+        urls/<sha1(url)>         pointer from a source URL to its digest
+    """
+
+    VARIANTS = ('original', 'thumb', 'webp')
+
+    MEDIA_TYPES = {
+        '.png': 'image/png',
+        '.jpg': 'image/jpeg',
+        '.webp': 'image/webp',
+        '.gif': 'image/gif',
+        '.bin': 'application/octet-stream',
+    }
+
+    _DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, root: str, thumb_size: int = 384, webp_quality: int = 82, timeout: int = 30):
+        """
+        Initialize the image store
+
+        Args:
+            root: Directory holding the blobs (created if missing)
+            thumb_size: Longest edge of thumbnails in pixels
+            webp_quality: WebP encoder quality (0-100)
+            timeout: Download timeout in seconds
+        """
+        self.root = root
+        self.thumb_size = thumb_size
+        self.webp_quality = webp_quality
+        self.timeout = timeout
+        os.makedirs(os.path.join(root, 'urls'), exist_ok=True)
+
+    def is_valid_digest(self, digest: str) -> bool:
+        """Check that a digest is a well-formed sha256 hex string"""
+        return bool(self._DIGEST_RE.match(digest))
+
+    def _blob_dir(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2])
+
+    def _url_pointer(self, url: str) -> str:
+        return os.path.join(self.root, 'urls', hashlib.sha1(url.encode()).hexdigest())
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Write a file so readers never observe a partial blob"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def path_for(self, digest: str, variant: str = 'original') -> Optional[str]:
+        """
+        Locate a stored blob
+
+        Args:
+            digest: Content digest
+            variant: One of VARIANTS
+
+        Returns:
+            Absolute path, or None if the blob does not exist
+        """
+        if not self.is_valid_digest(digest) or variant not in self.VARIANTS:
+            return None
+
+        directory = self._blob_dir(digest)
+        if variant == 'thumb':
+            path = os.path.join(directory, f"{digest}_thumb.webp")
+            return path if os.path.exists(path) else None
+        if variant == 'webp':
+            path = os.path.join(directory, f"{digest}_full.webp")
+            return path if os.path.exists(path) else None
+
+        for ext in self.MEDIA_TYPES:
+            path = os.path.join(directory, f"{digest}{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def media_type(self, path: str) -> str:
+        """Media type for a stored blob based on its extension"""
+        return self.MEDIA_TYPES.get(os.path.splitext(path)[1], 'application/octet-stream')
+
+    def put(self, data: bytes, content_type: str = '') -> str:
+        """
+        Store image bytes and their variants
+
+        Args:
+            data: Image content
+            content_type: Content-Type reported by the origin
+
+        Returns:
+            Content digest
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if self.path_for(digest) is None:
+            ext = self._extension_for(content_type)
+            self._write_atomic(os.path.join(self._blob_dir(digest), f"{digest}{ext}"), data)
+            self._make_variants(digest, data)
+        return digest
+
+    def mirror(self, url: str) -> str:
+        """
+        Download an image once and store it
+
+        Args:
+            url: Remote image URL
+
+        Returns:
+            Content digest
+
+        Raises:
+            ImageStoreError: If the download fails
+        """
+        pointer = self._url_pointer(url)
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                digest = f.read().strip()
+            if self.path_for(digest):
+                return digest
+
+        try:
+            logger.info("Mirroring image: %s", url[:80], extra={'category': 'fetch'})
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise ImageStoreError(f"Failed to download image: {e}")
+
+        digest = self.put(response.content, response.headers.get('Content-Type', ''))
+        self._write_atomic(pointer, digest.encode())
+        return digest
+
+    def mirror_many(self, urls: List[str]) -> List[str]:
+        """
+        Mirror several images, skipping any that fail
+
+        Args:
+            urls: Remote image URLs
+
+        Returns:
+            Digests of the successfully mirrored images, in order
+        """
+        digests = []
+        for url in urls:
+            try:
+                digests.append(self.mirror(url))
+            except Exception as e:
+                logger.error("Image mirroring failed: %s", e)
+        return digests
+
+    def _extension_for(self, content_type: str) -> str:
+        """File extension from a Content-Type header"""
+        content_type = content_type.split(';')[0].strip().lower()
+        for ext, media_type in self.MEDIA_TYPES.items():
+            if media_type == content_type:
+                return ext
+        return '.png' if content_type == 'image/x-png' else '.bin'
+
+    def _make_variants(self, digest: str, data: bytes) -> None:
+        """Produce the thumbnail and full-size WebP variants"""
+        try:
+            from PIL import Image
+        except ImportError:  # Variants are skipped without Pillow; originals are still mirrored
+            return
+        try:
+            with Image.open(BytesIO(data)) as image:
+                image.load()
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+                full = BytesIO()
+                image.save(full, 'WEBP', quality=self.webp_quality, method=4)
+                self._write_atomic(os.path.join(self._blob_dir(digest), f"{digest}_full.webp"), full.getvalue())
+
+                thumb_image = image.copy()
+                thumb_image.thumbnail((self.thumb_size, self.thumb_size))
+                thumb = BytesIO()
+                thumb_image.save(thumb, 'WEBP', quality=self.webp_quality, method=4)
+                self._write_atomic(os.path.join(self._blob_dir(digest), f"{digest}_thumb.webp"), thumb.getvalue())
+        except Exception as e:
+            logger.warning("Could not create variants for %s: %s", digest[:12], e)
+
+
+def get_image_store() -> Optional[ImageStore]:
+    """
+    Build the image store when IMAGE_MIRROR_DIR is set
+
+    Returns:
+        ImageStore, or None when mirroring is disabled
+    """
+    root = os.getenv('IMAGE_MIRROR_DIR', '').strip()
+    if not root:
+        return None
+    return ImageStore(root, thumb_size=int(os.getenv('IMAGE_THUMB_SIZE', '384')))
@@ -0,0 +1,172 @@
+"""
+Scenario Job Completion Events
+Lets webhook callbacks wake up threads that are waiting on a Scenario job
+
+Local stand-in for Scenario's callback (e.g. against a dev server):
+    python -m backend.job_events <job_id> [success|failure] [base_url]
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import requests
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class JobEventHub:
+    """
+    Rendezvous between webhook callbacks and pollers waiting on a job
+
+    A callback that arrives before anyone waits (a very fast job) is kept
+    for a short while so the waiter still sees it.
+    """
+
+    def __init__(self, max_pending: int = 1024, pending_ttl: float = 600):
+        """
+        Initialize the event hub
+
+        Args:
+            max_pending: Maximum callbacks kept for jobs nobody waits on yet
+            pending_ttl: Seconds such callbacks are kept
+        """
+        self.max_pending = max_pending
+        self.pending_ttl = pending_ttl
+        self._lock = threading.Lock()
+        self._events: Dict[str, threading.Event] = {}
+        self._payloads: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.callbacks_received = 0
+        self.callbacks_matched = 0
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.pending_ttl
+        while self._payloads:
+            job_id, (received_at, _) = next(iter(self._payloads.items()))
+            if received_at >= cutoff and len(self._payloads) <= self.max_pending:
+                break
+            self._payloads.popitem(last=False)
+
+    def notify(self, job_id: str, payload: Dict) -> bool:
+        """
+        Record a completion callback and wake the waiter
+
+        Args:
+            job_id: Scenario job ID
+            payload: Callback body
+
+        Returns:
+            True if a poller was waiting on this job
+        """
+        with self._lock:
+            self.callbacks_received += 1
+            self._payloads[job_id] = (time.monotonic(), payload)
+            self._payloads.move_to_end(job_id)
+            self._prune()
+            event = self._events.get(job_id)
+            if event is not None:
+                self.callbacks_matched += 1
+                event.set()
+            return event is not None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """
+        Wait up to `timeout` seconds for a callback
+
+        Args:
+            job_id: Scenario job ID
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Callback payload, or None if none arrived in time
+        """
+        with self._lock:
+            if job_id in self._payloads:
+                return self._payloads.pop(job_id)[1]
+            event = self._events.setdefault(job_id, threading.Event())
+
+        event.wait(timeout)
+
+        with self._lock:
+            entry = self._payloads.pop(job_id, None)
+            event.clear()
+            return entry[1] if entry else None
+
+    def discard(self, job_id: str) -> None:
+        """Forget a job once its poller has finished"""
+        with self._lock:
+            self._events.pop(job_id, None)
+            self._payloads.pop(job_id, None)
+
+    def stats(self) -> Dict:
+        """Snapshot of callback counters for monitoring"""
+        with self._lock:
+            return {
+                'waiting': len(self._events),
+                'pending_callbacks': len(self._payloads),
+                'callbacks_received': self.callbacks_received,
+                'callbacks_matched': self.callbacks_matched,
+            }
+
+
+def extract_job_id(payload: Dict) -> Optional[str]:
+    """Find the job ID in a Scenario callback body"""
+    for container in (payload, payload.get('job') or {}, payload.get('data') or {}):
+        if isinstance(container, dict):
+            job_id = container.get('jobId') or container.get('id')
+            if job_id:
+                return str(job_id)
+    return None
+
+
+def webhooks_enabled() -> bool:
+    """Whether Scenario completion webhooks are configured (SCENARIO_WEBHOOK_ENABLED)"""
+    return os.getenv('SCENARIO_WEBHOOK_ENABLED', '').strip().lower() in ('1', 'true', 'yes')
+
+
+_hub = JobEventHub()
+
+
+def get_job_event_hub() -> JobEventHub:
+    """Get the process-wide event hub"""
+    return _hub
+
+
+def simulate_callback(job_id: str, status: str = 'success', base_url: str = 'http://localhost:8000') -> Dict:
+    """
+    Post a Scenario-style completion callback to a running backend
+
+    Args:
+        job_id: Scenario job ID to complete
+        status: Job status to report
+        base_url: Backend base URL
+
+    Returns:
+        The endpoint's JSON response
+    """
+    headers = {}
+    secret = os.getenv('SCENARIO_WEBHOOK_SECRET')
+    if secret:
+        headers['X-Webhook-Secret'] = secret
+    response = requests.post(
+        f"{base_url.rstrip('/')}/api/webhooks/scenario",
+        json={'job': {'jobId': job_id, 'status': status}},
+        headers=headers,
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    if len(sys.argv) < 2:
+        print("Usage: python -m backend.job_events <job_id> [success|failure] [base_url]")
+        sys.exit(1)
+    print(simulate_callback(*sys.argv[1:4]))
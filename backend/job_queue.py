@@ -0,0 +1,340 @@
+"""
+Job Queue for Distributed Image Generation
+Lets the API enqueue Scenario generation tasks that separate worker processes execute
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class JobQueueError(Exception):
+    """Custom exception for job queue errors"""
+    pass
+
+
+class JobQueue(ABC):
+    """
+    Broker interface shared by the API (producer) and workers (consumers)
+
+    A job is a dict with keys: id, payload, status, result, error,
+    created_at, claimed_at, finished_at, worker. Status moves through
+    'queued' -> 'in-progress' -> 'success' | 'failure'.
+
+    update, complete and fail only apply while `worker_id` still holds
+    the task: a worker whose lease expired and whose task was handed to
+    another worker cannot overwrite the new holder's result. They return
+    whether the write was applied.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: Dict, priority: int = 0) -> str:
+        """Add a task and return its job ID (lower priority values are claimed first)"""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically take the next queued task, or None if the queue is empty"""
+
+    @abstractmethod
+    def update(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        """Store a partial result for a task that is still running"""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        """Mark a task as succeeded and store its result"""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a task as failed"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Look up a task by ID"""
+
+    @abstractmethod
+    def cancel(self, job_id: str, error: str = 'Cancelled') -> bool:
+        """Fail a task that no worker has claimed yet; returns whether it was still queued"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Local broker and result store backed by a single SQLite file
+
+    Runs without external services. Several API and worker processes on the
+    same host (or on hosts sharing a filesystem with working locks) can use
+    the same database file. Tasks claimed by a worker that dies are handed
+    out again once their lease expires.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600):
+        """
+        Initialize the SQLite job queue
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            lease_seconds: How long a claimed task may run before it is requeued
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                claimed_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, priority, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payload: Dict, priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            "INSERT INTO jobs (id, payload, status, priority, created_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, json.dumps(payload), priority, time.time())
+        )
+        logger.info("Enqueued job %s", job_id)
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        now = time.time()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front so two workers
+            # can never claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE status = 'queued'
+                   OR (status = 'in-progress' AND claimed_at < ?)
+                ORDER BY priority, created_at
+                LIMIT 1
+                """,
+                (now - self.lease_seconds,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'in-progress', worker = ?, claimed_at = ? WHERE id = ?",
+                (worker_id, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise JobQueueError(f"Failed to claim job: {e}")
+
+        job = self._row_to_job(row)
+        job['status'] = 'in-progress'
+        job['worker'] = worker_id
+        job['claimed_at'] = now
+        return job
+
+    def update(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET result = ? WHERE id = ? AND worker = ? AND status = 'in-progress'",
+            (json.dumps(result), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        cursor = self._connect().execute(
+            """
+            UPDATE jobs SET status = 'success', result = ?, finished_at = ?
+            WHERE id = ? AND worker = ? AND status = 'in-progress'
+            """,
+            (json.dumps(result), time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        cursor = self._connect().execute(
+            """
+            UPDATE jobs SET status = 'failure', error = ?, finished_at = ?
+            WHERE id = ? AND worker = ? AND status = 'in-progress'
+            """,
+            (error, time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str, error: str = 'Cancelled') -> bool:
+        # The status check makes this atomic with claim(): a claimed job is left alone
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'failure', error = ?, finished_at = ? WHERE id = ? AND status = 'queued'",
+            (error, time.time(), job_id)
+        )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        """Convert a database row into a job dict"""
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+
+class MemoryJobQueue(JobQueue):
+    """
+    In-process job store for background tasks run inside the API process
+
+    Used when no IMAGE_QUEUE_BACKEND is configured but a request still
+    needs a pollable job (e.g. the full render behind a preview). Finished
+    jobs are dropped after `retention_seconds`.
+    """
+
+    def __init__(self, retention_seconds: float = 3600):
+        """
+        Initialize the in-memory job queue
+
+        Args:
+            retention_seconds: How long finished jobs stay queryable
+        """
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] and job['finished_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def enqueue(self, payload: Dict, priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = {
+                'id': job_id,
+                'payload': payload,
+                'status': 'queued',
+                'priority': priority,
+                'result': None,
+                'error': None,
+                'worker': None,
+                'created_at': time.time(),
+                'claimed_at': None,
+                'finished_at': None,
+            }
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job['status'] == 'queued']
+            if not queued:
+                return None
+            job = min(queued, key=lambda j: (j['priority'], j['created_at']))
+            job.update(status='in-progress', worker=worker_id, claimed_at=time.time())
+            return dict(job)
+
+    def _held(self, job_id: str, worker_id: str) -> Optional[Dict]:
+        """The job if worker_id is running it (call with the lock held)"""
+        job = self._jobs.get(job_id)
+        if job is None or job['status'] != 'in-progress' or job['worker'] != worker_id:
+            return None
+        return job
+
+    def update(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            job['result'] = result
+            return True
+
+    def complete(self, job_id: str, worker_id: str, result: Dict) -> bool:
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(status='success', result=result, finished_at=time.time())
+            return True
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(status='failure', error=error, finished_at=time.time())
+            return True
+
+    def cancel(self, job_id: str, error: str = 'Cancelled') -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return False
+            job.update(status='failure', error=error, finished_at=time.time())
+            return True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """
+    Build the configured job queue
+
+    Returns:
+        A JobQueue when IMAGE_QUEUE_BACKEND is set, otherwise None
+        (image generation then runs inline in the API process)
+
+    Raises:
+        JobQueueError: If the configured backend is unknown
+    """
+    backend = os.getenv('IMAGE_QUEUE_BACKEND', '').strip().lower()
+    if not backend:
+        return None
+    if backend == 'sqlite':
+        path = os.getenv('IMAGE_QUEUE_PATH', 'data/image_jobs.db')
+        return SQLiteJobQueue(path)
+    raise JobQueueError(f"Unknown IMAGE_QUEUE_BACKEND: {backend}")
+
+
+def default_worker_id() -> str:
+    """Identify this worker process as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,309 @@
+"""
+API Key Pools
+Spreads upstream requests over several accounts' credentials: each
+request goes to the key with the most quota left, and keys that hit a
+rate limit cool down while the others take over
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import requests
+from .retry_policy import parse_retry_after
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# Response headers reporting the requests left in the current quota window
+REMAINING_HEADERS = ('X-RateLimit-Remaining', 'RateLimit-Remaining')
+
+
+def mask_key(credential: str) -> str:
+    """Printable label for a credential (last 4 characters of the key part only)"""
+    key = credential.split(':', 1)[0]
+    return '…' + key[-4:] if len(key) > 8 else '…'
+
+
+def keys_from_env(plural: str, single: str) -> List[str]:
+    """
+    Credentials from a comma-separated variable, falling back to a single one
+
+    Args:
+        plural: Variable holding several credentials (e.g. SERPER_API_KEYS)
+        single: Variable holding one credential (e.g. SERPER_API_KEY)
+
+    Returns:
+        Credentials in configured order (may be empty)
+    """
+    keys = [key.strip() for key in os.getenv(plural, '').split(',') if key.strip()]
+    if keys:
+        return keys
+    key = os.getenv(single, '').strip()
+    return [key] if key else []
+
+
+class ApiKey:
+    """One credential and its usage counters"""
+
+    def __init__(self, secret: str):
+        self.secret = secret
+        self.label = mask_key(secret)
+        self.requests = 0
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        self.last_used = 0.0
+        self.reported_remaining: Optional[int] = None
+        self.reported_at = 0.0
+        self.recent: deque = deque()
+
+
+class KeyPin:
+    """
+    Keeps a series of requests on one key
+
+    Scenario jobs and assets belong to the account that created them, so
+    the polls and asset lookups of a job must use the submitting key. The
+    first request made with an unbound pin binds it to the key it used.
+    """
+
+    def __init__(self):
+        self.key: Optional[ApiKey] = None
+
+
+class KeyPool:
+    """
+    Credentials of one upstream, balanced by remaining quota
+
+    A key's remaining quota is taken from the upstream's rate-limit
+    headers when it sends them, otherwise estimated from `rate_limit`
+    (requests per `window` seconds per key) and the requests sent in the
+    last window; with neither, the least recently busy key wins. A 429
+    puts the key in cool-down for its Retry-After (or `cooldown` seconds)
+    and the request is sent again with another key.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        secrets: Iterable[str],
+        rate_limit: int = 0,
+        cooldown: float = 30.0,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            name: Upstream name used in logs and metrics
+            secrets: Credentials, in configured order
+            rate_limit: Requests per window allowed per key (0 = unknown)
+            cooldown: Seconds a rate-limited key is skipped without Retry-After
+            window: Quota window in seconds
+            clock: Time source (replaceable in tests)
+        """
+        self.name = name
+        self.keys = [ApiKey(secret) for secret in secrets]
+        if not self.keys:
+            raise ValueError(f"{name}: no API keys configured")
+        self.rate_limit = rate_limit
+        self.cooldown = cooldown
+        self.window = window
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failovers = 0
+        self.all_cooling = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _remaining(self, key: ApiKey, now: float) -> float:
+        while key.recent and key.recent[0] <= now - self.window:
+            key.recent.popleft()
+        if key.reported_remaining is not None and now - key.reported_at < self.window:
+            return key.reported_remaining
+        if self.rate_limit:
+            return self.rate_limit - len(key.recent)
+        return -len(key.recent)
+
+    def _start(self, key: ApiKey, now: float) -> None:
+        key.requests += 1
+        key.in_flight += 1
+        key.last_used = now
+        key.recent.append(now)
+        if key.reported_remaining is not None:
+            key.reported_remaining -= 1
+
+    def acquire(self, exclude: Iterable[ApiKey] = ()) -> ApiKey:
+        """
+        Pick the key for a request (pass it to release afterwards)
+
+        Keys in cool-down are skipped; when every key is cooling down, the
+        one that recovers first is used.
+
+        Args:
+            exclude: Keys not to use (already rate limited for this request)
+        """
+        exclude = list(exclude)
+        with self._lock:
+            now = self.clock()
+            candidates = [key for key in self.keys if key not in exclude] or self.keys
+            ready = [key for key in candidates if key.cooldown_until <= now]
+            if ready:
+                key = max(ready, key=lambda k: (self._remaining(k, now), -k.in_flight, -k.last_used))
+            else:
+                self.all_cooling += 1
+                key = min(candidates, key=lambda k: k.cooldown_until)
+            self._start(key, now)
+            return key
+
+    def release(self, key: ApiKey, response: Optional[requests.Response] = None) -> None:
+        """
+        Record a request's outcome
+
+        Args:
+            key: Key returned by acquire
+            response: HTTP response (None if the request failed without one)
+        """
+        with self._lock:
+            now = self.clock()
+            key.in_flight -= 1
+            if response is None:
+                key.errors += 1
+                return
+            for header in REMAINING_HEADERS:
+                value = response.headers.get(header)
+                if value is not None and value.strip().isdigit():
+                    key.reported_remaining = int(value)
+                    key.reported_at = now
+                    break
+            if response.status_code == 429:
+                key.rate_limited += 1
+                wait = parse_retry_after(response.headers.get('Retry-After'))
+                key.cooldown_until = now + (self.cooldown if wait is None else wait)
+                logger.warning(
+                    "%s key %s rate limited, cooling down for %.0fs",
+                    self.name, key.label, key.cooldown_until - now
+                )
+            elif response.status_code >= 400:
+                key.errors += 1
+
+    def _has_ready(self, exclude: List[ApiKey]) -> bool:
+        with self._lock:
+            now = self.clock()
+            return any(key.cooldown_until <= now for key in self.keys if key not in exclude)
+
+    def call(
+        self,
+        send: Callable[[ApiKey], requests.Response],
+        pin: Optional[KeyPin] = None
+    ) -> requests.Response:
+        """
+        Send a request with the best key, moving to another key on 429
+
+        Args:
+            send: Sends the request with the given key
+            pin: Keeps the request on the pin's key once bound; binds it
+                to the key used otherwise
+
+        Returns:
+            The last response (a 429 only when no other key is ready)
+        """
+        if pin is not None and pin.key is not None:
+            key = pin.key
+            with self._lock:
+                self._start(key, self.clock())
+            try:
+                response = send(key)
+            except BaseException:
+                self.release(key)
+                raise
+            self.release(key, response)
+            return response
+
+        tried: List[ApiKey] = []
+        while True:
+            key = self.acquire(exclude=tried)
+            try:
+                response = send(key)
+            except BaseException:
+                self.release(key)
+                raise
+            self.release(key, response)
+            tried.append(key)
+            if response.status_code == 429 and self._has_ready(tried):
+                with self._lock:
+                    self.failovers += 1
+                continue
+            if pin is not None:
+                pin.key = key
+            return response
+
+    def stats(self) -> Dict:
+        """Per-key usage for monitoring (keys are masked)"""
+        with self._lock:
+            now = self.clock()
+            return {
+                'keys': len(self.keys),
+                'failovers': self.failovers,
+                'all_cooling': self.all_cooling,
+                'per_key': [
+                    {
+                        'key': key.label,
+                        'requests': key.requests,
+                        'requests_last_window': len(key.recent),
+                        'in_flight': key.in_flight,
+                        'rate_limited': key.rate_limited,
+                        'errors': key.errors,
+                        'cooldown_remaining': round(max(0.0, key.cooldown_until - now), 1),
+                        'reported_remaining': key.reported_remaining,
+                    }
+                    for key in self.keys
+                ],
+            }
+
+
+# Keyed by upstream name and credentials: clients configured with other
+# keys get a pool of their own instead of replacing the shared one
+_pools: Dict[Tuple[str, Tuple[str, ...]], KeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_key_pool(name: str, secrets: List[str]) -> KeyPool:
+    """
+    Get the process-wide pool of an upstream
+
+    Client instances with the same credentials share one pool, so usage
+    and cool-downs are tracked per account rather than per client.
+    Settings: <NAME>_KEY_RATE_LIMIT (requests per minute per key, 0 =
+    unknown) and KEY_COOLDOWN_SECONDS (default 30).
+    """
+    with _pools_lock:
+        pool = _pools.get((name, tuple(secrets)))
+        if pool is None:
+            pool = _pools[(name, tuple(secrets))] = KeyPool(
+                name,
+                secrets,
+                rate_limit=int(os.getenv(f'{name.upper()}_KEY_RATE_LIMIT', '0')),
+                cooldown=float(os.getenv('KEY_COOLDOWN_SECONDS', '30'))
+            )
+        return pool
+
+
+def key_pool_stats() -> Dict[str, Dict]:
+    """Stats of every upstream's key pools (pools of one upstream are merged)"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    result: Dict[str, Dict] = {}
+    for (name, _), pool in pools:
+        stats = pool.stats()
+        merged = result.setdefault(name, {'keys': 0, 'failovers': 0, 'all_cooling': 0, 'per_key': []})
+        for field in ('keys', 'failovers', 'all_cooling'):
+            merged[field] += stats[field]
+        merged['per_key'].extend(stats['per_key'])
+    return result
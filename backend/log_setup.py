@@ -0,0 +1,203 @@
+"""
+Logging Pipeline
+Routes log records through a queue to a background thread, samples
+high-volume categories and optionally emits JSON lines
+
+Hot-path log calls tag themselves with a category, e.g.
+    logger.info("Fetching: %s", url, extra={'category': 'fetch'})
+and LOG_SAMPLE_RATES keeps only a fraction of those records.
+"""
+
+import os
+import sys
+import json
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Defaults for the high-volume categories (1 = keep everything)
+DEFAULT_SAMPLE_RATES = {
+    'poll': 0.1,    # Scenario status polls
+    'http': 0.1,    # Per-request upstream API lines
+    'fetch': 0.25,  # Per-URL scrape and mirror lines
+}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%H:%M:%S'
+
+# LogRecord attributes that are not user-supplied extras
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    Parse a sampling spec such as "poll=0.1,fetch=0.25"
+
+    Args:
+        spec: Comma-separated category=rate pairs (rate between 0 and 1)
+
+    Returns:
+        Mapping of category to rate (invalid pairs are ignored)
+    """
+    rates = {}
+    for part in spec.split(','):
+        category, _, rate = part.partition('=')
+        try:
+            rates[category.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N records per category
+
+    Sampling is deterministic (the first record of each category always
+    passes) and never applies to warnings or errors, or to records without
+    a category.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = getattr(record, 'category', None)
+        rate = self.rates.get(category, 1.0) if category else 1.0
+        if rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+
+        every = round(1 / rate) if rate > 0 else 0
+        with self._lock:
+            seen = self._seen.get(category, 0)
+            self._seen[category] = seen + 1
+            keep = every > 0 and seen % every == 0
+            if not keep:
+                self.dropped[category] = self.dropped.get(category, 0) + 1
+        if keep:
+            record.sample_every = every
+        return keep
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread
+
+    The stock handler formats every record in the calling thread before
+    queueing it. Here the record is queued as it is, so the %-interpolation
+    happens on the background thread (arguments are read at that point).
+    A full queue drops the record instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the record's extras as fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DeferredQueueHandler] = None
+_sampler: Optional[SamplingFilter] = None
+
+
+def configure_logging(stream=None, force: bool = False) -> bool:
+    """
+    Install the queue-based logging pipeline on the root logger
+
+    Settings: LOG_LEVEL (default INFO), LOG_FORMAT ('text' or 'json'),
+    LOG_SAMPLE_RATES (e.g. "poll=0.1,fetch=0.25"; merged over the
+    defaults), LOG_QUEUE_SIZE (default 10000).
+
+    Args:
+        stream: Output stream (default stderr)
+        force: Replace existing root handlers
+
+    Returns:
+        True if the pipeline was installed, False if the host had already
+        configured logging (or it is already installed)
+    """
+    global _listener, _queue_handler, _sampler
+
+    root = logging.getLogger()
+    if _listener is not None or (root.handlers and not force):
+        return False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if os.getenv('LOG_FORMAT', 'text').strip().lower() == 'json':
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+
+    rates = dict(DEFAULT_SAMPLE_RATES)
+    rates.update(parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')))
+    _sampler = SamplingFilter(rates)
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _queue_handler.addFilter(_sampler)
+
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO))
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background thread"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+def logging_stats() -> Dict:
+    """Records dropped by sampling or a full queue, for monitoring"""
+    if _queue_handler is None:
+        return {'pipeline': False}
+    return {
+        'pipeline': True,
+        'queued': _queue_handler.queue.qsize(),
+        'queue_full_drops': _queue_handler.dropped,
+        'sampled_out': dict(_sampler.dropped) if _sampler else {},
+        'sample_rates': dict(_sampler.rates) if _sampler else {},
+    }
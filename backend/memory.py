@@ -0,0 +1,208 @@
+"""
+Memory Accounting
+Per-request byte budget for scraped pages, per-stage allocation tracking
+(tracemalloc, debug mode only) and process memory statistics
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# BeautifulSoup trees built with html.parser take several times the
+# size of the page they came from; pages reserve this multiple of their size
+PARSE_OVERHEAD = 8
+
+_current: contextvars.ContextVar[Optional['RequestMemory']] = contextvars.ContextVar('request_memory', default=None)
+
+
+class RequestMemory:
+    """
+    Byte budget shared by the pages one request holds in memory
+
+    A page reserves its estimated footprint (page plus parse tree) before
+    it is parsed and releases it once its abstract has been extracted. A
+    page that does not fit the remaining budget is skipped, so many large
+    pages in one request cannot add up to an unbounded RSS spike.
+    """
+
+    def __init__(self, limit_bytes: int):
+        """
+        Initialize the budget
+
+        Args:
+            limit_bytes: Most bytes the request's pages may hold at once (0 = unlimited)
+        """
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak = 0
+        self.pages = 0
+        self.page_bytes = 0
+        self.skipped = 0
+
+    def reserve(self, page_size: int) -> int:
+        """
+        Reserve room to parse a page
+
+        Args:
+            page_size: Page size in bytes
+
+        Returns:
+            Bytes reserved (pass to release), or 0 if the page does not fit
+        """
+        needed = max(1, page_size * PARSE_OVERHEAD)
+        with self._lock:
+            if self.limit_bytes and self.in_use + needed > self.limit_bytes:
+                self.skipped += 1
+                return 0
+            self.in_use += needed
+            self.peak = max(self.peak, self.in_use)
+            self.pages += 1
+            self.page_bytes += page_size
+            return needed
+
+    def release(self, reserved: int) -> None:
+        """Return a reservation once the page and its tree are freed"""
+        with self._lock:
+            self.in_use -= reserved
+
+    def summary(self) -> Dict:
+        """Counters for this request"""
+        with self._lock:
+            return {
+                'limit_bytes': self.limit_bytes,
+                'peak_bytes': self.peak,
+                'pages': self.pages,
+                'page_bytes': self.page_bytes,
+                'skipped': self.skipped,
+            }
+
+
+class MemoryStats:
+    """Process-wide memory counters for /api/stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.pages = 0
+        self.page_bytes = 0
+        self.max_request_peak_bytes = 0
+        self.skipped_over_budget = 0
+        self.skipped_too_large = 0
+        self._stages: Dict[str, list] = {}
+
+    def add_request(self, account: RequestMemory) -> None:
+        """Fold a finished request's counters into the totals"""
+        summary = account.summary()
+        with self._lock:
+            self.requests += 1
+            self.pages += summary['pages']
+            self.page_bytes += summary['page_bytes']
+            self.skipped_over_budget += summary['skipped']
+            self.max_request_peak_bytes = max(self.max_request_peak_bytes, summary['peak_bytes'])
+
+    def add_too_large(self) -> None:
+        """Count a page skipped for exceeding MAX_PAGE_BYTES"""
+        with self._lock:
+            self.skipped_too_large += 1
+
+    def add_stage(self, name: str, allocated: int, peak: int) -> None:
+        """Record a stage's net allocation and the traced peak while it ran"""
+        with self._lock:
+            entry = self._stages.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += allocated
+            entry[2] = max(entry[2], peak)
+
+    def stats(self) -> Dict:
+        """Counters, peak RSS and (in debug mode) per-stage allocations"""
+        with self._lock:
+            stages = {
+                name: {
+                    'calls': calls,
+                    'net_allocated_kb': round(allocated / 1024, 1),
+                    'traced_peak_kb': round(peak / 1024, 1),
+                }
+                for name, (calls, allocated, peak) in self._stages.items()
+            }
+            return {
+                'debug': tracemalloc.is_tracing(),
+                'peak_rss_mb': peak_rss_mb(),
+                'requests': self.requests,
+                'pages': self.pages,
+                'page_bytes': self.page_bytes,
+                'max_request_peak_bytes': self.max_request_peak_bytes,
+                'pages_skipped_over_budget': self.skipped_over_budget,
+                'pages_skipped_too_large': self.skipped_too_large,
+                'stages': stages,
+            }
+
+
+_stats = MemoryStats()
+
+
+def get_memory_stats() -> MemoryStats:
+    """Get the process-wide memory counters"""
+    return _stats
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def request_limit_bytes() -> int:
+    """Per-request page budget from REQUEST_MEMORY_LIMIT_MB (default 256; 0 = unlimited)"""
+    return int(float(os.getenv('REQUEST_MEMORY_LIMIT_MB', '256')) * 1024 * 1024)
+
+
+def max_page_bytes() -> int:
+    """Largest page downloaded, from MAX_PAGE_BYTES (default 5 MB; 0 = unlimited)"""
+    return int(os.getenv('MAX_PAGE_BYTES', str(5 * 1024 * 1024)))
+
+
+def current_request_memory() -> Optional[RequestMemory]:
+    """The memory budget of the request running in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def track_request_memory(limit_bytes: Optional[int] = None) -> Iterator[RequestMemory]:
+    """
+    Give the work in this block (and the tasks it binds) one memory budget
+
+    Args:
+        limit_bytes: Budget in bytes (default from REQUEST_MEMORY_LIMIT_MB)
+    """
+    account = RequestMemory(request_limit_bytes() if limit_bytes is None else limit_bytes)
+    token = _current.set(account)
+    try:
+        yield account
+    finally:
+        _current.reset(token)
+        _stats.add_request(account)
+
+
+def start_debug_tracing() -> bool:
+    """
+    Start tracemalloc when MEMORY_DEBUG is set
+
+    Tracing slows allocation-heavy code noticeably, so it is for debugging
+    only; stage() records per-stage allocations while it is on.
+
+    Returns:
+        Whether tracing is active
+    """
+    if os.getenv('MEMORY_DEBUG', '').strip().lower() in ('1', 'true', 'yes') and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.is_tracing()
@@ -10,6 +10,7 @@ class ProcessPapersRequest(BaseModel):
     """Request model for full pipeline"""
     query: str = Field(..., description="Search query")
     num_papers: int = Field(5, ge=1, le=20, description="Number of papers to process")
+    local_first: bool = Field(False, description="Answer from the local paper index first and only search Serper for missing results")
 
 
 class ProcessedPaper(BaseModel):
@@ -26,14 +27,45 @@ class ProcessPapersResponse(BaseModel):
     """Response model for full pipeline"""
     query: str
     papers: List[ProcessedPaper]
+    next_cursor: Optional[str] = None  # Pass to /api/process/next for more results
+
+
+class NextPageRequest(BaseModel):
+    """Request model for loading more results of a search"""
+    cursor: str = Field(..., description="next_cursor from the previous /api/process or /api/process/next response")
+
+
+class ExportRequest(BaseModel):
+    """Request model for the bulk NDJSON export"""
+    queries: List[str] = Field(..., min_length=1, max_length=500, description="Search queries to process")
+    num_papers: int = Field(5, ge=1, le=20, description="Number of papers per query")
+    local_first: bool = Field(False, description="Answer from the local paper index first and only search Serper for missing results")
+    concurrency: int = Field(4, ge=1, le=8, description="Queries processed at the same time")
 
 
 class GenerateImageRequest(BaseModel):
     """Request model for generating image for a single paper"""
     paper: ProcessedPaper = Field(..., description="Full paper object with all fields")
+    wait: bool = Field(True, description="In queue mode, wait for the result instead of returning the job ID immediately")
+    priority: int = Field(0, ge=0, description="Submission priority, lower runs first (e.g. 0 for the paper on screen)")
+    preview: bool = Field(False, description="Return a fast low-resolution preview first; the full render continues as a job")
 
 
 class GenerateImageResponse(BaseModel):
     """Response model for image generation"""
     image_urls: List[str]
-    success: bool
\ No newline at end of file
+    success: bool
+    thumbnail_urls: List[str] = []  # Locally served thumbnails (image mirroring only)
+    preview: bool = False  # True when image_urls hold the low-resolution preview
+    job_id: Optional[str] = None  # Set when the task went through the job queue
+    status: Optional[str] = None  # Job status in queue mode (queued, in-progress, success, failure)
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for image generation job status"""
+    job_id: str
+    status: str
+    image_urls: List[str] = []
+    thumbnail_urls: List[str] = []
+    preview_urls: List[str] = []  # Low-resolution preview (preview mode only)
+    error: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Local Full-Text Paper Index
+Keeps every paper the pipeline has seen in a SQLite FTS5 index for instant repeat searches
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class PaperIndexError(Exception):
+    """Custom exception for paper index errors"""
+    pass
+
+
+class PaperIndex:
+    """
+    SQLite FTS5 index of papers keyed by link
+
+    Papers are upserted as they are seen; a later record without an
+    abstract never erases an abstract that was scraped earlier.
+    """
+
+    # bm25 column weights: title, snippet, abstract
+    RANK_WEIGHTS = (5.0, 1.0, 2.0)
+
+    def __init__(self, path: str):
+        """
+        Initialize the paper index
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+        """
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS papers (
+                    id INTEGER PRIMARY KEY,
+                    link TEXT NOT NULL UNIQUE,
+                    title TEXT NOT NULL,
+                    year INTEGER,
+                    snippet TEXT,
+                    abstract TEXT,
+                    updated_at REAL NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, snippet, abstract,
+                    content='papers', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                    INSERT INTO papers_fts (rowid, title, snippet, abstract)
+                    VALUES (new.id, new.title, new.snippet, new.abstract);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                    INSERT INTO papers_fts (papers_fts, rowid, title, snippet, abstract)
+                    VALUES ('delete', old.id, old.title, old.snippet, old.abstract);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                    INSERT INTO papers_fts (papers_fts, rowid, title, snippet, abstract)
+                    VALUES ('delete', old.id, old.title, old.snippet, old.abstract);
+                    INSERT INTO papers_fts (rowid, title, snippet, abstract)
+                    VALUES (new.id, new.title, new.snippet, new.abstract);
+                END;
+                """
+            )
+        except sqlite3.OperationalError as e:
+            raise PaperIndexError(f"SQLite FTS5 is not available: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add_papers(self, papers: List[Dict]) -> int:
+        """
+        Insert or update papers
+
+        Args:
+            papers: Paper dicts with title, link, snippet, year and optional abstract
+
+        Returns:
+            Number of papers written
+        """
+        rows = [
+            (
+                paper['link'],
+                paper.get('title') or '',
+                paper.get('year'),
+                paper.get('snippet'),
+                paper.get('abstract'),
+                time.time()
+            )
+            for paper in papers
+            if paper.get('link')
+        ]
+        if not rows:
+            return 0
+
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                """
+                INSERT INTO papers (link, title, year, snippet, abstract, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (link) DO UPDATE SET
+                    title = excluded.title,
+                    year = COALESCE(excluded.year, papers.year),
+                    snippet = COALESCE(excluded.snippet, papers.snippet),
+                    abstract = COALESCE(excluded.abstract, papers.abstract),
+                    updated_at = excluded.updated_at
+                """,
+                rows
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            raise PaperIndexError(f"Failed to index papers: {e}")
+
+        logger.info("Indexed %s papers", len(rows))
+        return len(rows)
+
+    def search(self, query: str, limit: int = 10, min_year: Optional[int] = None) -> List[Dict]:
+        """
+        Full-text search over indexed papers
+
+        Args:
+            query: Free-text query; every term must match
+            limit: Maximum number of results
+            min_year: Skip papers published before this year (unknown years are kept)
+
+        Returns:
+            Paper dicts (title, link, snippet, year, abstract), best match first
+        """
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return []
+        # Quote each term so FTS5 operators in user input are matched literally
+        match = ' '.join(f'"{term}"' for term in terms)
+
+        rows = self._connect().execute(
+            f"""
+            SELECT p.title, p.link, p.snippet, p.year, p.abstract
+            FROM papers_fts
+            JOIN papers p ON p.id = papers_fts.rowid
+            WHERE papers_fts MATCH ?
+              AND (? IS NULL OR p.year IS NULL OR p.year >= ?)
+            ORDER BY bm25(papers_fts, {', '.join(str(w) for w in self.RANK_WEIGHTS)})
+            LIMIT ?
+            """,
+            (match, min_year, min_year, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        """Number of indexed papers"""
+        return self._connect().execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+
+def get_paper_index() -> Optional[PaperIndex]:
+    """
+    Build the paper index from PAPER_INDEX_PATH
+
+    Returns:
+        PaperIndex, or None if indexing is disabled (empty path) or unavailable
+    """
+    path = os.getenv('PAPER_INDEX_PATH', 'data/paper_index.db').strip()
+    if not path:
+        return None
+    try:
+        return PaperIndex(path)
+    except (PaperIndexError, sqlite3.Error) as e:
+        logger.error("Paper index disabled: %s", e)
+        return None
@@ -0,0 +1,242 @@
+"""
+Paper Processing Pipeline
+Search -> scrape -> index and image prompts, shared by the API endpoints
+and the batch CLI
+"""
+
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+from .serper_client import SerperClient
+from .scraper import PaperScraper
+from .paper_index import PaperIndex
+from .dedup import deduplicate_papers, find_duplicate_clusters
+from .profiling import stage
+from .memory import track_request_memory
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# Stop paging through Serper after this many pages of one search
+MAX_SERPER_PAGES = 10
+
+
+def run_pipeline(
+    query: str,
+    num_papers: int,
+    serper: SerperClient,
+    scraper: PaperScraper,
+    index: Optional[PaperIndex] = None,
+    local_first: bool = False,
+    dedup: bool = True,
+    session: Optional[Dict] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[Dict]:
+    """
+    Find papers for a query and scrape their abstracts
+
+    In local-first mode the paper index answers first and Serper is only
+    called to top up missing results. Every Serper hit and every scraped
+    abstract is written to the index when one is configured. Near-duplicate
+    copies of the same work are collapsed before scraping.
+
+    Args:
+        query: Search query
+        num_papers: Number of papers to return
+        serper: Serper client
+        scraper: Paper scraper
+        index: Local paper index (optional)
+        local_first: Answer from the index before calling Serper
+        dedup: Collapse near-duplicate results before scraping
+        session: When given, filled with the state next_page needs to
+            continue the search (results past num_papers stay unscraped)
+        cancel_event: When set, outstanding scrapes are cancelled
+
+    Returns:
+        Paper dicts with title, link, snippet, year and abstract
+    
+    Raises:
+        RequestCancelled: If cancel_event was set before scraping finished
+    """
+    papers: List[Dict] = []
+    serper_page = 0
+    if local_first and index is not None:
+        with stage('local_index'):
+            papers = index.search(query, limit=num_papers, min_year=serper.MIN_YEAR)
+        logger.info("Local index returned %s/%s papers", len(papers), num_papers)
+
+    if len(papers) < num_papers:
+        # Step 1: Search with Serper API (fast!)
+        logger.debug("SERPER API - SEARCHING PAPERS")
+        # Keep Serper's surplus results so duplicates can be replaced
+        with stage('serper'):
+            results = serper.search_scholar(query=query, num_results=num_papers, keep_extra=True)
+        serper_page = 1
+        logger.info("Found %s papers", len(results))
+
+        if index is not None:
+            with stage('index_write'):
+                index.add_papers(results)
+
+        known_links = {paper['link'] for paper in papers}
+        papers.extend(
+            paper for paper in results if paper['link'] not in known_links
+        )
+
+    if dedup:
+        with stage('dedup'):
+            papers = deduplicate_papers(papers)
+
+    if session is not None:
+        session.update({
+            'query': query,
+            'num_papers': num_papers,
+            'dedup': dedup,
+            'results': papers,
+            'serper_page': serper_page,
+            'exhausted': False,
+        })
+    papers = papers[:num_papers]
+
+    # Step 2: Scrape abstracts for papers the index could not answer
+    scrape_missing(papers, scraper, index, cancel_event)
+    return papers
+
+
+def scrape_missing(
+    papers: List[Dict],
+    scraper: PaperScraper,
+    index: Optional[PaperIndex] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> None:
+    """Scrape abstracts (in place) for papers that do not have one yet"""
+    to_scrape = [paper for paper in papers if not paper.get('abstract')]
+    if not to_scrape:
+        return
+
+    logger.debug("WEB SCRAPER - EXTRACTING ABSTRACTS")
+    # Pages scraped for one request share the REQUEST_MEMORY_LIMIT_MB budget
+    with stage('scrape'), track_request_memory():
+        scraper.scrape_papers(to_scrape, cancel_event=cancel_event)
+    logger.info("Scraped %s papers", len(to_scrape))
+
+    if index is not None:
+        with stage('index_write'):
+            index.add_papers(to_scrape)
+
+
+def _new_unique(existing: List[Dict], candidates: List[Dict], dedup: bool) -> List[Dict]:
+    """Candidates that are neither known links nor duplicates of existing results"""
+    known_links = {paper['link'] for paper in existing}
+    candidates = [paper for paper in candidates if paper['link'] not in known_links]
+    if not dedup or not candidates:
+        return candidates
+
+    combined = existing + candidates
+    blocked = set()
+    for members in find_duplicate_clusters(combined):
+        if members[0] < len(existing):
+            blocked.update(members)
+    fresh = [combined[i] for i in range(len(existing), len(combined)) if i not in blocked]
+    return deduplicate_papers(fresh)
+
+
+def has_more(session: Dict, offset: int) -> bool:
+    """Whether a session can produce results past `offset`"""
+    return offset < len(session['results']) or not session['exhausted']
+
+
+def next_page(
+    session: Dict,
+    offset: int,
+    serper: SerperClient,
+    scraper: PaperScraper,
+    index: Optional[PaperIndex] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> List[Dict]:
+    """
+    Return the next slice of a search started by run_pipeline
+
+    Results already fetched are reused and Serper is only asked for further
+    pages when they run out. Only the returned slice is scraped; its
+    abstracts stay in the session, so repeating a page costs nothing.
+
+    Args:
+        session: State filled in by run_pipeline (updated in place)
+        offset: Number of results the client has already received
+        serper: Serper client
+        scraper: Paper scraper
+        index: Local paper index (optional)
+        cancel_event: When set, outstanding scrapes are cancelled
+
+    Returns:
+        Up to session['num_papers'] paper dicts
+
+    Raises:
+        RequestCancelled: If cancel_event was set before scraping finished
+    """
+    results = session['results']
+    num_papers = session['num_papers']
+    wanted = offset + num_papers
+
+    while len(results) < wanted and not session['exhausted']:
+        session['serper_page'] += 1
+        page = session['serper_page']
+        with stage('serper'):
+            found = serper.search_scholar(
+                query=session['query'],
+                num_results=num_papers,
+                keep_extra=True,
+                page=page
+            )
+        logger.info("Serper page %s returned %s papers", page, len(found))
+        if index is not None:
+            with stage('index_write'):
+                index.add_papers(found)
+
+        with stage('dedup'):
+            results.extend(_new_unique(results, found, session['dedup']))
+        if not found or page >= MAX_SERPER_PAGES:
+            session['exhausted'] = True
+
+    papers = results[offset:wanted]
+    scrape_missing(papers, scraper, index, cancel_event)
+    return papers
+
+
+def build_image_prompt(paper_dict: Dict) -> str:
+    """
+    Build the Scenario prompt for a paper
+
+    Args:
+        paper_dict: Paper fields from ProcessedPaper.model_dump()
+
+    Returns:
+        Prompt text containing only title, abstract, and year
+    """
+    paper_dict = dict(paper_dict)
+
+    # Truncate abstract for faster image generation (keep first 500 chars)
+    if paper_dict.get('abstract') and len(paper_dict['abstract']) > 500:
+        paper_dict['abstract'] = paper_dict['abstract'][:500] + "..."
+    
+    # CRITICAL: Remove snippet to prevent query contamination
+    # The snippet field may contain search-highlighted text that leaks user query terms
+    paper_dict.pop('snippet', None)
+    
+    # Also remove fields not needed for image generation
+    paper_dict.pop('image_urls', None)
+    paper_dict.pop('link', None)
+    
+    paper_json = json.dumps(paper_dict, indent=2)
+    
+    logger.info("Paper data sent to Scenario: title=%s..., has_abstract=%s", paper_dict.get('title', 'N/A')[:50], bool(paper_dict.get('abstract')))
+    
+    return f"""Create an engaging, informative scientific visualization that captures the essence of this research paper.
+        Paper Data:
+        {paper_json}
+
+        Style: Modern, professional scientific illustration with clean design.
+        Goal: Grab reader attention and convey the research's key concepts visually.
+        Make it informative, insightful, and visually compelling for academic audiences."""
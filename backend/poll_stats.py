@@ -0,0 +1,195 @@
+"""
+Adaptive Scenario Polling
+Keeps rolling job-duration statistics per generation shape and plans polls
+around the predicted completion time
+"""
+
+import math
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# (model_id, width, height, steps)
+JobShape = Tuple[str, int, int, int]
+
+
+def quantile(sorted_values: list, q: float) -> float:
+    """Linear-interpolated quantile of an already sorted list"""
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class JobDurationStats:
+    """
+    Rolling distribution of Scenario job durations and polling cost
+
+    Durations are estimated as the midpoint between the last poll that saw
+    the job unfinished and the poll that saw it done, which removes most of
+    the bias a coarse schedule would otherwise add.
+    """
+
+    # Polling bounds (seconds)
+    MIN_INTERVAL = 1.0
+    MAX_INTERVAL = 10.0
+
+    # Samples needed before the distribution drives the schedule
+    MIN_SAMPLES = 5
+
+    # Quantiles used as poll targets when no progress is reported
+    POLL_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the statistics store
+
+        Args:
+            window: Durations kept per job shape
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: Dict[JobShape, deque] = {}
+        self._polls: Dict[JobShape, Dict[str, float]] = {}
+
+    def record(self, shape: JobShape, duration: float, polls: int, detection_delay: float) -> None:
+        """
+        Record a finished job
+
+        Args:
+            shape: (model_id, width, height, steps)
+            duration: Estimated job duration in seconds
+            polls: Status GETs spent on the job
+            detection_delay: Upper bound on how late completion was noticed
+        """
+        with self._lock:
+            self._durations.setdefault(shape, deque(maxlen=self.window)).append(duration)
+            counters = self._polls.setdefault(shape, {'jobs': 0, 'polls': 0, 'detection_delay': 0.0})
+            counters['jobs'] += 1
+            counters['polls'] += polls
+            counters['detection_delay'] += detection_delay
+
+    def quantiles(self, shape: JobShape) -> Optional[Dict[float, float]]:
+        """
+        Duration quantiles for a job shape
+
+        Returns:
+            Mapping of quantile -> seconds, or None with too few samples
+        """
+        with self._lock:
+            samples = sorted(self._durations.get(shape, ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        return {q: quantile(samples, q) for q in self.POLL_QUANTILES}
+
+    def initial_wait(self, shape: JobShape) -> float:
+        """
+        Wait before the first poll of a new job
+
+        The fastest quarter of past jobs took at least the p25 duration, so
+        polling earlier is almost always wasted.
+
+        Returns:
+            Seconds to wait (0 without enough history)
+        """
+        quantiles = self.quantiles(shape)
+        if quantiles is None:
+            return 0.0
+        return max(0.0, quantiles[self.POLL_QUANTILES[0]] - self.MIN_INTERVAL)
+
+    def next_interval(
+        self,
+        shape: JobShape,
+        elapsed: float,
+        attempt: int = 0,
+        progress: Optional[Tuple[float, float]] = None,
+        previous_progress: Optional[Tuple[float, float]] = None,
+        fallback: float = 2.0
+    ) -> float:
+        """
+        Plan the wait before the next poll
+
+        Progress reported by Scenario is extrapolated to an ETA first. Without
+        usable progress the next poll targets the next duration quantile the
+        job has not reached yet. With no history the fallback is used. The
+        shortest allowed wait grows every 5 attempts so a stalled job cannot
+        burn the polling budget on 1-second polls.
+
+        Args:
+            shape: (model_id, width, height, steps)
+            elapsed: Seconds since the job was submitted
+            attempt: Zero-based polling attempt that just finished
+            progress: Latest (elapsed, progress 0-1) observation
+            previous_progress: Earlier (elapsed, progress) observation
+            fallback: Wait used when nothing better is known
+
+        Returns:
+            Seconds to wait
+        """
+        eta = self._progress_eta(progress, previous_progress)
+        if eta is None:
+            quantiles = self.quantiles(shape)
+            if quantiles is not None:
+                upcoming = [value - elapsed for value in quantiles.values() if value > elapsed + self.MIN_INTERVAL / 2]
+                eta = upcoming[0] if upcoming else None
+
+        if eta is None:
+            return fallback
+        floor = self.MIN_INTERVAL * (1 + attempt // 5)
+        return min(self.MAX_INTERVAL, max(floor, eta))
+
+    @staticmethod
+    def _progress_eta(
+        progress: Optional[Tuple[float, float]],
+        previous_progress: Optional[Tuple[float, float]]
+    ) -> Optional[float]:
+        """Seconds until progress reaches 1.0, extrapolated linearly"""
+        if not progress or not 0 < progress[1] < 1:
+            return None
+        t, p = progress
+        if previous_progress and previous_progress[1] < p and previous_progress[0] < t:
+            rate = (p - previous_progress[1]) / (t - previous_progress[0])
+        else:
+            rate = p / t if t > 0 else 0
+        if rate <= 0:
+            return None
+        return (1 - p) / rate
+
+    def export(self) -> Dict:
+        """Statistics per job shape, for tuning"""
+        with self._lock:
+            shapes = list(self._durations.items())
+            polls = {shape: dict(counters) for shape, counters in self._polls.items()}
+
+        exported = {}
+        for shape, durations in shapes:
+            samples = sorted(durations)
+            counters = polls.get(shape, {'jobs': 0, 'polls': 0, 'detection_delay': 0.0})
+            jobs = counters['jobs'] or 1
+            model_id, width, height, steps = shape
+            exported[f"{model_id}:{width}x{height}:{steps}"] = {
+                'samples': len(samples),
+                'p50': round(quantile(samples, 0.5), 2),
+                'p90': round(quantile(samples, 0.9), 2),
+                'max': round(samples[-1], 2),
+                'jobs': counters['jobs'],
+                'polls_per_job': round(counters['polls'] / jobs, 2),
+                'mean_detection_delay': round(counters['detection_delay'] / jobs, 2),
+            }
+        return exported
+
+
+_stats = JobDurationStats()
+
+
+def get_job_duration_stats() -> JobDurationStats:
+    """Get the process-wide job duration statistics"""
+    return _stats
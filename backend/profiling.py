@@ -0,0 +1,242 @@
+"""
+Per-Request Profiling
+Sampling profiler for a single admin-requested API call, covering the
+request thread and the scrape/fetch threads it starts
+
+While no profile is active, stage() and bind() only look up context
+variables, so the instrumentation stays in place in production.
+"""
+
+import os
+import sys
+import time
+import secrets
+import logging
+import threading
+import tracemalloc
+import contextvars
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from .memory import current_request_memory, get_memory_stats
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 128
+
+_current: contextvars.ContextVar[Optional['Profile']] = contextvars.ContextVar('profile', default=None)
+
+
+def _fold(frame, label: str) -> str:
+    """Collapse a stack into 'label;outer;...;inner' (flame graph folded format)"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(label)
+    return ';'.join(reversed(names))
+
+
+class Profile:
+    """
+    Samples the stacks of the threads working on one request
+
+    Threads join the profile through bind() (or thread()) and leave it
+    when their task ends; a background thread records their stacks every
+    `interval` seconds. Stage timings are summed across threads, so the
+    scrape stages can add up to more than the request's wall time.
+    """
+
+    def __init__(self, name: str, interval: float = 0.005):
+        """
+        Initialize a profile
+
+        Args:
+            name: Description stored with the result (e.g. endpoint and query)
+            interval: Seconds between stack samples
+        """
+        self.id = secrets.token_hex(8)
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._threads: Dict[int, str] = {}
+        self._stacks: Counter = Counter()
+        self._stages: Dict[str, list] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.samples = 0
+        self.started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> 'Profile':
+        """Start sampling"""
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f'profiler-{self.id}', daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the result"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.duration = time.perf_counter() - self.started
+        return self.result()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, label in self._threads.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._stacks[_fold(frame, label)] += 1
+                self.samples += 1
+
+    @contextmanager
+    def thread(self, label: str) -> Iterator[None]:
+        """Profile the current thread (and the tasks it binds) for the block"""
+        ident = threading.get_ident()
+        token = _current.set(self)
+        with self._lock:
+            previous = self._threads.get(ident)
+            self._threads[ident] = label
+        try:
+            yield
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+            _current.reset(token)
+
+    def wrap(self, func: Callable, label: str) -> Callable:
+        """Wrap func so the thread running it is profiled"""
+        def run(*args, **kwargs):
+            with self.thread(label):
+                return func(*args, **kwargs)
+        return run
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        """Add time spent in a pipeline stage"""
+        with self._lock:
+            entry = self._stages.setdefault(name, [0.0, 0, 0.0])
+            entry[0] += seconds
+            entry[1] += 1
+            entry[2] = max(entry[2], seconds)
+
+    def folded(self) -> str:
+        """Samples in folded-stack format (flamegraph.pl, speedscope, inferno)"""
+        with self._lock:
+            return '\n'.join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def stages(self) -> Dict[str, Dict]:
+        """Wall time per stage in milliseconds"""
+        with self._lock:
+            return {
+                name: {'total_ms': round(total * 1000, 1), 'calls': calls, 'max_ms': round(longest * 1000, 1)}
+                for name, (total, calls, longest) in self._stages.items()
+            }
+
+    def result(self) -> Dict:
+        """Profile summary with the folded stacks"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'duration_ms': round(self.duration * 1000, 1),
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'stages': self.stages(),
+            'folded': self.folded(),
+        }
+
+    def server_timing(self) -> str:
+        """Stage totals as a Server-Timing header value (shown by browser dev tools)"""
+        return ', '.join(
+            f"{name};dur={entry['total_ms']}" for name, entry in self.stages().items()
+        )
+
+
+def current_profile() -> Optional[Profile]:
+    """The profile of the request running in this context, if any"""
+    return _current.get()
+
+
+def bind(func: Callable, label: str) -> Callable:
+    """
+    Carry the request's context (profile, memory budget) into a task
+    submitted to a thread pool
+
+    Returns func itself when neither is active.
+    """
+    profile = _current.get()
+    if profile is None and current_request_memory() is None:
+        return func
+    task = profile.wrap(func, label) if profile is not None else func
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # Each call gets its own copy: a context cannot be entered by two threads
+        return context.copy().run(task, *args, **kwargs)
+    return run
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage into the current profile and, while tracemalloc
+    runs (MEMORY_DEBUG), record its allocations; no-op otherwise
+    """
+    profile = _current.get()
+    tracing = tracemalloc.is_tracing()
+    if profile is None and not tracing:
+        yield
+        return
+    started = time.perf_counter()
+    allocated_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.add_stage(name, time.perf_counter() - started)
+        if tracing:
+            allocated, peak = tracemalloc.get_traced_memory()
+            get_memory_stats().add_stage(name, allocated - allocated_before, peak)
+
+
+class ProfileStore:
+    """Keeps the most recent profile results for retrieval"""
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def save(self, result: Dict) -> None:
+        """Store a profile result, dropping the oldest beyond max_profiles"""
+        with self._lock:
+            self._profiles[result['id']] = result
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        """Look up a stored profile result"""
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+_store = ProfileStore()
+
+
+def get_profile_store() -> ProfileStore:
+    """Get the process-wide profile store"""
+    return _store
+
+
+def start_profile(name: str) -> Profile:
+    """Start a profile sampled every PROFILE_INTERVAL_MS (default 5) milliseconds"""
+    return Profile(name, interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000).start()
@@ -0,0 +1,41 @@
+"""
+Fast JSON Responses
+Serializes response bodies with orjson when it is installed, falling back
+to the standard library
+"""
+
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used instead
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON
+
+    Args:
+        content: JSON-compatible data (dicts, lists, str, int, float, bool, None)
+
+    Returns:
+        Encoded bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    Endpoints that build plain dicts themselves can return this directly to
+    skip response-model validation of data that is already well-formed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,284 @@
+"""
+Retry Policy
+Shared retries for the Serper, Scenario and scraper clients: full-jitter
+backoff, Retry-After support and a process-wide retry budget
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, TypeVar
+import requests
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP statuses worth another attempt (everything else 4xx is final)
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def _http_response(error: BaseException) -> Optional[requests.Response]:
+    """Response behind an error or the error it wraps (clients re-raise their own types)"""
+    while error is not None:
+        response = getattr(error, 'response', None)
+        if response is not None:
+            return response
+        error = error.__cause__
+    return None
+
+
+def _request_error(error: BaseException) -> Optional[requests.RequestException]:
+    """The requests exception an error wraps, if any"""
+    while error is not None:
+        if isinstance(error, requests.RequestException):
+            return error
+        error = error.__cause__
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call may succeed if repeated
+
+    Connection errors, timeouts, 429 and 5xx responses are retryable;
+    other HTTP errors and non-network failures are not.
+    """
+    cause = _request_error(error)
+    if cause is None:
+        return False
+    response = _http_response(error)
+    if response is not None:
+        return response.status_code in RETRYABLE_STATUSES
+    return isinstance(cause, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds the server asked us to wait, from a Retry-After header
+
+    Returns:
+        Delay in seconds, or None when the header is missing or invalid
+    """
+    response = _http_response(error)
+    if response is None:
+        return None
+    return parse_retry_after(response.headers.get('Retry-After'))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After value (delay-seconds or HTTP-date), or None if invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of requests, across all clients
+
+    Every first attempt earns `ratio` of a token (up to `burst`); each
+    retry spends a whole token. While an upstream is failing everything,
+    retries therefore add at most about `ratio` to its load instead of
+    multiplying it by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0):
+        """
+        Initialize the retry budget
+
+        Args:
+            ratio: Retries allowed per request
+            burst: Most tokens that can be saved up
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+
+    def on_request(self) -> None:
+        """Credit the budget for a first attempt"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_retry(self) -> bool:
+        """Spend a token for a retry, if one is available"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def stats(self) -> Dict:
+        """Budget settings and remaining tokens"""
+        with self._lock:
+            return {'ratio': self.ratio, 'burst': self.burst, 'tokens': round(self._tokens, 2)}
+
+
+class RetryPolicy:
+    """
+    Retries one client's calls with full jitter under a shared budget
+
+    The wait before retry n is uniform in [0, min(max_delay, base_delay * 2**n)],
+    so clients that failed together do not retry together. A Retry-After
+    header replaces the computed wait; one longer than max_retry_after
+    fails the call instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        budget: RetryBudget,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 10.0,
+        max_retry_after: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the retry policy
+
+        Args:
+            name: Client name used in metrics
+            budget: Retry budget shared with other clients
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff ceiling for the first retry (seconds)
+            max_delay: Largest backoff ceiling (seconds)
+            max_retry_after: Longest Retry-After that is honoured (seconds)
+            sleep: Wait function (replaceable in tests)
+        """
+        self.name = name
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self.exhausted = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter wait before the given retry (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Run func, retrying retryable failures while attempts and budget last
+
+        Args:
+            func: Zero-argument callable making one attempt
+
+        Returns:
+            func's result
+
+        Raises:
+            The last attempt's exception
+        """
+        self._count('requests')
+        self.budget.on_request()
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.max_attempts:
+                    self._count('exhausted')
+                    raise
+                delay = retry_after(e)
+                if delay is not None and delay > self.max_retry_after:
+                    logger.warning("%s: Retry-After %.0fs exceeds limit, not retrying", self.name, delay)
+                    raise
+                if not self.budget.try_retry():
+                    self._count('denied')
+                    logger.warning("%s: retry budget exhausted, not retrying: %s", self.name, e)
+                    raise
+                if delay is None:
+                    delay = self.backoff(attempt - 1)
+                self._count('retries')
+                logger.info(
+                    "%s: attempt %s failed (%s), retrying in %.2fs",
+                    self.name, attempt, e, delay, extra={'category': 'http'}
+                )
+                self.sleep(delay)
+                attempt += 1
+
+    def stats(self) -> Dict:
+        """Retry counters for monitoring"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'denied': self.denied,
+                'exhausted': self.exhausted,
+            }
+
+
+_budget: Optional[RetryBudget] = None
+_policies: Dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """
+    Get the process-wide retry budget
+
+    Built on first use rather than at import, so RETRY_BUDGET_RATIO
+    (default 0.1) is read after the entry point has loaded .env.
+    """
+    global _budget
+    with _policies_lock:
+        if _budget is None:
+            _budget = RetryBudget(ratio=float(os.getenv('RETRY_BUDGET_RATIO', '0.1')))
+        return _budget
+
+
+def get_retry_policy(name: str, **kwargs) -> RetryPolicy:
+    """
+    Get the process-wide policy for a client, creating it on first use
+
+    Args:
+        name: Client name ('serper', 'scenario', 'scraper')
+        **kwargs: RetryPolicy settings, used when the policy is created
+
+    Returns:
+        RetryPolicy sharing the process-wide budget (RETRY_BUDGET_RATIO)
+    """
+    budget = get_retry_budget()
+    with _policies_lock:
+        if name not in _policies:
+            _policies[name] = RetryPolicy(name, budget, **kwargs)
+        return _policies[name]
+
+
+def retry_stats() -> Dict:
+    """Budget and per-client retry counters"""
+    with _policies_lock:
+        policies = dict(_policies)
+    return {
+        'budget': get_retry_budget().stats(),
+        'clients': {name: policy.stats() for name, policy in policies.items()},
+    }
@@ -1,24 +1,26 @@
 """
 Scenario.com API Client for Image Generation
-Enhanced with retry logic and comprehensive error handling
+Enhanced with shared-policy retries and comprehensive error handling
 """
 
 import os
+import json
 import time
 import base64
+import hashlib
 import logging
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 import requests
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
-)
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from .scenario_scheduler import SubmissionCancelled, SubmissionScheduler, get_default_scheduler
+from .job_events import JobEventHub
+from .poll_stats import JobDurationStats, JobShape, get_job_duration_stats
+from .shared_cache import SharedCache, SharedCacheError, cache_ttl, get_shared_cache
+from .retry_policy import get_retry_policy
+from .key_pool import KeyPin, get_key_pool, keys_from_env
+from .cancellation import RequestCancelled, get_cancellation_stats
 
 # Get logger (don't configure - let app.py handle it)
 logger = logging.getLogger(__name__)
@@ -33,43 +35,97 @@ class ScenarioClient:
     
     BASE_URL = 'https://api.cloud.scenario.com/v1'
     
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
+    # Resolved asset URLs, shared by all client instances
+    # (asset ID -> (URL, expiry)). The URLs are signed and expire, so they
+    # are only reused for ASSET_CACHE_TTL seconds, well within their lifetime.
+    ASSET_CACHE_SIZE = 1024
+    ASSET_CACHE_TTL = 600
+    _asset_url_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+    _asset_cache_lock = threading.Lock()
+    
+    # Upper bound on concurrent asset lookups for a single job
+    MAX_ASSET_WORKERS = 8
+    
+    # Give up on a job after this many seconds
+    POLL_TIMEOUT = 300
+    
+    # With completion webhooks, polling is only a slow safety net
+    WEBHOOK_SAFETY_POLL_INTERVAL = 20
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        scheduler: Optional[SubmissionScheduler] = None,
+        event_hub: Optional[JobEventHub] = None,
+        duration_stats: Optional[JobDurationStats] = None,
+        cache: Optional[SharedCache] = None
+    ):
         """
         Initialize Scenario API client
         
         Args:
-            api_key: Scenario API key (defaults to SCENARIO_API_KEY env var)
+            api_key: Scenario API key (defaults to the SCENARIO_API_KEYS pool
+                of key:secret pairs, or SCENARIO_API_KEY when no pool is configured)
             api_secret: Scenario API secret (defaults to SCENARIO_API_SECRET env var)
+            scheduler: Submission scheduler (defaults to the process-wide one,
+                so every client instance shares the same limits)
+            event_hub: Completion callback hub. Only pass one in the process
+                that serves /api/webhooks/scenario: callbacks never reach
+                other processes, which would then wait on the slow safety
+                poll (default: none, polling only)
+            duration_stats: Job duration statistics used to plan polls
+                (defaults to the process-wide store)
+            cache: Cross-process render cache, so identical requests from
+                several workers share one job (defaults to the one at
+                SHARED_CACHE_PATH; disabled when unset)
         """
-        self.api_key = api_key or os.getenv('SCENARIO_API_KEY')
-        self.api_secret = api_secret or os.getenv('SCENARIO_API_SECRET', '')
+        default_secret = api_secret or os.getenv('SCENARIO_API_SECRET', '')
+        keys = [api_key] if api_key else keys_from_env('SCENARIO_API_KEYS', 'SCENARIO_API_KEY')
+        credentials = [key if ':' in key else f"{key}:{default_secret}" for key in keys]
+        self.scheduler = scheduler or get_default_scheduler()
+        self.event_hub = event_hub
+        self.duration_stats = duration_stats or get_job_duration_stats()
+        self.cache = cache or get_shared_cache()
+        # Asset URLs are signed and expire, so renders are not kept for long
+        self.cache_ttl = cache_ttl('SCENARIO_CACHE_TTL', 3600)
         
-        if not self.api_key:
+        if not credentials:
             raise ValueError("SCENARIO_API_KEY not found in environment variables")
         
-        # Create authorization header
-        auth_string = f"{self.api_key}:{self.api_secret}"
-        auth_encoded = base64.b64encode(auth_string.encode()).decode()
-        
-        self.headers = {
-            'accept': 'application/json',
-            'Content-Type': 'application/json',
-            'Authorization': f'Basic {auth_encoded}'
+        # Create authorization headers, one per account in the key pool
+        self._auth_headers = {
+            credential: {
+                'accept': 'application/json',
+                'Content-Type': 'application/json',
+                'Authorization': f"Basic {base64.b64encode(credential.encode()).decode()}"
+            }
+            for credential in credentials
         }
+        self.keys = get_key_pool('scenario', credentials)
+        # api_key/headers show the first account
+        self.api_key, self.api_secret = credentials[0].split(':', 1)
+        self.headers = self._auth_headers[credentials[0]]
+        
+        # Reuse TCP/TLS connections across submissions and polls
+        self.session = requests.Session()
+        self.retry_policy = get_retry_policy('scenario', max_attempts=3, base_delay=2.0, max_delay=10.0)
+    
+    def warm_up(self) -> None:
+        """Open a pooled connection to the API host ahead of the first job"""
+        try:
+            self.session.head(self.BASE_URL, timeout=5)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Scenario warm-up failed: %s", e)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((requests.RequestException, ScenarioAPIError)),
-        reraise=True
-    )
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
+    def _make_request(self, method: str, endpoint: str, pin: Optional[KeyPin] = None, **kwargs) -> Dict:
         """
         Make API request with retry logic
         
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint
+            pin: Keeps a job's requests on the account that submitted it
             **kwargs: Additional request parameters
             
         Returns:
@@ -78,29 +134,33 @@ class ScenarioClient:
         Raises:
             ScenarioAPIError: If API request fails after retries
         """
+        return self.retry_policy.call(lambda: self._request_once(method, endpoint, pin, **kwargs))
+    
+    def _request_once(self, method: str, endpoint: str, pin: Optional[KeyPin] = None, **kwargs) -> Dict:
+        """Single API request attempt"""
         try:
             url = f"{self.BASE_URL}/{endpoint}"
-            logger.info(f"Making {method} request to {url}")
+            logger.info("Making %s request to %s", method, url, extra={'category': 'http'})
             
-            response = requests.request(
+            response = self.keys.call(lambda key: self.session.request(
                 method=method,
                 url=url,
-                headers=self.headers,
+                headers=self._auth_headers[key.secret],
                 timeout=30,
                 **kwargs
-            )
+            ), pin)
             response.raise_for_status()
             return response.json()
             
         except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            raise ScenarioAPIError(f"API request failed: {e}")
+            logger.error("HTTP error: %s", e)
+            raise ScenarioAPIError(f"API request failed: {e}") from e
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
-            raise ScenarioAPIError(f"Network error: {e}")
+            logger.error("Request error: %s", e)
+            raise ScenarioAPIError(f"Network error: {e}") from e
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise ScenarioAPIError(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
+            raise ScenarioAPIError(f"Unexpected error: {e}") from e
     
     def generate_image(
         self,
@@ -112,7 +172,9 @@ class ScenarioClient:
         steps: int = 28,
         guidance: float = 3.5,
         negative_prompt: Optional[str] = None,
-        scheduler: str = 'EulerAncestralDiscreteScheduler'
+        scheduler: str = 'EulerAncestralDiscreteScheduler',
+        priority: int = 0,
+        cancel_event: Optional[threading.Event] = None
     ) -> List[str]:
         """
         Generate images from text prompt
@@ -127,13 +189,85 @@ class ScenarioClient:
             guidance: Guidance scale
             negative_prompt: Things to avoid in the image
             scheduler: Scheduler algorithm
+            priority: Submission priority (lower is sent first)
+            cancel_event: When set before the job is submitted, the queued
+                submission is dropped; once submitted, polling stops
             
         Returns:
             List of file paths to generated images
             
         Raises:
             ScenarioAPIError: If generation fails
+            SubmissionCancelled: If cancel_event was set while queued (or
+                while waiting on another worker's identical render)
+            RequestCancelled: If cancel_event was set while polling
+        """
+        payload = self._build_payload(
+            prompt, model_id, width, height, samples, steps, guidance, negative_prompt, scheduler
+        )
+        
+        logger.info("Generating image with prompt: '%s...'", prompt[:50])
+        
+        shape = (model_id, width, height, steps)
+        if self.cache is None:
+            return self._generate(payload, shape, priority, cancel_event)
+        
+        key = self._render_key(payload)
+        try:
+            return self.cache.get_or_compute(
+                key,
+                lambda: self._generate(payload, shape, priority, cancel_event),
+                ttl=self.cache_ttl,
+                lease_seconds=self.POLL_TIMEOUT + 60,
+                cancel_event=cancel_event
+            )
+        except SharedCacheError as e:
+            raise SubmissionCancelled(str(e))
+    
+    def cached_images(
+        self,
+        prompt: str,
+        model_id: str = 'flux.1-dev',
+        width: int = 1024,
+        height: int = 1024,
+        samples: int = 1,
+        steps: int = 28,
+        guidance: float = 3.5,
+        negative_prompt: Optional[str] = None,
+        scheduler: str = 'EulerAncestralDiscreteScheduler'
+    ) -> List[str]:
+        """
+        Look up an identical render in the shared cache without submitting one
+        
+        Args:
+            prompt: Text description of the image
+            model_id, width, height, samples, steps, guidance,
+            negative_prompt, scheduler: As for generate_image
+            
+        Returns:
+            The cached image URLs, or [] when the prompt has not been
+            rendered yet (or no shared cache is configured)
         """
+        if self.cache is None:
+            return []
+        payload = self._build_payload(
+            prompt, model_id, width, height, samples, steps, guidance, negative_prompt, scheduler
+        )
+        return self.cache.get(self._render_key(payload)) or []
+    
+    @staticmethod
+    def _build_payload(
+        prompt: str,
+        model_id: str,
+        width: int,
+        height: int,
+        samples: int,
+        steps: int,
+        guidance: float,
+        negative_prompt: Optional[str],
+        scheduler: str
+    ) -> Dict:
+        """Build the txt2img request body"""
         payload = {
             'modelId': model_id,
             'prompt': prompt,
@@ -144,105 +278,258 @@ class ScenarioClient:
             'height': height,
             'scheduler': scheduler
         }
-        
         if negative_prompt:
             payload['negativePrompt'] = negative_prompt
-        
-        logger.info(f"Generating image with prompt: '{prompt[:50]}...'")
-        
+        return payload
+    
+    @staticmethod
+    def _render_key(payload: Dict) -> str:
+        """Shared cache key of a render request"""
+        return 'scenario:' + hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    
+    def _generate(
+        self,
+        payload: Dict,
+        shape: JobShape,
+        priority: int,
+        cancel_event: Optional[threading.Event]
+    ) -> List[str]:
+        """Submit a txt2img job and wait for its image URLs"""
+        # The job's polls and asset lookups go to the account that created it
+        pin = KeyPin()
         try:
-            # Create generation job
-            response = self._make_request('POST', 'generate/txt2img', json=payload)
-            
-            # Extract job ID
-            job_id = response.get('job', {}).get('jobId') or response.get('jobId') or response.get('id')
-            
-            if not job_id:
-                raise ScenarioAPIError(f"Job ID not found in response: {response}")
-            
-            logger.info(f"Job created successfully! Job ID: {job_id}")
-            
-            # Poll for completion and get image URLs
-            return self._poll_and_get_urls(job_id)
+            # Wait for an in-flight slot and a submission token; the slot is
+            # held until polling finishes so the cap counts running jobs
+            with self.scheduler.slot(priority, cancel_event):
+                # Create generation job
+                submitted_at = time.monotonic()
+                response = self._make_request('POST', 'generate/txt2img', pin=pin, json=payload)
+                
+                # Extract job ID
+                job_id = response.get('job', {}).get('jobId') or response.get('jobId') or response.get('id')
+                
+                if not job_id:
+                    raise ScenarioAPIError(f"Job ID not found in response: {response}")
+                
+                logger.info("Job created successfully! Job ID: %s", job_id)
+                
+                # Poll for completion and get image URLs
+                return self._poll_and_get_urls(
+                    job_id,
+                    shape=shape,
+                    submitted_at=submitted_at,
+                    cancel_event=cancel_event,
+                    pin=pin
+                )
             
+        except SubmissionCancelled:
+            get_cancellation_stats().add('scenario_submissions_cancelled')
+            raise
         except ScenarioAPIError as e:
-            logger.error(f"Image generation failed: {e}")
+            logger.error("Image generation failed: %s", e)
             raise
     
-    def _poll_and_get_urls(self, job_id: str, max_attempts: int = 60) -> List[str]:
+    def _poll_and_get_urls(
+        self,
+        job_id: str,
+        max_attempts: int = 60,
+        shape: Optional[JobShape] = None,
+        submitted_at: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        pin: Optional[KeyPin] = None
+    ) -> List[str]:
         """
         Poll job status until completion with adaptive polling intervals
         
+        Polls are planned around the predicted completion time: Scenario's
+        progress field is extrapolated to an ETA, falling back to the
+        observed duration distribution for this job shape. With webhooks
+        enabled, each wait ends early as soon as the completion callback
+        arrives, and polling itself only runs as a slow safety net.
+        
         Args:
             job_id: Job ID to poll
             max_attempts: Maximum polling attempts (default: 60)
+            shape: (model_id, width, height, steps) used for duration statistics
+            submitted_at: time.monotonic() when the job was submitted
+            cancel_event: When set, polling stops (the job's result is abandoned)
+            pin: Key pin bound to the account that submitted the job
             
         Returns:
             List of image URLs
             
         Raises:
             ScenarioAPIError: If job fails or times out
+            RequestCancelled: If cancel_event was set while polling
         """
-        logger.info(f"Polling job status for {job_id}...")
+        logger.info("Polling job status for %s...", job_id)
+        submitted_at = submitted_at or time.monotonic()
+        deadline = submitted_at + self.POLL_TIMEOUT
+        last_unfinished = 0.0
+        progress = previous_progress = None
         
-        for attempt in range(max_attempts):
-            try:
-                job_data = self._make_request('GET', f'jobs/{job_id}')
-                job_info = job_data.get('job', {})
-                status = job_info.get('status', '')
-                
-                logger.info(f"Job status: '{status}' (attempt {attempt + 1}/{max_attempts})")
-                
-                if status == 'success':
-                    logger.info("Job completed successfully!")
-                    return self._extract_image_urls(job_data)
+        try:
+            if shape is not None and self.event_hub is None:
+                initial_wait = self.duration_stats.initial_wait(shape)
+                if initial_wait > 0:
+                    logger.info("Waiting %.1fs before first poll (from job history)", initial_wait)
+                    self._wait_for_next_poll(job_id, initial_wait, cancel_event)
+                    # Completion within the initial wait cannot be observed;
+                    # counting from submission would bias durations low
+                    last_unfinished = time.monotonic() - submitted_at
+            
+            for attempt in range(max_attempts):
+                if cancel_event is not None and cancel_event.is_set():
+                    get_cancellation_stats().add('scenario_jobs_abandoned')
+                    logger.info("Stopped polling job %s: request cancelled", job_id)
+                    raise RequestCancelled(f"Stopped polling job {job_id}")
+                try:
+                    job_data = self._make_request('GET', f'jobs/{job_id}', pin=pin)
+                    job_info = job_data.get('job', {})
+                    status = job_info.get('status', '')
+                    elapsed = time.monotonic() - submitted_at
                     
-                elif status == 'failure':
-                    error_msg = job_info.get('error', 'Unknown error')
-                    raise ScenarioAPIError(f"Job failed: {error_msg}")
+                    logger.info("Job status: '%s' (attempt %s/%s)", status, attempt + 1, max_attempts, extra={'category': 'poll'})
                     
-                elif status in ['queued', 'in-progress']:
-                    progress = job_info.get('progress', 0)
-                    logger.info(f"Job {status} - Progress: {progress*100:.1f}%")
-                
-                # Adaptive polling: fast at first, then slower
-                # First 10s: check every 2s (attempts 0-4)
-                # Next 30s: check every 3s (attempts 5-14)
-                # After 40s: check every 5s (attempts 15+)
-                if attempt < 5:
-                    time.sleep(2)
-                elif attempt < 15:
-                    time.sleep(3)
-                else:
-                    time.sleep(5)
+                    if status == 'success':
+                        logger.info("Job completed successfully!")
+                        if shape is not None:
+                            self.duration_stats.record(
+                                shape,
+                                duration=(last_unfinished + elapsed) / 2,
+                                polls=attempt + 1,
+                                detection_delay=elapsed - last_unfinished
+                            )
+                        return self._extract_image_urls(job_data, pin)
+                        
+                    elif status == 'failure':
+                        error_msg = job_info.get('error', 'Unknown error')
+                        raise ScenarioAPIError(f"Job failed: {error_msg}")
+                        
+                    elif status in ['queued', 'in-progress']:
+                        job_progress = job_info.get('progress', 0) or 0
+                        logger.info("Job %s - Progress: %.1f%%", status, job_progress * 100, extra={'category': 'poll'})
+                        if job_progress > 0:
+                            previous_progress, progress = progress, (elapsed, job_progress)
+                    
+                    last_unfinished = elapsed
+                    
+                except ScenarioAPIError:
+                    raise
+                except Exception as e:
+                    logger.error("Error polling job status: %s", e)
+                    if attempt == max_attempts - 1:
+                        raise ScenarioAPIError(f"Polling failed: {e}")
                 
-            except ScenarioAPIError:
-                raise
-            except Exception as e:
-                logger.error(f"Error polling job status: {e}")
-                if attempt == max_attempts - 1:
-                    raise ScenarioAPIError(f"Polling failed: {e}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                interval = self._poll_interval(attempt, shape, time.monotonic() - submitted_at, progress, previous_progress)
+                self._wait_for_next_poll(job_id, min(interval, remaining), cancel_event)
+        finally:
+            if self.event_hub is not None:
+                self.event_hub.discard(job_id)
         
         raise ScenarioAPIError(f"Job timeout after 5 minutes")
     
-    def _extract_image_urls(self, job_data: Dict) -> List[str]:
+    def _poll_interval(
+        self,
+        attempt: int,
+        shape: Optional[JobShape] = None,
+        elapsed: float = 0.0,
+        progress: Optional[tuple] = None,
+        previous_progress: Optional[tuple] = None
+    ) -> float:
+        """
+        Seconds to wait after the given polling attempt
+        
+        Args:
+            attempt: Zero-based polling attempt
+            shape: Job shape for duration statistics (None = fixed schedule)
+            elapsed: Seconds since submission
+            progress: Latest (elapsed, progress) observation
+            previous_progress: Earlier (elapsed, progress) observation
+            
+        Returns:
+            Wait time in seconds
+        """
+        if self.event_hub is not None:
+            return self.WEBHOOK_SAFETY_POLL_INTERVAL
+        
+        # Fixed schedule when nothing is known about this job shape:
+        # First 10s: check every 2s (attempts 0-4)
+        # Next 30s: check every 3s (attempts 5-14)
+        # After 40s: check every 5s (attempts 15+)
+        if attempt < 5:
+            fallback = 2
+        elif attempt < 15:
+            fallback = 3
+        else:
+            fallback = 5
+        
+        if shape is None:
+            return fallback
+        return self.duration_stats.next_interval(
+            shape,
+            elapsed,
+            attempt=attempt,
+            progress=progress,
+            previous_progress=previous_progress,
+            fallback=fallback
+        )
+    
+    def _wait_for_next_poll(
+        self,
+        job_id: str,
+        interval: float,
+        cancel_event: Optional[threading.Event] = None
+    ) -> None:
+        """
+        Sleep until the next poll, until a completion callback arrives, or
+        until cancel_event is set
+        
+        Args:
+            job_id: Job being polled
+            interval: Maximum seconds to wait
+            cancel_event: Ends the wait early when set
+        """
+        if self.event_hub is None:
+            if cancel_event is None:
+                time.sleep(interval)
+            else:
+                cancel_event.wait(interval)
+            return
+        
+        # The hub wakes us for callbacks only, so wait in short slices to
+        # notice a cancellation
+        deadline = time.monotonic() + interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancel_event is not None and cancel_event.is_set()):
+                return
+            wait = min(remaining, 1.0) if cancel_event is not None else remaining
+            if self.event_hub.wait(job_id, wait) is not None:
+                logger.info("Completion callback received for job %s", job_id)
+                return
+    
+    def _extract_image_urls(self, job_data: Dict, pin: Optional[KeyPin] = None) -> List[str]:
         """
         Extract image URLs from job data, checking multiple possible locations
         
         Args:
             job_data: Job data containing image information
+            pin: Account the job belongs to (for asset lookups)
             
         Returns:
             List of image URLs
         """
-        urls = []
         job_info = job_data.get('job', {})
         
         # Try to get URLs directly from job response first (faster)
         # Check if URLs are already in the response
         direct_urls = job_info.get('images', []) or job_info.get('urls', [])
         if direct_urls:
-            logger.info(f"Found {len(direct_urls)} URLs directly in job response")
+            logger.info("Found %s URLs directly in job response", len(direct_urls))
             return [url if isinstance(url, str) else url.get('url', '') for url in direct_urls]
         
         # Fallback: Fetch asset URLs (slower but more reliable)
@@ -253,29 +540,87 @@ class ScenarioClient:
             logger.warning("No asset IDs found in job response")
             return []
         
-        logger.info(f"Fetching URLs for {len(asset_ids)} assets")
+        return self._resolve_asset_urls(asset_ids, pin)
+    
+    def _resolve_asset_urls(self, asset_ids: List[str], pin: Optional[KeyPin] = None) -> List[str]:
+        """
+        Resolve asset IDs to URLs, concurrently and through the asset cache
         
-        # Fetch each asset to get its URL
-        for asset_id in asset_ids:
-            try:
-                asset_data = self._make_request('GET', f'assets/{asset_id}')
-                asset_info = asset_data.get('asset', {})
-                url = asset_info.get('url', '')
-                
-                if url:
-                    urls.append(url)
-                    logger.info(f"Found image URL from asset {asset_id}")
-                else:
-                    logger.warning(f"No URL found for asset {asset_id}")
-                    
-            except Exception as e:
-                logger.error(f"Error fetching asset {asset_id}: {e}")
+        Args:
+            asset_ids: Scenario asset IDs
+            pin: Account the assets belong to
+            
+        Returns:
+            List of image URLs in asset order (unresolvable assets are skipped)
+        """
+        resolved = {}
+        now = time.monotonic()
+        with self._asset_cache_lock:
+            for asset_id in asset_ids:
+                cached = self._asset_url_cache.get(asset_id)
+                if cached is None:
+                    continue
+                url, expires_at = cached
+                if expires_at <= now:
+                    del self._asset_url_cache[asset_id]
+                    continue
+                self._asset_url_cache.move_to_end(asset_id)
+                resolved[asset_id] = url
         
-        return urls
+        missing = [asset_id for asset_id in dict.fromkeys(asset_ids) if asset_id not in resolved]
+        if missing:
+            logger.info("Fetching URLs for %s assets (%s cached)", len(missing), len(resolved))
+            if len(missing) == 1:
+                fetched = [self._fetch_asset_url(missing[0], pin)]
+            else:
+                workers = min(len(missing), self.MAX_ASSET_WORKERS)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    fetched = list(executor.map(lambda asset_id: self._fetch_asset_url(asset_id, pin), missing))
+            
+            expires_at = time.monotonic() + self.ASSET_CACHE_TTL
+            with self._asset_cache_lock:
+                for asset_id, url in zip(missing, fetched):
+                    if not url:
+                        continue
+                    resolved[asset_id] = url
+                    self._asset_url_cache[asset_id] = (url, expires_at)
+                    self._asset_url_cache.move_to_end(asset_id)
+                while len(self._asset_url_cache) > self.ASSET_CACHE_SIZE:
+                    self._asset_url_cache.popitem(last=False)
+        
+        return [resolved[asset_id] for asset_id in asset_ids if asset_id in resolved]
+    
+    def _fetch_asset_url(self, asset_id: str, pin: Optional[KeyPin] = None) -> Optional[str]:
+        """
+        Fetch a single asset's URL
+        
+        Args:
+            asset_id: Scenario asset ID
+            pin: Account the asset belongs to
+            
+        Returns:
+            Asset URL, or None if the lookup failed
+        """
+        try:
+            asset_data = self._make_request('GET', f'assets/{asset_id}', pin=pin)
+            asset_info = asset_data.get('asset', {})
+            url = asset_info.get('url', '')
+            
+            if url:
+                logger.info("Found image URL from asset %s", asset_id, extra={'category': 'http'})
+                return url
+            logger.warning("No URL found for asset %s", asset_id)
+            
+        except Exception as e:
+            logger.error("Error fetching asset %s: %s", asset_id, e)
+        return None
     
 
 # Example usage
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     try:
         client = ScenarioClient()
         prompt = "A futuristic AI research laboratory with holographic displays showing neural networks"
@@ -0,0 +1,188 @@
+"""
+Client-side Scheduler for Scenario Job Submissions
+Caps jobs in flight, shapes the submission rate, and orders waiters by priority
+"""
+
+import os
+import time
+import heapq
+import logging
+import threading
+import itertools
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from .cancellation import RequestCancelled
+from .key_pool import keys_from_env
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class SubmissionCancelled(RequestCancelled):
+    """Raised when a queued submission is cancelled before it is sent"""
+    pass
+
+
+class _Waiter:
+    """Heap entry for a submission waiting for a slot"""
+
+    __slots__ = ('priority', 'seq', 'cancelled')
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.cancelled = False
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SubmissionScheduler:
+    """
+    Gate for Scenario job submissions shared by all ScenarioClient instances
+
+    A submission needs both a free in-flight slot (held until the job has
+    finished polling) and a token from a token bucket refilled at `rate`
+    tokens per second. Waiters are served lowest priority value first, FIFO
+    within the same priority. A waiter whose cancel event is set leaves the
+    queue without ever submitting.
+    """
+
+    # How often blocked waiters re-check their cancel event
+    CANCEL_CHECK_INTERVAL = 0.1
+
+    def __init__(self, max_in_flight: int = 4, rate: float = 1.0, burst: int = 4):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_in_flight: Maximum Scenario jobs running at once
+            rate: Sustained submissions per second
+            burst: Token bucket capacity (submissions allowed back to back)
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = max(1, burst)
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+
+        self._submitted = 0
+        self._cancelled = 0
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _remove(self, waiter: _Waiter) -> None:
+        """Take a cancelled waiter out of the heap, wherever it sits"""
+        self._heap.remove(waiter)
+        heapq.heapify(self._heap)
+
+    def acquire(self, priority: int = 0, cancel_event: Optional[threading.Event] = None) -> None:
+        """
+        Block until this submission may be sent
+
+        Args:
+            priority: Lower values are served first
+            cancel_event: When set, the wait is abandoned
+
+        Raises:
+            SubmissionCancelled: If cancel_event was set while waiting
+        """
+        with self._cond:
+            waiter = _Waiter(priority, next(self._seq))
+            heapq.heappush(self._heap, waiter)
+
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    waiter.cancelled = True
+                    self._cancelled += 1
+                    self._remove(waiter)
+                    self._cond.notify_all()
+                    raise SubmissionCancelled("Submission cancelled while queued")
+
+                wait = self.CANCEL_CHECK_INTERVAL if cancel_event is not None else None
+                if self._heap[0] is waiter and self._in_flight < self.max_in_flight:
+                    self._refill()
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._in_flight += 1
+                        self._submitted += 1
+                        heapq.heappop(self._heap)
+                        self._cond.notify_all()
+                        return
+                    token_wait = (1 - self._tokens) / self.rate
+                    wait = token_wait if wait is None else min(wait, token_wait)
+
+                self._cond.wait(wait)
+
+    def release(self) -> None:
+        """Free the in-flight slot taken by acquire()"""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = 0, cancel_event: Optional[threading.Event] = None) -> Iterator[None]:
+        """
+        Hold an in-flight slot for the duration of a job
+
+        Args:
+            priority: Lower values are served first
+            cancel_event: When set while queued, raises SubmissionCancelled
+        """
+        self.acquire(priority, cancel_event)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        """Snapshot of scheduler state for monitoring"""
+        with self._cond:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'rate': self.rate,
+                'burst': self.burst,
+                'in_flight': self._in_flight,
+                'queued': sum(1 for w in self._heap if not w.cancelled),
+                'submitted': self._submitted,
+                'cancelled': self._cancelled,
+            }
+
+
+_default_scheduler: Optional[SubmissionScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> SubmissionScheduler:
+    """
+    Get the process-wide scheduler, configured from environment variables
+
+    SCENARIO_MAX_IN_FLIGHT, SCENARIO_SUBMIT_RATE (per second) and
+    SCENARIO_SUBMIT_BURST tune the limits. They apply per account, so
+    they are multiplied by the number of keys in SCENARIO_API_KEYS.
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            accounts = max(1, len(keys_from_env('SCENARIO_API_KEYS', 'SCENARIO_API_KEY')))
+            _default_scheduler = SubmissionScheduler(
+                max_in_flight=int(os.getenv('SCENARIO_MAX_IN_FLIGHT', '4')) * accounts,
+                rate=float(os.getenv('SCENARIO_SUBMIT_RATE', '1.0')) * accounts,
+                burst=int(os.getenv('SCENARIO_SUBMIT_BURST', '4')) * accounts
+            )
+            logger.info("Scenario scheduler: %s", _default_scheduler.stats())
+        return _default_scheduler
@@ -3,17 +3,23 @@ Web Scraper for Research Papers
 Extracts abstracts from academic sources
 """
 
+import re
+import time
 import logging
+import threading
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from bs4 import BeautifulSoup
-from typing import Optional, Dict
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
-)
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import NamedTuple, Optional, Dict
+from urllib.parse import urlparse
+from urllib3.util.request import ACCEPT_ENCODING
+from .shared_cache import SharedCache, cache_ttl, get_shared_cache
+from .hedging import get_hedge_budget, get_host_latency_stats
+from .retry_policy import get_retry_policy
+from .cancellation import RequestCancelled, get_cancellation_stats
+from .profiling import bind, stage
+from .memory import current_request_memory, get_memory_stats, max_page_bytes
+from .selector_stats import get_selector_stats
+from .transfer_stats import get_transfer_stats
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -24,6 +30,104 @@ class ScraperError(Exception):
     pass
 
 
+class PageTooLarge(ScraperError):
+    """Raised when a page exceeds MAX_PAGE_BYTES"""
+    pass
+
+
+class OverMemoryBudget(ScraperError):
+    """Raised when a page does not fit the current request's memory budget"""
+    pass
+
+
+class FetchedPage(NamedTuple):
+    """Raw page body and the charset its Content-Type declared (None if none)"""
+    content: bytes
+    encoding: Optional[str]
+
+
+_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """
+    Charset parameter of a Content-Type header
+
+    Unlike requests' `response.encoding`, there is no ISO-8859-1 default
+    for text/* types: without a charset the parser reads the page's own
+    <meta> declaration instead.
+    """
+    match = _CHARSET.search(content_type or '')
+    return match.group(1).lower() if match else None
+
+
+_PUBMED_ID = re.compile(r'^https?://pubmed\.ncbi\.nlm\.nih\.gov/(\d+)/?$')
+
+
+def alternate_url(url: str) -> str:
+    """
+    URL a hedged fetch should race against the original
+
+    arXiv pages are also served by export.arxiv.org and PubMed records by
+    the legacy ncbi.nlm.nih.gov/pubmed path, which avoids queueing behind
+    the same slow front end. Other hosts are simply asked again.
+
+    Args:
+        url: Original paper URL
+
+    Returns:
+        Mirror URL, or the original URL when no mirror is known
+    """
+    parsed = urlparse(url)
+    if parsed.netloc in ('arxiv.org', 'www.arxiv.org'):
+        return parsed._replace(scheme='https', netloc='export.arxiv.org').geturl()
+    match = _PUBMED_ID.match(url)
+    if match:
+        return f"https://www.ncbi.nlm.nih.gov/pubmed/{match.group(1)}"
+    return url
+
+
+# Abstract selectors ('kind:value') in default order
+ABSTRACT_SELECTORS = (
+    'class:abstract', 'class:Abstract', 'class:article-abstract', 'class:paper-abstract',
+    'class:abstract-content', 'class:abstractSection',
+    'id:abstract', 'id:Abstract', 'id:abst',
+    'data-testid:abstract',
+)
+
+# Meta descriptions are often truncated, so they are always tried last
+META_SELECTORS = ('meta:name=description', 'meta:property=og:description')
+
+
+def _select_abstract(soup, selector: str) -> Optional[str]:
+    """
+    Abstract text matched by one selector
+
+    Args:
+        soup: BeautifulSoup tree of the paper page
+        selector: One of ABSTRACT_SELECTORS or META_SELECTORS
+
+    Returns:
+        Text, or None if nothing matched or it is too short to be an abstract
+    """
+    kind, value = selector.split(':', 1)
+    if kind == 'meta':
+        attr, name = value.split('=', 1)
+        meta = soup.find('meta', {attr: name})
+        content = (meta.get('content') or '').strip() if meta else ''
+    else:
+        if kind == 'data-testid':
+            elem = soup.find(['div', 'section'], attrs={kind: value})
+        elif kind == 'id':
+            elem = soup.find(['div', 'section'], id=value)
+        else:  # class
+            elem = soup.find(['div', 'section', 'p', 'blockquote'], class_=value)
+        if not elem:
+            return None
+        content = elem.get_text(strip=True).replace('Abstract:', '').replace('Abstract', '').strip()
+    return content if len(content) > 100 else None
+
+
 class PaperScraper:
     """Scraper for extracting abstracts from academic paper URLs"""
     
@@ -32,19 +136,52 @@ class PaperScraper:
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
+        # Only encodings urllib3 can decode here: gzip and deflate, plus br
+        # and zstd when brotli/zstandard are installed
+        'Accept-Encoding': ACCEPT_ENCODING,
         'DNT': '1',
         'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1'
     }
     
-    @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=1, max=5),
-        retry=retry_if_exception_type(requests.RequestException),
-        reraise=True
-    )
-    def _fetch_page(self, url: str) -> str:
+    # Hosts most results come from (pre-connected by warm_up)
+    WARM_UP_URLS = ['https://arxiv.org/', 'https://pubmed.ncbi.nlm.nih.gov/']
+    
+    # Failed scrapes are remembered briefly so workers do not all retry them
+    NEGATIVE_CACHE_TTL = 600
+    
+    # Threads for primary and hedge fetches, shared by every scraper in the
+    # process. Hedges get their own pool so they never queue behind primaries;
+    # the hedge budget keeps them to a fraction of fetches.
+    FETCH_POOL_SIZES = {'fetch': 32, 'hedge': 8}
+    _fetch_executors: Dict[str, ThreadPoolExecutor] = {}
+    _fetch_executor_lock = threading.Lock()
+    
+    def __init__(self, cache: Optional[SharedCache] = None):
+        """
+        Initialize the scraper with a pooled HTTP session
+        
+        Args:
+            cache: Cross-process abstract cache (defaults to the one at
+                SHARED_CACHE_PATH; disabled when unset)
+        """
+        self.cache = cache or get_shared_cache()
+        self.cache_ttl = cache_ttl('SCRAPE_CACHE_TTL', 7 * 86400)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.retry_policy = get_retry_policy('scraper', max_attempts=2, base_delay=1.0, max_delay=5.0)
+    
+    def warm_up(self) -> None:
+        """Open pooled connections to the most common paper hosts"""
+        for url in self.WARM_UP_URLS:
+            try:
+                self.session.head(url, headers=self.HEADERS, timeout=5)
+            except requests.exceptions.RequestException as e:
+                logger.warning("Scraper warm-up failed for %s: %s", url, e)
+    
+    def _fetch_page(self, url: str) -> FetchedPage:
         """
         Fetch page content with retry logic
         
@@ -52,19 +189,125 @@ class PaperScraper:
             url: URL to fetch
             
         Returns:
-            HTML content as string
+            Raw page body and its declared charset
             
         Raises:
             ScraperError: If fetch fails
+            PageTooLarge: If the page exceeds MAX_PAGE_BYTES
         """
+        logger.info("Fetching: %s", url, extra={'category': 'fetch'})
         try:
-            logger.info(f"Fetching: {url}")
-            response = requests.get(url, headers=self.HEADERS, timeout=10)
-            response.raise_for_status()
-            return response.text
+            return self.retry_policy.call(lambda: self._fetch_hedged(url))
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch {url}: {e}")
-            raise ScraperError(f"Failed to fetch page: {e}")
+            logger.error("Failed to fetch %s: %s", url, e)
+            raise ScraperError(f"Failed to fetch page: {e}") from e
+    
+    def _fetch_hedged(self, url: str) -> FetchedPage:
+        """
+        One fetch attempt, hedged when it runs long
+        
+        A fetch still running the host's p90 latency after it started is
+        hedged: a second request goes to a mirror (or the same URL) and
+        whichever answers first wins. Hedges are limited by the process-wide
+        budget.
+        
+        Raises:
+            requests.exceptions.RequestException: If every request failed
+        """
+        budget = get_hedge_budget()
+        budget.on_primary()
+        
+        executor = self._executor()
+        fetch = bind(self._fetch_once, 'fetch')
+        started = threading.Event()
+        
+        def run_primary() -> FetchedPage:
+            started.set()
+            return fetch(url)
+        
+        primary = executor.submit(run_primary)
+        delay = get_host_latency_stats().hedge_delay(urlparse(url).netloc)
+        # Time spent queued behind other scrapes in the primary pool is not
+        # host latency, so the delay starts once the fetch is running
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        pending = {primary}
+        hedge = None
+        if not done and budget.try_hedge():
+            hedge_url = alternate_url(url)
+            logger.info("Hedging %s via %s after %.2fs", url, hedge_url, delay, extra={'category': 'fetch'})
+            hedge = self._executor('hedge').submit(fetch, hedge_url)
+            pending.add(hedge)
+        
+        # First success wins; an error only counts once both have failed
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    page = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if future is hedge:
+                    budget.on_hedge_won()
+                return page
+        raise error
+    
+    @classmethod
+    def _executor(cls, kind: str = 'fetch') -> ThreadPoolExecutor:
+        """Shared pool for primary ('fetch') or 'hedge' requests"""
+        with cls._fetch_executor_lock:
+            if kind not in cls._fetch_executors:
+                cls._fetch_executors[kind] = ThreadPoolExecutor(
+                    max_workers=cls.FETCH_POOL_SIZES[kind],
+                    thread_name_prefix=kind
+                )
+            return cls._fetch_executors[kind]
+    
+    def _fetch_once(self, url: str) -> FetchedPage:
+        """
+        Single GET that feeds the host's latency and transfer statistics
+        
+        Failed and timed-out requests are recorded too: they are the slow
+        tail the hedge delay is meant to cut.
+        
+        The body is read in chunks and abandoned once it passes
+        MAX_PAGE_BYTES, so an oversized page is never fully buffered. It is
+        returned undecoded: the parser decodes it once, from the declared
+        charset, instead of requests guessing one.
+        
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            PageTooLarge: If the page exceeds MAX_PAGE_BYTES
+        """
+        limit = max_page_bytes()
+        host = urlparse(url).netloc
+        started = time.monotonic()
+        try:
+            with self.session.get(url, headers=self.HEADERS, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                declared = int(response.headers.get('Content-Length') or 0)
+                if limit and declared > limit:
+                    raise PageTooLarge(f"Page is {declared} bytes (limit {limit})")
+                
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    if limit and size > limit:
+                        raise PageTooLarge(f"Page exceeds {limit} bytes")
+                    chunks.append(chunk)
+                wire_bytes = response.raw.tell()
+                content_encoding = response.headers.get('Content-Encoding') or 'identity'
+                charset = declared_charset(response.headers.get('Content-Type'))
+        except requests.exceptions.RequestException:
+            get_host_latency_stats().record(host, time.monotonic() - started)
+            raise
+        
+        get_host_latency_stats().record(host, time.monotonic() - started)
+        get_transfer_stats().record(host, wire_bytes, size, content_encoding)
+        return FetchedPage(b''.join(chunks), charset)
     
     def scrape_generic(self, url: str) -> Optional[str]:
         """
@@ -75,49 +318,92 @@ class PaperScraper:
             
         Returns:
             Abstract text or None if failed
+            
+        Raises:
+            OverMemoryBudget: If the page does not fit the request's memory
+                budget (a condition of this request, not of the page)
         """
+        # Imported on first use: bs4 adds ~50ms to backend start-up
+        from bs4 import BeautifulSoup
+        from bs4.dammit import EncodingDetector
+        
         try:
-            html = self._fetch_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
+            with stage('scrape.fetch'):
+                page = self._fetch_page(url)
             
-            # Try common abstract selectors
-            selectors = [
-                ('class', ['abstract', 'Abstract', 'article-abstract', 'paper-abstract', 'abstract-content', 'abstractSection']),
-                ('id', ['abstract', 'Abstract', 'abst']),
-                ('data-testid', ['abstract'])
-            ]
+            # Parse only if the page and its tree fit the request's budget
+            account = current_request_memory()
+            reserved = account.reserve(len(page.content)) if account is not None else 0
+            if account is not None and not reserved:
+                logger.warning("Skipping %s: %s bytes exceed the request memory budget", url, len(page.content))
+                raise OverMemoryBudget(f"{len(page.content)} bytes exceed the request memory budget")
             
-            for selector_type, values in selectors:
-                for value in values:
-                    if selector_type == 'data-testid':
-                        elem = soup.find(['div', 'section'], attrs={selector_type: value})
-                    elif selector_type == 'id':
-                        elem = soup.find(['div', 'section'], id=value)
-                    else:  # class
-                        elem = soup.find(['div', 'section', 'p', 'blockquote'], class_=value)
-                    
-                    if elem:
-                        content = elem.get_text(strip=True).replace('Abstract:', '').replace('Abstract', '').strip()
-                        if len(content) > 100:
-                            logger.info(f"✓ Scraped abstract ({len(content)} chars)")
-                            return content
+            try:
+                with stage('scrape.parse'):
+                    # Header charset, else the page's <meta>, else UTF-8;
+                    # bs4 only runs charset detection if that fails to decode
+                    encoding = (
+                        page.encoding
+                        or EncodingDetector.find_declared_encoding(page.content, is_html=True)
+                        or 'utf-8'
+                    )
+                    soup = BeautifulSoup(page.content, 'html.parser', from_encoding=encoding)
+                    del page
+                    content = self._extract_abstract(soup, urlparse(url).netloc)
+                    # Break the tree's reference cycles so it is freed now,
+                    # not at the next garbage collection
+                    soup.decompose()
+                    del soup
+            finally:
+                if reserved:
+                    account.release(reserved)
             
-            # Fallback: Try meta tags
-            for meta_attr in [('name', 'description'), ('property', 'og:description')]:
-                meta = soup.find('meta', {meta_attr[0]: meta_attr[1]})
-                if meta and meta.get('content'):
-                    content = meta['content'].strip()
-                    if len(content) > 100:
-                        logger.info(f"✓ Scraped meta description ({len(content)} chars)")
-                        return content
+            if content is None:
+                logger.warning("No abstract found")
+            return content
             
-            logger.warning("No abstract found")
+        except OverMemoryBudget:
+            raise
+        except PageTooLarge as e:
+            get_memory_stats().add_too_large()
+            logger.warning("Skipping %s: %s", url, e)
             return None
-            
         except Exception as e:
-            logger.error(f"Scraping failed: {e}")
+            logger.error("Scraping failed: %s", e)
             return None
     
+    def _extract_abstract(self, soup, host: Optional[str] = None) -> Optional[str]:
+        """
+        Find the abstract in a parsed page
+        
+        ABSTRACT_SELECTORS are tried in the order learned for the host (its
+        usual selector first), then META_SELECTORS. Meta descriptions are
+        never promoted: a host whose first pages only had one would
+        otherwise return it even where the full abstract is on the page.
+        
+        Args:
+            soup: BeautifulSoup tree of the paper page
+            host: Page host, to order selectors by and record the outcome for
+            
+        Returns:
+            Abstract text, or None if no selector matched
+        """
+        stats = get_selector_stats() if host else None
+        structural = stats.order(host, ABSTRACT_SELECTORS) if stats else list(ABSTRACT_SELECTORS)
+        selectors = structural + list(META_SELECTORS)
+        
+        for tried, selector in enumerate(selectors, 1):
+            content = _select_abstract(soup, selector)
+            if content:
+                logger.info("✓ Scraped abstract (%s chars, %s)", len(content), selector, extra={'category': 'fetch'})
+                if stats:
+                    stats.record(host, selector, tried)
+                return content
+        
+        if stats:
+            stats.record(host, None, len(selectors))
+        return None
+    
     def scrape_paper(self, paper: Dict) -> Dict:
         """
         Scrape abstract for a paper
@@ -135,41 +421,83 @@ class PaperScraper:
             paper['abstract'] = None
             return paper
         
-        logger.info(f"Scraping: {url}")
-        paper['abstract'] = self.scrape_generic(url)
+        logger.info("Scraping: %s", url, extra={'category': 'fetch'})
+        try:
+            if self.cache is None:
+                paper['abstract'] = self.scrape_generic(url)
+            else:
+                # Another worker scraping the same URL is waited on, not repeated
+                paper['abstract'] = self.cache.get_or_compute(
+                    'scrape:' + url,
+                    lambda: self.scrape_generic(url),
+                    ttl=self.cache_ttl,
+                    lease_seconds=30,
+                    negative_ttl=self.NEGATIVE_CACHE_TTL
+                )
+        except OverMemoryBudget:
+            # Raised through the cache so the skip is not remembered as a
+            # failure: the next request may well have room for the page
+            paper['abstract'] = None
         
         return paper
     
-    def scrape_papers(self, papers: list, max_workers: int = 5) -> list:
+    def scrape_papers(
+        self,
+        papers: list,
+        max_workers: int = 5,
+        cancel_event: Optional[threading.Event] = None
+    ) -> list:
         """
         Scrape abstracts for multiple papers concurrently
         
         Args:
             papers: List of paper dicts
             max_workers: Maximum number of concurrent scraping threads (default: 5)
+            cancel_event: When set, scrapes that have not started are
+                cancelled and running ones are no longer waited for
             
         Returns:
             List of papers with abstracts added
+            
+        Raises:
+            RequestCancelled: If cancel_event was set before all scrapes finished
         """
-        logger.info(f"Starting to scrape {len(papers)} papers (max_workers={max_workers})")
+        logger.info("Starting to scrape %s papers (max_workers=%s)", len(papers), max_workers)
         
         scraped_papers = [None] * len(papers)
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_index = {executor.submit(self.scrape_paper, paper): i for i, paper in enumerate(papers)}
-            
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    scraped_papers[index] = future.result()
-                    logger.info(f"[{index + 1}/{len(papers)}] Completed")
-                except Exception as e:
-                    logger.error(f"[{index + 1}/{len(papers)}] Error: {e}")
-                    scraped_papers[index] = papers[index]
-                    scraped_papers[index]['abstract'] = None
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        scrape = bind(self.scrape_paper, 'scrape')
+        future_to_index = {executor.submit(scrape, paper): i for i, paper in enumerate(papers)}
+        pending = set(future_to_index)
+        try:
+            while pending:
+                # Wake up periodically to notice a cancellation
+                done, pending = wait(pending, timeout=0.25 if cancel_event else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = future_to_index[future]
+                    try:
+                        scraped_papers[index] = future.result()
+                        logger.info("[%s/%s] Completed", index + 1, len(papers), extra={'category': 'fetch'})
+                    except Exception as e:
+                        logger.error("[%s/%s] Error: %s", index + 1, len(papers), e)
+                        scraped_papers[index] = papers[index]
+                        scraped_papers[index]['abstract'] = None
+                
+                if pending and cancel_event is not None and cancel_event.is_set():
+                    cancelled = sum(1 for future in pending if future.cancel())
+                    stats = get_cancellation_stats()
+                    stats.add('scrapes_cancelled', cancelled)
+                    stats.add('scrapes_abandoned', len(pending) - cancelled)
+                    logger.info("Scraping cancelled: %s not started, %s abandoned", cancelled, len(pending) - cancelled)
+                    raise RequestCancelled("Scraping cancelled")
+        finally:
+            # Running scrapes finish in the background (their results still
+            # reach the shared cache) instead of holding up the caller
+            executor.shutdown(wait=not pending)
         
         successful = sum(1 for p in scraped_papers if p.get('abstract'))
-        logger.info(f"Scraping complete: {successful}/{len(papers)} successful")
+        logger.info("Scraping complete: %s/%s successful", successful, len(papers))
         
         return scraped_papers
 
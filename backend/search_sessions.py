@@ -0,0 +1,128 @@
+"""
+Search Sessions
+Server-side state behind the "load more" cursors of /api/process
+"""
+
+import os
+import json
+import time
+import base64
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from .shared_cache import SharedCache, get_shared_cache
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(session_id: str, offset: int) -> str:
+    """Opaque cursor for the results after `offset` in a session"""
+    return base64.urlsafe_b64encode(f"{session_id}:{offset}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Split a cursor into session ID and offset
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        session_id, offset = raw.rsplit(':', 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not session_id or offset < 0:
+        raise ValueError("Invalid cursor")
+    return session_id, offset
+
+
+class SearchSessionStore:
+    """
+    Keeps each search's fetched results and Serper page position
+
+    Sessions live in the shared cache when one is configured, so a cursor
+    issued by one uvicorn worker can be continued by another; otherwise
+    they are kept in this process. Sessions expire `ttl` seconds after
+    their last use.
+    """
+
+    def __init__(self, cache: Optional[SharedCache] = None, ttl: float = 1800, max_sessions: int = 1000):
+        """
+        Initialize the session store
+
+        Args:
+            cache: Shared cache to store sessions in (None keeps them in memory)
+            ttl: Seconds a session is kept after its last use
+            max_sessions: In-memory sessions kept before the oldest is dropped
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def create(self, state: Dict, ttl: Optional[float] = None) -> str:
+        """
+        Store a new session and return its ID
+
+        Args:
+            state: Session state
+            ttl: Least seconds to keep it, however it is saved later (for
+                cursors in cached responses; the store's ttl if longer)
+        """
+        if ttl and ttl > self.ttl:
+            state = {**state, 'keep_until': time.time() + ttl}
+        session_id = secrets.token_urlsafe(12)
+        self.save(session_id, state)
+        return session_id
+
+    def save(self, session_id: str, state: Dict) -> None:
+        """Store (or refresh) a session's state"""
+        ttl = max(self.ttl, state.get('keep_until', 0) - time.time())
+        if self.cache is not None:
+            self.cache.set(f"session:{session_id}", state, ttl)
+            return
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + ttl, json.dumps(state))
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """
+        Look up a session
+
+        Returns:
+            A copy of the session state, or None if unknown or expired
+        """
+        if self.cache is not None:
+            return self.cache.get(f"session:{session_id}")
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._sessions[session_id]
+                return None
+            return json.loads(entry[1])
+
+
+_store: Optional[SearchSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_search_sessions() -> SearchSessionStore:
+    """Get the process-wide session store (SEARCH_SESSION_TTL, default 1800s)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SearchSessionStore(
+                cache=get_shared_cache(),
+                ttl=float(os.getenv('SEARCH_SESSION_TTL', '1800'))
+            )
+        return _store
@@ -0,0 +1,190 @@
+"""
+Abstract Selector Statistics
+Learns which abstract selector works on each host, so the scraper tries
+it first instead of walking the full selector list on every page
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """
+    Abstract selector outcomes per host
+
+    Each page records the selector that found the abstract (or none) and
+    how many selectors were tried. A host's scores decay with every page,
+    so when a site changes its layout the new selector overtakes the old
+    one within a few dozen pages. Stats are saved to a JSON file and
+    loaded on start, so the ordering survives restarts.
+    """
+
+    # Weight kept by older outcomes on each new page of a host
+    DECAY = 0.95
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        save_interval: float = 60.0,
+        max_hosts: int = 1000
+    ):
+        """
+        Initialize the statistics store
+
+        Args:
+            path: JSON file to persist stats to (None keeps them in memory)
+            save_interval: Least seconds between automatic saves
+            max_hosts: Hosts kept; the least visited are dropped beyond it
+        """
+        self.path = path
+        self.save_interval = save_interval
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        if path:
+            self.load()
+
+    @staticmethod
+    def _new_host() -> Dict:
+        return {'pages': 0, 'empty': 0, 'tried': 0, 'hits': {}, 'scores': {}}
+
+    def order(self, host: str, selectors: Sequence[str]) -> List[str]:
+        """
+        Selectors to try on a page of a host
+
+        Args:
+            host: Page host (URL netloc)
+            selectors: All selectors, in default order
+
+        Returns:
+            The host's best-scoring selector among `selectors` first, then
+            the rest in default order
+        """
+        with self._lock:
+            scores = self._hosts.get(host, {}).get('scores', {})
+            candidates = [selector for selector in selectors if scores.get(selector)]
+            best = max(candidates, key=scores.get) if candidates else None
+        if best is None:
+            return list(selectors)
+        return [best] + [selector for selector in selectors if selector != best]
+
+    def record(self, host: str, selector: Optional[str], tried: int) -> None:
+        """
+        Record the outcome of extracting an abstract from a page
+
+        Args:
+            host: Page host (URL netloc)
+            selector: Selector that found the abstract (None if none did)
+            tried: Selectors evaluated on the page
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._hosts[host] = self._new_host()
+            entry['pages'] += 1
+            entry['tried'] += tried
+            scores = entry['scores']
+            for name in list(scores):
+                scores[name] *= self.DECAY
+            if selector is None:
+                entry['empty'] += 1
+            else:
+                entry['hits'][selector] = entry['hits'].get(selector, 0) + 1
+                scores[selector] = scores.get(selector, 0.0) + 1.0
+            if len(self._hosts) > self.max_hosts:
+                least = min(self._hosts, key=lambda name: self._hosts[name]['pages'])
+                del self._hosts[least]
+            self._dirty = True
+            due = self.path and time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def load(self) -> None:
+        """Load saved stats (a missing or unreadable file starts empty)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                hosts = json.load(f).get('hosts', {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("Ignoring selector stats in %s: %s", self.path, e)
+            return
+        with self._lock:
+            for host, saved in hosts.items():
+                entry = self._new_host()
+                entry.update({key: saved[key] for key in entry if key in saved})
+                self._hosts[host] = entry
+
+    def save(self) -> None:
+        """Write the stats to the file atomically, if anything changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({'hosts': self._hosts}, separators=(',', ':'))
+            self._dirty = False
+            self._last_save = time.monotonic()
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Could not save selector stats to %s: %s", self.path, e)
+
+    def export(self) -> Dict:
+        """Best selector, success/empty rates and work per page, per host"""
+        with self._lock:
+            hosts = {host: json.loads(json.dumps(entry)) for host, entry in self._hosts.items()}
+        result = {}
+        for host, entry in hosts.items():
+            pages = entry['pages'] or 1
+            scores = entry['scores']
+            result[host] = {
+                'pages': entry['pages'],
+                'best': max(scores, key=scores.get) if scores else None,
+                'success_rate': round((entry['pages'] - entry['empty']) / pages, 3),
+                'empty_rate': round(entry['empty'] / pages, 3),
+                'selectors_per_page': round(entry['tried'] / pages, 2),
+                'hits': entry['hits'],
+            }
+        return result
+
+
+_selector_stats: Optional[SelectorStats] = None
+_selector_stats_lock = threading.Lock()
+
+
+def get_selector_stats() -> SelectorStats:
+    """
+    Get the process-wide abstract selector stats
+
+    Settings: SELECTOR_STATS_PATH (default data/selector_stats.json; empty
+    keeps stats in memory only), SELECTOR_STATS_SAVE_SECONDS (default 60).
+    """
+    global _selector_stats
+    with _selector_stats_lock:
+        if _selector_stats is None:
+            _selector_stats = SelectorStats(
+                path=os.getenv('SELECTOR_STATS_PATH', 'data/selector_stats.json').strip() or None,
+                save_interval=float(os.getenv('SELECTOR_STATS_SAVE_SECONDS', '60'))
+            )
+        return _selector_stats
@@ -1,23 +1,16 @@
 """
 Serper API Client for Google Scholar Search
-Implements error handling and retry logic with exponential backoff
+Implements error handling and retries under the shared retry policy
 """
 
-import os
 import re
+import json
 import logging
 from typing import Dict, List, Optional
 import requests
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
-)
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from .retry_policy import get_retry_policy
+from .key_pool import get_key_pool, keys_from_env
+from .shared_cache import SharedCache, cache_ttl, get_shared_cache
 
 # Get logger (don't configure - let app.py handle it)
 logger = logging.getLogger(__name__)
@@ -33,6 +26,9 @@ class SerperClient:
     
     BASE_URL = "https://google.serper.dev/scholar"
     
+    # Only papers published in or after this year are returned
+    MIN_YEAR = 2025
+    
     # Translation table for cleaning snippets (created once)
     _SNIPPET_TRANSLATION = str.maketrans({
         '…': ' ',
@@ -45,28 +41,41 @@ class SerperClient:
         '\u2014': '-',  # Em dash
     })
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[SharedCache] = None):
         """
         Initialize Serper API client
         
         Args:
-            api_key: Serper API key (defaults to SERPER_API_KEY env var)
+            api_key: Serper API key (defaults to the SERPER_API_KEYS pool,
+                or SERPER_API_KEY when no pool is configured)
+            cache: Cross-process response cache (defaults to the one at
+                SHARED_CACHE_PATH; disabled when unset)
         """
-        self.api_key = api_key or os.getenv('SERPER_API_KEY')
-        if not self.api_key:
+        keys = [api_key] if api_key else keys_from_env('SERPER_API_KEYS', 'SERPER_API_KEY')
+        self.cache = cache or get_shared_cache()
+        self.cache_ttl = cache_ttl('SERPER_CACHE_TTL', 86400)
+        if not keys:
             raise ValueError("SERPER_API_KEY not found in environment variables")
         
+        # Requests are spread over the pool; api_key/headers show the first key
+        self.keys = get_key_pool('serper', keys)
+        self.api_key = keys[0]
         self.headers = {
             'X-API-KEY': self.api_key,
             'Content-Type': 'application/json'
         }
+        
+        # Reuse TCP/TLS connections across searches
+        self.session = requests.Session()
+        self.retry_policy = get_retry_policy('serper', max_attempts=3, base_delay=2.0, max_delay=10.0)
+    
+    def warm_up(self) -> None:
+        """Open a pooled connection to the API host ahead of the first search"""
+        try:
+            self.session.head(self.BASE_URL, timeout=5)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Serper warm-up failed: %s", e)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((requests.RequestException, SerperAPIError)),
-        reraise=True
-    )
     def _make_request(self, payload: Dict) -> Dict:
         """
         Make API request with retry logic
@@ -80,31 +89,48 @@ class SerperClient:
         Raises:
             SerperAPIError: If API request fails after retries
         """
+        return self.retry_policy.call(lambda: self._request_once(payload))
+    
+    def _request_once(self, payload: Dict) -> Dict:
+        """Single API request attempt"""
         try:
-            logger.info(f"Making Serper API request: {payload.get('q', 'N/A')}")
-            response = requests.post(
+            logger.info("Making Serper API request: %s", payload.get('q', 'N/A'))
+            response = self.keys.call(lambda key: self.session.post(
                 self.BASE_URL,
                 json=payload,
-                headers=self.headers,
+                headers={**self.headers, 'X-API-KEY': key.secret},
                 timeout=30
-            )
+            ))
             response.raise_for_status()
             return response.json()
             
         except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            raise SerperAPIError(f"API request failed: {e}")
+            logger.error("HTTP error: %s", e)
+            raise SerperAPIError(f"API request failed: {e}") from e
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
-            raise SerperAPIError(f"Network error: {e}")
+            logger.error("Request error: %s", e)
+            raise SerperAPIError(f"Network error: {e}") from e
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise SerperAPIError(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
+            raise SerperAPIError(f"Unexpected error: {e}") from e
+    
+    def _cached_request(self, payload: Dict) -> Dict:
+        """Make an API request through the shared cache when one is configured"""
+        if self.cache is None:
+            return self._make_request(payload)
+        return self.cache.get_or_compute(
+            'serper:' + json.dumps(payload, sort_keys=True),
+            lambda: self._make_request(payload),
+            ttl=self.cache_ttl,
+            lease_seconds=60
+        )
     
     def search_scholar(
         self,
         query: str,
-        num_results: int = 10
+        num_results: int = 10,
+        keep_extra: bool = False,
+        page: int = 1
     ) -> List[Dict]:
         """
         Search Google Scholar for research papers
@@ -112,6 +138,10 @@ class SerperClient:
         Args:
             query: Search query (e.g., "Artificial Intelligence")
             num_results: Number of results to return (default: 10)
+            keep_extra: Return every parsed result instead of truncating to
+                num_results (for callers that filter results themselves)
+            page: Result page (pages hold 2 * num_results results, so use the
+                same num_results for every page of one search)
             
         Returns:
             List of paper dictionaries with keys:
@@ -125,7 +155,7 @@ class SerperClient:
         """
         # Use Google Scholar's 'as_ylo' parameter to filter by year
         # as_ylo = "as year low" - minimum year for results
-        min_year = 2025
+        min_year = self.MIN_YEAR
         
         # Add site restrictions to only get papers from scrapable sources
         site_filter = "(site:arxiv.org OR site:pubmed.ncbi.nlm.nih.gov OR site:researchgate.net)"
@@ -134,31 +164,32 @@ class SerperClient:
         payload = {
             'q': enhanced_query,
             'num': num_results * 2,  # Request extra to ensure enough results
-            'page': 1,
+            'page': page,
             'gl': 'us',  # Country - US for English results
             'hl': 'en',  # Language - English
             'as_ylo': min_year  # Filter for papers from 2025 onwards
         }
         
-        logger.info(f"Searching for papers from {min_year} onwards")
+        logger.info("Searching for papers from %s onwards", min_year)
         
         try:
-            # Make API request
-            response = self._make_request(payload)
+            # Make API request (or reuse another worker's identical search)
+            response = self._cached_request(payload)
             
             # Parse response
             papers = self._parse_response(response)
             
-            logger.info(f"Retrieved {len(papers)} papers from API")
+            logger.info("Retrieved %s papers from API", len(papers))
             
             # Limit to requested number of results
-            papers = papers[:num_results]
+            if not keep_extra:
+                papers = papers[:num_results]
             
-            logger.info(f"Successfully retrieved {len(papers)} papers")
+            logger.info("Successfully retrieved %s papers", len(papers))
             return papers
             
         except SerperAPIError as e:
-            logger.error(f"Search failed: {e}")
+            logger.error("Search failed: %s", e)
             raise
     
     def _parse_response(self, response: Dict) -> List[Dict]:
@@ -220,6 +251,9 @@ class SerperClient:
     
 # Example usage
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     try:
         client = SerperClient()
         papers = client.search_scholar(
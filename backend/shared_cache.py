@@ -0,0 +1,303 @@
+"""
+Cross-Process Cache
+SQLite-WAL key/value store on local disk that lets uvicorn workers (and
+queue workers) on the same host reuse each other's Serper searches,
+scraped abstracts and Scenario renders
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Get logger (don't configure - let app.py handle it)
+logger = logging.getLogger(__name__)
+
+
+class SharedCacheError(Exception):
+    """Custom exception for shared cache errors"""
+    pass
+
+
+class SharedCache:
+    """
+    Key/value cache with atomic get-or-compute across processes
+
+    The first caller for a missing key takes a lease on it and computes
+    the value; concurrent callers in any process wait for that value
+    instead of repeating the work. If the lease holder dies or fails, the
+    lease expires (or is released) and one of the waiters takes over.
+    Values must be JSON-serializable.
+    """
+
+    # Remove expired rows every this many writes
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        """
+        Initialize the shared cache
+
+        Args:
+            path: Path to the SQLite database file (created if missing)
+            poll_interval: Initial wait between checks while another process
+                computes a value (doubles up to 1 second)
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL,
+                lease_owner TEXT,
+                lease_until REAL
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Look up a fresh value
+
+        Args:
+            key: Cache key
+            default: Returned when the key is missing, expired or pending
+
+        Returns:
+            The cached value or default
+        """
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] is None or row[1] < time.time():
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value and release any lease on the key
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Seconds the value stays fresh
+        """
+        self._connect().execute(
+            """
+            INSERT INTO cache (key, value, expires_at, lease_owner, lease_until)
+            VALUES (?, ?, ?, NULL, NULL)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                expires_at = excluded.expires_at,
+                lease_owner = NULL,
+                lease_until = NULL
+            """,
+            (key, json.dumps(value), time.time() + ttl)
+        )
+        with self._stats_lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def delete(self, key: str) -> None:
+        """Remove a key"""
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge(self) -> int:
+        """
+        Delete expired values that nobody is computing
+
+        Returns:
+            Number of rows removed
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "DELETE FROM cache WHERE expires_at < ? AND (lease_until IS NULL OR lease_until < ?)",
+            (now, now)
+        )
+        return cursor.rowcount
+
+    def _lookup_or_lease(self, key: str, lease_seconds: float, owner: str) -> Tuple[str, Any]:
+        """
+        Atomically read a fresh value or take the lease to compute it
+
+        Returns:
+            ('hit', value), ('leased', None) if `owner` now holds the lease,
+            or ('pending', None) if another caller holds a live lease
+        """
+        conn = self._connect()
+        now = time.time()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front so only one
+            # caller can see the key missing and lease it
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value, expires_at, lease_owner, lease_until FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[0] is not None and row[1] >= now:
+                conn.execute("COMMIT")
+                return 'hit', json.loads(row[0])
+            if row is not None and row[2] and row[2] != owner and row[3] >= now:
+                conn.execute("COMMIT")
+                return 'pending', None
+            conn.execute(
+                """
+                INSERT INTO cache (key, value, expires_at, lease_owner, lease_until)
+                VALUES (?, NULL, 0, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    lease_owner = excluded.lease_owner,
+                    lease_until = excluded.lease_until
+                """,
+                (key, owner, now + lease_seconds)
+            )
+            conn.execute("COMMIT")
+            return 'leased', None
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def _release(self, key: str, owner: str) -> None:
+        """Give up a lease without storing a value"""
+        self._connect().execute(
+            "UPDATE cache SET lease_owner = NULL, lease_until = NULL WHERE key = ? AND lease_owner = ?",
+            (key, owner)
+        )
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: float,
+        lease_seconds: float = 60,
+        negative_ttl: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Any:
+        """
+        Return the cached value, computing it at most once across processes
+
+        Args:
+            key: Cache key
+            compute: Produces the value on a miss (its exceptions propagate
+                and release the lease)
+            ttl: Seconds a computed value stays fresh
+            lease_seconds: How long others wait on this computation before
+                assuming the process died; should exceed compute's runtime
+            negative_ttl: Seconds to cache a None result (default: not cached)
+            cancel_event: Stops waiting on another process's computation
+
+        Returns:
+            The cached or newly computed value
+
+        Raises:
+            SharedCacheError: If cancel_event was set while waiting
+        """
+        # Threads lease under their own name so they also wait on each other
+        owner = f"{self.owner}-{threading.get_ident()}"
+        interval = self.poll_interval
+        waited = False
+        while True:
+            state, cached = self._lookup_or_lease(key, lease_seconds, owner)
+
+            if state == 'pending':
+                if not waited:
+                    self._count('waits')
+                    waited = True
+                if cancel_event is not None and cancel_event.wait(interval):
+                    raise SharedCacheError(f"Cancelled while waiting for {key}")
+                if cancel_event is None:
+                    time.sleep(interval)
+                interval = min(interval * 2, 1.0)
+                continue
+
+            if state == 'hit':
+                self._count('hits')
+                return cached
+
+            self._count('misses')
+            try:
+                value = compute()
+            except BaseException:
+                self._release(key, owner)
+                raise
+
+            if value is not None:
+                self.set(key, value, ttl)
+            elif negative_ttl:
+                self.set(key, None, negative_ttl)
+            else:
+                self._release(key, owner)
+            return value
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        with self._stats_lock:
+            return {
+                'path': self.path,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+            }
+
+
+_caches: Dict[str, SharedCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    Get the process-wide shared cache from SHARED_CACHE_PATH
+
+    Returns:
+        SharedCache, or None when the path is unset (caching disabled) or
+        the database cannot be opened
+    """
+    path = os.getenv('SHARED_CACHE_PATH', '').strip()
+    if not path:
+        return None
+    with _caches_lock:
+        if path not in _caches:
+            try:
+                _caches[path] = SharedCache(path)
+            except sqlite3.Error as e:
+                logger.error("Shared cache disabled: %s", e)
+                return None
+        return _caches[path]
+
+
+def cache_ttl(name: str, default: float) -> float:
+    """TTL in seconds from an environment variable, e.g. SERPER_CACHE_TTL"""
+    return float(os.getenv(name, str(default)))
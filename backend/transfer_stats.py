@@ -0,0 +1,67 @@
+"""
+Scrape Transfer Statistics
+Bytes received on the wire versus decoded page size per host, to see
+what content-encoding negotiation saves on scrapes
+"""
+
+import threading
+from typing import Dict
+
+
+class HostTransferStats:
+    """
+    Per-host page counts and sizes of completed fetches
+
+    Wire bytes are the body as received (compressed when the host applied
+    a content encoding); decoded bytes are the body after decompression,
+    as handed to the parser.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict] = {}
+
+    def record(self, host: str, wire_bytes: int, decoded_bytes: int, encoding: str) -> None:
+        """
+        Record a completed fetch
+
+        Args:
+            host: Page host (URL netloc)
+            wire_bytes: Body bytes received
+            decoded_bytes: Body bytes after content decoding
+            encoding: Content-Encoding of the response ('identity' if none)
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._hosts[host] = {'pages': 0, 'wire_bytes': 0, 'decoded_bytes': 0, 'encodings': {}}
+            entry['pages'] += 1
+            entry['wire_bytes'] += wire_bytes
+            entry['decoded_bytes'] += decoded_bytes
+            entry['encodings'][encoding] = entry['encodings'].get(encoding, 0) + 1
+
+    def export(self) -> Dict:
+        """Totals and per-host sizes, with wire/decoded ratios"""
+        with self._lock:
+            hosts = {
+                host: {**entry, 'encodings': dict(entry['encodings'])}
+                for host, entry in self._hosts.items()
+            }
+        for entry in hosts.values():
+            entry['wire_ratio'] = round(entry['wire_bytes'] / entry['decoded_bytes'], 3) if entry['decoded_bytes'] else None
+        wire = sum(entry['wire_bytes'] for entry in hosts.values())
+        decoded = sum(entry['decoded_bytes'] for entry in hosts.values())
+        return {
+            'wire_bytes': wire,
+            'decoded_bytes': decoded,
+            'wire_ratio': round(wire / decoded, 3) if decoded else None,
+            'hosts': hosts,
+        }
+
+
+_transfer_stats = HostTransferStats()
+
+
+def get_transfer_stats() -> HostTransferStats:
+    """Get the process-wide scrape transfer statistics"""
+    return _transfer_stats
@@ -0,0 +1,189 @@
+"""
+Image Generation Worker
+Claims queued generation tasks and runs the Scenario create-and-poll cycle
+
+Run one or more workers (on this or other nodes sharing the queue) with:
+    python -m backend.worker
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from .job_queue import JobQueue, JobQueueError, get_job_queue, default_worker_id
+from .scenario_client import ScenarioClient
+from .cancellation import RequestCancelled
+from .log_setup import configure_logging, shutdown_logging
+
+# Get logger (don't configure - let the entry point handle it)
+logger = logging.getLogger(__name__)
+
+
+# Full renders queue behind every preview of the same priority
+FULL_RENDER_PRIORITY_OFFSET = 100
+
+
+def run_task(
+    scenario: ScenarioClient,
+    payload: Dict,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict:
+    """
+    Execute a single generation task
+
+    With payload['preview'] set, a low-resolution, low-step preview job and
+    the full-quality job are both submitted. The preview result is reported
+    through on_progress as soon as it completes, while the full job keeps
+    running.
+
+    Args:
+        scenario: Scenario client used for generation
+        payload: Task payload with 'prompt' and optional generation kwargs
+        on_progress: Called with partial results (e.g. {'preview_urls': [...]})
+        cancel_event: When set, renders still queued are dropped and
+            submitted ones stop being polled
+
+    Returns:
+        Result dict with 'image_urls' (and 'preview_urls' in preview mode)
+
+    Raises:
+        RequestCancelled: If cancel_event was set before the full render finished
+    """
+    priority = payload.get('priority', 0)
+    full_kwargs = dict(
+        prompt=payload['prompt'],
+        width=payload.get('width', 1024),
+        height=payload.get('height', 1024),
+        samples=payload.get('samples', 1),
+        steps=payload.get('steps', 28)
+    )
+
+    if not payload.get('preview'):
+        return {'image_urls': scenario.generate_image(priority=priority, cancel_event=cancel_event, **full_kwargs)}
+
+    preview = payload['preview']
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        full_future = executor.submit(
+            scenario.generate_image,
+            priority=priority + FULL_RENDER_PRIORITY_OFFSET,
+            cancel_event=cancel_event,
+            **full_kwargs
+        )
+        preview_urls = []
+        try:
+            preview_urls = scenario.generate_image(
+                prompt=payload['prompt'],
+                width=preview.get('width', 512),
+                height=preview.get('height', 512),
+                samples=payload.get('samples', 1),
+                steps=preview.get('steps', 8),
+                priority=priority,
+                cancel_event=cancel_event
+            )
+            logger.info("Preview ready with %s image(s)", len(preview_urls))
+            if on_progress:
+                on_progress({'preview_urls': preview_urls})
+        except Exception as e:
+            logger.warning("Preview generation failed, waiting for full render: %s", e)
+
+        return {'image_urls': full_future.result(), 'preview_urls': preview_urls}
+
+
+def process_one(
+    queue: JobQueue,
+    scenario: ScenarioClient,
+    worker_id: str,
+    cancel_events: Optional[Dict[str, threading.Event]] = None
+) -> bool:
+    """
+    Claim and execute at most one task
+
+    Args:
+        queue: Job queue to claim from
+        scenario: Scenario client used for generation
+        worker_id: Identifier recorded on the claimed task
+        cancel_events: Registry the claimed job's cancel event is kept in
+            (by job ID) while it runs, so the request waiting on it can
+            stop its renders
+
+    Returns:
+        True if a task was processed, False if the queue was empty
+    """
+    job = queue.claim(worker_id)
+    if job is None:
+        return False
+
+    job_id = job['id']
+    cancel_event = None
+    if cancel_events is not None:
+        cancel_event = cancel_events[job_id] = threading.Event()
+    logger.info("Worker %s claimed job %s", worker_id, job_id)
+    try:
+        result = run_task(
+            scenario, job['payload'], lambda partial: queue.update(job_id, worker_id, partial), cancel_event
+        )
+        if queue.complete(job_id, worker_id, result):
+            logger.info("Job %s completed with %s image(s)", job_id, len(result['image_urls']))
+        else:
+            logger.warning("Job %s finished after its lease passed to another worker; result dropped", job_id)
+    except RequestCancelled as e:
+        logger.info("Job %s cancelled: %s", job_id, e)
+        queue.fail(job_id, worker_id, 'Cancelled: client disconnected')
+    except Exception as e:
+        logger.error("Job %s failed: %s", job_id, e)
+        queue.fail(job_id, worker_id, str(e))
+    finally:
+        if cancel_events is not None:
+            cancel_events.pop(job_id, None)
+    return True
+
+
+def run_worker(
+    queue: Optional[JobQueue] = None,
+    scenario: Optional[ScenarioClient] = None,
+    idle_sleep: float = 1.0,
+    max_tasks: Optional[int] = None
+) -> int:
+    """
+    Process tasks until interrupted
+
+    Args:
+        queue: Job queue (defaults to the configured IMAGE_QUEUE_BACKEND)
+        scenario: Scenario client (defaults to one built from env vars)
+        idle_sleep: Seconds to wait when the queue is empty
+        max_tasks: Stop after this many tasks (None = run forever)
+
+    Returns:
+        Number of tasks processed
+
+    Raises:
+        JobQueueError: If no queue backend is configured
+    """
+    queue = queue or get_job_queue()
+    if queue is None:
+        raise JobQueueError("IMAGE_QUEUE_BACKEND is not set - nothing to consume")
+    scenario = scenario or ScenarioClient()
+    worker_id = default_worker_id()
+
+    logger.info("Worker %s started", worker_id)
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        if process_one(queue, scenario, worker_id):
+            processed += 1
+        else:
+            time.sleep(idle_sleep)
+    return processed
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    configure_logging()
+    try:
+        run_worker()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+    finally:
+        shutdown_logging()
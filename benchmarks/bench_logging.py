@@ -0,0 +1,99 @@
+"""
+Benchmark: logging overhead on the hot path
+
+Replays the log lines of one /api/process call with 20 papers plus the
+Scenario polling for their images, and measures the time spent in the
+calling thread:
+
+  before: synchronous stream handler, eager f-strings, banners at INFO
+  after:  backend.log_setup pipeline (queue + background thread, sampling,
+          lazy %-formatting, banners at DEBUG)
+
+Usage:
+    python -m benchmarks.bench_logging [iterations]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+from backend.log_setup import TEXT_FORMAT, DATE_FORMAT, configure_logging, shutdown_logging
+
+PAPERS = 20
+POLLS_PER_IMAGE = 15
+URLS = [f"https://arxiv.org/abs/2501.{10000 + i}" for i in range(PAPERS)]
+
+logger = logging.getLogger('backend.bench')
+
+
+def hot_path_before():
+    for banner in ("SERPER API - SEARCHING PAPERS", "WEB SCRAPER - EXTRACTING ABSTRACTS"):
+        logger.info("=" * 60)
+        logger.info(banner)
+        logger.info("=" * 60)
+    for index, url in enumerate(URLS):
+        logger.info(f"Scraping: {url}")
+        logger.info(f"Fetching: {url}")
+        logger.info(f"✓ Scraped abstract ({1500 + index} chars)")
+        logger.info(f"[{index + 1}/{PAPERS}] Completed")
+        for attempt in range(POLLS_PER_IMAGE):
+            logger.info(f"Making GET request to https://api.cloud.scenario.com/v1/jobs/job-{index}")
+            logger.info(f"Job status: 'in-progress' (attempt {attempt + 1}/60)")
+
+
+def hot_path_after():
+    for banner in ("SERPER API - SEARCHING PAPERS", "WEB SCRAPER - EXTRACTING ABSTRACTS"):
+        logger.debug(banner)
+    for index, url in enumerate(URLS):
+        logger.info("Scraping: %s", url, extra={'category': 'fetch'})
+        logger.info("Fetching: %s", url, extra={'category': 'fetch'})
+        logger.info("✓ Scraped abstract (%s chars)", 1500 + index, extra={'category': 'fetch'})
+        logger.info("[%s/%s] Completed", index + 1, PAPERS, extra={'category': 'fetch'})
+        for attempt in range(POLLS_PER_IMAGE):
+            logger.info("Making %s request to %s", 'GET', f"https://api.cloud.scenario.com/v1/jobs/job-{index}", extra={'category': 'http'})
+            logger.info("Job status: '%s' (attempt %s/%s)", 'in-progress', attempt + 1, 60, extra={'category': 'poll'})
+
+
+def measure(func, iterations: int) -> float:
+    """Mean milliseconds per call in the calling thread"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    root = logging.getLogger()
+    root.handlers[:] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, 'before.log')
+        with open(before_path, 'w') as stream:
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+            root.addHandler(handler)
+            root.setLevel(logging.INFO)
+            before_ms = measure(hot_path_before, iterations)
+            root.removeHandler(handler)
+
+        after_path = os.path.join(tmp, 'after.log')
+        with open(after_path, 'w') as stream:
+            configure_logging(stream=stream)
+            after_ms = measure(hot_path_after, iterations)
+            drain_started = time.perf_counter()
+            shutdown_logging()
+            drain_ms = (time.perf_counter() - drain_started) * 1000
+
+        before_lines = sum(1 for _ in open(before_path)) / iterations
+        after_lines = sum(1 for _ in open(after_path)) / iterations
+
+    print(f"Per /api/process replay ({iterations} iterations):")
+    print(f"  before: {before_ms:7.3f} ms in caller, {before_lines:6.1f} lines written")
+    print(f"  after:  {after_ms:7.3f} ms in caller, {after_lines:6.1f} lines written "
+          f"(background drain {drain_ms:.0f} ms total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: /api/process response serialization and compression
+
+Compares the previous path (build ProcessedPaper models, validate the
+ProcessPapersResponse, encode with the stdlib) with the fast path (plain
+dicts encoded by backend.responses.dumps), and reports payload sizes for
+each available content encoding.
+
+Usage:
+    python -m benchmarks.bench_process_response [num_papers] [abstract_chars]
+"""
+
+import sys
+import time
+import random
+import string
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.app import processed_paper_dict
+from backend.compression import _Compressor, available_encodings
+from backend.models import ProcessedPaper, ProcessPapersResponse
+from backend.responses import FastJSONResponse, orjson
+
+def make_papers(count: int, abstract_chars: int):
+    """Synthetic pipeline output shaped like scraped Serper results"""
+    rng = random.Random(0)
+    # Zipf-like vocabulary so compression ratios resemble real abstracts
+    vocabulary = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 11)))
+        for _ in range(3000)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    papers = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights, k=abstract_chars // 5)
+        abstract = ' '.join(words)[:abstract_chars]
+        papers.append({
+            'title': ' '.join(rng.choices(vocabulary, weights, k=10)).capitalize(),
+            'link': f"https://arxiv.org/abs/2501.{10000 + i}",
+            'snippet': abstract[:200],
+            'year': 2025,
+            'abstract': abstract,
+        })
+    return papers
+
+
+def model_path(query, papers) -> bytes:
+    """Previous path: rebuild models, validate the response model, stdlib JSON"""
+    processed = [
+        ProcessedPaper(
+            title=paper['title'],
+            link=paper['link'],
+            snippet=paper.get('snippet') or '',
+            year=paper.get('year'),
+            abstract=paper.get('abstract'),
+            image_urls=[]
+        )
+        for paper in papers
+    ]
+    response = ProcessPapersResponse(query=query, papers=processed)
+    validated = ProcessPapersResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(query, papers) -> bytes:
+    """Fast path: plain dicts rendered by FastJSONResponse"""
+    return FastJSONResponse({'query': query, 'papers': [processed_paper_dict(p) for p in papers]}).body
+
+
+def timed(func, *args, repeat: int = 500) -> float:
+    """Mean milliseconds per call"""
+    func(*args)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    num_papers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    abstract_chars = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    papers = make_papers(num_papers, abstract_chars)
+    query = "machine learning"
+
+    print(f"{num_papers} papers, {abstract_chars}-char abstracts, orjson: {orjson is not None}")
+    print(f"  model path (validate + stdlib json): {timed(model_path, query, papers):7.3f} ms")
+    print(f"  fast path  (dicts + {'orjson' if orjson else 'json'}):        {timed(fast_path, query, papers):7.3f} ms")
+
+    body = fast_path(query, papers)
+    print(f"\n  identity: {len(body):8d} bytes")
+    for encoding in available_encodings():
+        compressor = _Compressor(encoding)
+        compressed = compressor.compress(body, flush=False) + compressor.finish()
+        started = time.perf_counter()
+        for _ in range(50):
+            compressor = _Compressor(encoding)
+            compressor.compress(body, flush=False) + compressor.finish()
+        elapsed = (time.perf_counter() - started) * 1000 / 50
+        print(f"  {encoding:8s}: {len(compressed):8d} bytes ({len(compressed) / len(body):5.1%}, {elapsed:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
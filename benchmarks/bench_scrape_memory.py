@@ -0,0 +1,129 @@
+"""
+Benchmark: peak RSS of concurrent scraping requests
+
+Serves synthetic paper pages from a local HTTP server (mostly ~200 KB,
+every tenth one 4 MB) and runs several /api/process-sized scrapes at once.
+Each mode runs in a fresh process so its peak RSS is measured alone:
+
+  unbounded: no page size cap, no per-request budget (the old behaviour,
+             minus soup.decompose)
+  bounded:   MAX_PAGE_BYTES and REQUEST_MEMORY_LIMIT_MB as configured below
+
+Usage:
+    python -m benchmarks.bench_scrape_memory [requests] [papers]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SMALL_PAGE = 200 * 1024
+LARGE_PAGE = 4 * 1024 * 1024
+
+MODES = {
+    'unbounded': {'MAX_PAGE_BYTES': '0', 'REQUEST_MEMORY_LIMIT_MB': '0'},
+    'bounded': {'MAX_PAGE_BYTES': str(2 * 1024 * 1024), 'REQUEST_MEMORY_LIMIT_MB': '16'},
+}
+
+
+def make_page(size: int, seed: int) -> bytes:
+    """HTML page of about `size` bytes with an abstract and plenty of markup"""
+    rng = random.Random(seed)
+    words = ['model', 'protein', 'graph', 'neural', 'dataset', 'signal', 'quantum', 'layer']
+    abstract = ' '.join(rng.choice(words) for _ in range(60))
+    rows = []
+    length = 0
+    while length < size:
+        row = f"<tr><td class='ref'>{rng.random()}</td><td>{' '.join(rng.choice(words) for _ in range(8))}</td></tr>"
+        rows.append(row)
+        length += len(row)
+    return (
+        f"<html><body><div class='abstract'>{abstract}</div>"
+        f"<table>{''.join(rows)}</table></body></html>"
+    ).encode()
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    pages = {}
+
+    def do_GET(self):
+        index = int(self.path.strip('/'))
+        body = self.pages[index % 10 == 9]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_mode(requests: int, papers: int) -> dict:
+    """Run the scrapes in this process and report memory figures"""
+    from backend.memory import get_memory_stats, peak_rss_mb, track_request_memory
+    from backend.scraper import PaperScraper
+
+    PageHandler.pages = {False: make_page(SMALL_PAGE, 1), True: make_page(LARGE_PAGE, 2)}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    baseline = peak_rss_mb()
+
+    scraper = PaperScraper(cache=None)
+
+    def one_request(request: int):
+        batch = [{'title': str(i), 'link': f"{base}/{request * papers + i}"} for i in range(papers)]
+        with track_request_memory():
+            scraper.scrape_papers(batch)
+        return sum(1 for paper in batch if paper.get('abstract'))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        scraped = sum(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    stats = get_memory_stats().stats()
+    return {
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': peak_rss_mb(),
+        'scraped': scraped,
+        'pages': requests * papers,
+        'skipped_too_large': stats['pages_skipped_too_large'],
+        'skipped_over_budget': stats['pages_skipped_over_budget'],
+        'seconds': round(elapsed, 2),
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        print(json.dumps(run_mode(int(sys.argv[2]), int(sys.argv[3]))))
+        return
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    papers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{requests} concurrent requests x {papers} papers (every 10th page {LARGE_PAGE // (1024 * 1024)} MB)")
+    print(f"{'mode':<10} {'peak RSS':>10} {'baseline':>10} {'scraped':>9} {'too large':>10} {'over budget':>12} {'time':>7}")
+    for mode, settings in MODES.items():
+        env = dict(os.environ, SHARED_CACHE_PATH='', LOG_LEVEL='ERROR', **settings)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_scrape_memory', '--run', str(requests), str(papers)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<10} {result['peak_rss_mb']:>8.1f}MB {result['baseline_rss_mb']:>8.1f}MB "
+            f"{result['scraped']:>4}/{result['pages']:<4} {result['skipped_too_large']:>10} "
+            f"{result['skipped_over_budget']:>12} {result['seconds']:>6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,18 @@ function App() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [results, setResults] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // Form state
   const [query, setQuery] = useState('');
   const [numPapers, setNumPapers] = useState(5);
   const [dropdownOpen, setDropdownOpen] = useState(false);
   const dropdownRef = useRef(null);
+  // Aborting the previous search's requests lets the backend cancel its work
+  const searchControllerRef = useRef(null);
+
+  // Abort outstanding requests when the page is closed
+  useEffect(() => () => searchControllerRef.current?.abort(), []);
 
   // Close dropdown when clicking outside
   useEffect(() => {
@@ -33,22 +39,20 @@ function App() {
     e.preventDefault();
     if (!query.trim()) return;
 
+    searchControllerRef.current?.abort();
+    const controller = new AbortController();
+    searchControllerRef.current = controller;
+    const { signal } = controller;
+
     setLoading(true);
     setError(null);
     setResults(null);
 
     try {
       // Step 1: Get papers fast (no images)
-      const response = await fetch(`${API_BASE_URL}/api/process`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          query: query.trim(),
-          num_papers: numPapers
-        }),
-      });
+      // GET so the browser (and any CDN) can cache and revalidate by ETag
+      const params = new URLSearchParams({ query: query.trim(), num_papers: numPapers });
+      const response = await fetch(`${API_BASE_URL}/api/process?${params}`, { signal });
 
       if (!response.ok) {
         const errorData = await response.json();
@@ -61,25 +65,104 @@ function App() {
 
       // Step 2: Load images progressively for each paper
       data.papers.forEach((paper, index) => {
-        loadImageForPaper(paper, index);
+        loadImageForPaper(paper, index, signal);
       });
 
     } catch (err) {
+      if (err.name === 'AbortError') return;  // Superseded by a newer search
       setError(err.message);
       console.error('Search error:', err);
       setLoading(false);
     }
   };
 
-  const loadImageForPaper = async (paper, index) => {
+  // Fetch the next slice of the current search without repeating it
+  const handleLoadMore = async () => {
+    if (!results || !results.next_cursor) return;
+
+    const signal = searchControllerRef.current?.signal;
+    setLoadingMore(true);
+    setError(null);
+
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/process/next`, {
+        method: 'POST',
+        signal,
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ cursor: results.next_cursor }),
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || 'Loading more results failed');
+      }
+
+      const data = await response.json();
+      const offset = results.papers.length;
+      setResults(prevResults => ({
+        ...prevResults,
+        papers: [...prevResults.papers, ...data.papers],
+        next_cursor: data.next_cursor,
+      }));
+
+      data.papers.forEach((paper, index) => {
+        loadImageForPaper(paper, offset + index, signal);
+      });
+    } catch (err) {
+      if (err.name === 'AbortError') return;
+      setError(err.message);
+      console.error('Load more error:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const setPaperImages = (index, imageData) => {
+    setResults(prevResults => {
+      if (!prevResults) return prevResults;
+      const updatedPapers = [...prevResults.papers];
+      updatedPapers[index] = {
+        ...updatedPapers[index],
+        image_urls: imageData.image_urls,
+        thumbnail_urls: imageData.thumbnail_urls || [],
+      };
+      return {
+        ...prevResults,
+        papers: updatedPapers,
+      };
+    });
+  };
+
+  // Poll the full-quality render that keeps running behind a preview
+  const pollFullRender = async (jobId, index, signal) => {
+    for (let attempt = 0; attempt < 100; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, 3000));
+      if (signal?.aborted) return;
+      const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}`, { signal });
+      if (!response.ok) return;
+      const job = await response.json();
+      if (job.status === 'success' && job.image_urls.length > 0) {
+        setPaperImages(index, job);
+        return;
+      }
+      if (job.status === 'failure') return;
+    }
+  };
+
+  const loadImageForPaper = async (paper, index, signal) => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/generate-image`, {
         method: 'POST',
+        signal,
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
           paper: paper,  // Send entire paper object including abstract
+          priority: index,  // Earlier (visible) cards are submitted first
+          preview: true,  // Show a fast low-resolution render first
         }),
       });
 
@@ -87,21 +170,14 @@ function App() {
         const imageData = await response.json();
         if (imageData.success && imageData.image_urls.length > 0) {
           // Update the specific paper with its image
-          setResults(prevResults => {
-            if (!prevResults) return prevResults;
-            const updatedPapers = [...prevResults.papers];
-            updatedPapers[index] = {
-              ...updatedPapers[index],
-              image_urls: imageData.image_urls,
-            };
-            return {
-              ...prevResults,
-              papers: updatedPapers,
-            };
-          });
+          setPaperImages(index, imageData);
+        }
+        if (imageData.preview && imageData.job_id) {
+          pollFullRender(imageData.job_id, index, signal).catch(() => {});
         }
       }
     } catch (err) {
+      if (err.name === 'AbortError') return;
       console.error(`Failed to load image for paper ${index}:`, err);
     }
   };
@@ -237,6 +313,19 @@ function App() {
             glowColor="132, 0, 255"
           />
         )}
+
+        {results && !loading && results.next_cursor && (
+          <div className="load-more-wrapper">
+            <button
+              type="button"
+              className="load-more-btn"
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : `Load ${numPapers} more`}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
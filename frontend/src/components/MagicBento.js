@@ -326,7 +326,7 @@ const MagicBento = ({
                 >
                   <div className="bento-image">
                     {paper.image_urls && paper.image_urls.length > 0 ? (
-                      <img src={paper.image_urls[0]} alt={paper.title} loading="lazy" />
+                      <img src={(paper.thumbnail_urls && paper.thumbnail_urls[0]) || paper.image_urls[0]} alt={paper.title} loading="lazy" />
                     ) : (
                       <div className="bento-image-loading">
                         <div className="loading-spinner"></div>
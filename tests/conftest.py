@@ -0,0 +1,14 @@
+"""
+Shared test fixtures
+"""
+
+import pytest
+from backend import selector_stats
+
+
+@pytest.fixture(autouse=True)
+def no_local_stores(monkeypatch):
+    """Keep tests from writing the paper index and selector stats under data/"""
+    monkeypatch.setenv('PAPER_INDEX_PATH', '')
+    monkeypatch.setenv('SELECTOR_STATS_PATH', '')
+    monkeypatch.setattr(selector_stats, '_selector_stats', None)
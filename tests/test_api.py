@@ -133,3 +133,239 @@ def test_process_returns_abstract_field():
             assert "abstract" in paper
             # Should not have abstract_source anymore
             assert "abstract_source" not in paper
+
+
+def test_job_status_unknown_job():
+    """Test job status endpoint with an unknown job ID"""
+    response = client.get("/api/jobs/does-not-exist")
+    assert response.status_code == 404
+
+
+def test_generate_image_queue_mode(monkeypatch, tmp_path):
+    """Test that queue mode enqueues the task and returns its job ID"""
+    from backend import app as app_module
+    from backend.job_queue import SQLiteJobQueue
+
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(app_module, "get_queue", lambda: queue)
+
+    response = client.post(
+        "/api/generate-image",
+        json={
+            "paper": {
+                "title": "Test Paper",
+                "link": "https://example.com",
+                "snippet": "Snippet",
+                "year": 2025,
+                "abstract": "An abstract",
+                "image_urls": []
+            },
+            "wait": False
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "queued"
+    assert "An abstract" in queue.get(data["job_id"])["payload"]["prompt"]
+
+    status_response = client.get(f"/api/jobs/{data['job_id']}")
+    assert status_response.status_code == 200
+    assert status_response.json()["status"] == "queued"
+
+
+def test_generate_image_preview_mode(monkeypatch):
+    """Test that preview mode returns the preview and exposes the full render as a job"""
+    import threading
+    import time
+    from backend import app as app_module
+
+    full_render_gate = threading.Event()
+
+    class FakeScenario:
+        def generate_image(self, prompt, width=1024, height=1024, **kwargs):
+            if width == 1024:
+                full_render_gate.wait(5)
+            return [f"https://cdn.example.com/{width}.png"]
+
+    monkeypatch.setattr(app_module, "get_queue", lambda: None)
+    monkeypatch.setattr(app_module, "get_scenario_client", lambda: FakeScenario())
+
+    response = client.post(
+        "/api/generate-image",
+        json={
+            "paper": {
+                "title": "Test Paper",
+                "link": "https://example.com",
+                "snippet": "Snippet",
+                "year": 2025,
+                "abstract": None,
+                "image_urls": []
+            },
+            "preview": True
+        }
+    )
+    data = response.json()
+    assert data["success"] is True
+    assert data["preview"] is True
+    assert data["image_urls"] == ["https://cdn.example.com/512.png"]
+
+    job = client.get(f"/api/jobs/{data['job_id']}").json()
+    assert job["preview_urls"] == ["https://cdn.example.com/512.png"]
+    assert job["status"] == "in-progress"
+
+    full_render_gate.set()
+    for _ in range(50):
+        job = client.get(f"/api/jobs/{data['job_id']}").json()
+        if job["status"] == "success":
+            break
+        time.sleep(0.05)
+    assert job["image_urls"] == ["https://cdn.example.com/1024.png"]
+
+
+def test_process_papers_fast_response(monkeypatch):
+    """Test that /api/process returns the ProcessedPaper shape, compressed on request"""
+    from backend import app as app_module
+
+    papers = [
+        {
+            "title": f"Paper {i}",
+            "link": f"https://arxiv.org/abs/{i}",
+            "snippet": None,
+            "year": 2025,
+            "abstract": "Long abstract text. " * 100
+        }
+        for i in range(5)
+    ]
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: object())
+    monkeypatch.setattr(app_module, "run_pipeline", lambda **kwargs: papers)
+
+    response = client.post(
+        "/api/process",
+        json={"query": "transformers", "num_papers": 5},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    data = response.json()
+    assert data["query"] == "transformers"
+    assert data["papers"][0] == {
+        "title": "Paper 0",
+        "link": "https://arxiv.org/abs/0",
+        "snippet": "",
+        "year": 2025,
+        "abstract": "Long abstract text. " * 100,
+        "image_urls": []
+    }
+
+
+def test_process_get_etag_and_not_modified(monkeypatch):
+    """Test that GET /api/process is cached, carries an ETag and answers 304"""
+    from backend import app as app_module
+    from backend.http_cache import ResponseCache
+
+    calls = []
+
+    def fake_pipeline(**kwargs):
+        calls.append(kwargs['query'])
+        return [{"title": "Paper", "link": "https://arxiv.org/abs/1", "year": 2025, "abstract": "A"}]
+
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: object())
+    monkeypatch.setattr(app_module, "run_pipeline", fake_pipeline)
+    cache = ResponseCache()
+    monkeypatch.setattr(app_module, "get_response_cache", lambda: cache)
+
+    response = client.get("/api/process", params={"query": "graphs", "num_papers": 1})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=300, stale-while-revalidate=600"
+    assert response.json()["papers"][0]["title"] == "Paper"
+
+    not_modified = client.get("/api/process", params={"query": "graphs", "num_papers": 1}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    # POST shares the cache and ETag but never answers 304
+    posted = client.post("/api/process", json={"query": "graphs", "num_papers": 1}, headers={"If-None-Match": etag})
+    assert posted.status_code == 200
+    assert posted.headers["etag"] == etag
+    assert calls == ["graphs"]
+
+
+def test_process_stale_response_is_served_and_refreshed(monkeypatch):
+    """Test stale-while-revalidate: the stale body is returned and recomputed once"""
+    from backend import app as app_module
+    from backend.http_cache import ResponseCache
+
+    import time
+
+    titles = iter(["Old", "New"])
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: object())
+    monkeypatch.setattr(
+        app_module, "run_pipeline",
+        lambda **kwargs: [{"title": next(titles), "link": "https://arxiv.org/abs/1", "year": 2025}]
+    )
+    cache = ResponseCache(max_age=60, stale_seconds=600)
+    monkeypatch.setattr(app_module, "get_response_cache", lambda: cache)
+
+    with TestClient(app) as local_client:
+        first = local_client.get("/api/process", params={"query": "stale", "num_papers": 1})
+        key = cache.key("stale", 1, False)
+        cache.get(key)['created'] -= 120
+
+        stale = local_client.get("/api/process", params={"query": "stale", "num_papers": 1})
+        assert stale.json()["papers"][0]["title"] == "Old"
+        assert stale.headers["etag"] == first.headers["etag"]
+
+        for _ in range(50):
+            if cache.get(key)['content']['papers'][0]['title'] == "New":
+                break
+            time.sleep(0.02)
+        refreshed = local_client.get("/api/process", params={"query": "stale", "num_papers": 1})
+    assert refreshed.json()["papers"][0]["title"] == "New"
+    assert refreshed.headers["etag"] != first.headers["etag"]
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_compressed_response_gets_weak_etag(monkeypatch):
+    """Test that compression weakens the ETag and a weak match still gives 304"""
+    from backend import app as app_module
+    from backend.http_cache import ResponseCache
+
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: object())
+    monkeypatch.setattr(
+        app_module, "run_pipeline",
+        lambda **kwargs: [{"title": "Paper", "link": "https://arxiv.org/abs/1", "abstract": "Long abstract. " * 200}]
+    )
+    cache = ResponseCache()
+    monkeypatch.setattr(app_module, "get_response_cache", lambda: cache)
+
+    response = client.get("/api/process", params={"query": "gzip"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/process", params={"query": "gzip"}, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+
+
+def test_job_status_not_modified_until_job_changes(monkeypatch):
+    """Test that job polling gets 304 while the job is unchanged"""
+    from backend import app as app_module
+    from backend.job_queue import MemoryJobQueue
+
+    queue = MemoryJobQueue()
+    monkeypatch.setattr(app_module, "get_queue", lambda: queue)
+    job_id = queue.enqueue({"prompt": "p"})
+
+    response = client.get(f"/api/jobs/{job_id}")
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert client.get(f"/api/jobs/{job_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    job = queue.claim("w1")
+    queue.complete(job["id"], "w1", {"image_urls": ["https://cdn.example.com/1.png"]})
+    changed = client.get(f"/api/jobs/{job_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["image_urls"] == ["https://cdn.example.com/1.png"]
+    assert changed.headers["cache-control"] == "private, max-age=300"
@@ -0,0 +1,107 @@
+"""
+Tests for cancelling work when the client disconnects
+"""
+
+import time
+import threading
+import pytest
+from backend.cancellation import RequestCancelled, get_cancellation_stats
+from backend.scenario_client import ScenarioClient
+from backend.scraper import PaperScraper
+
+
+def test_scrape_papers_cancels_pending_scrapes(monkeypatch):
+    """Scrapes not yet started are cancelled and the call returns promptly"""
+    scraper = PaperScraper()
+    started = []
+
+    def slow_scrape(paper):
+        started.append(paper['link'])
+        time.sleep(0.3)
+        paper['abstract'] = 'text'
+        return paper
+
+    monkeypatch.setattr(scraper, 'scrape_paper', slow_scrape)
+    papers = [{'title': str(i), 'link': f'https://example.com/{i}'} for i in range(4)]
+    before = get_cancellation_stats().stats()
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+
+    begin = time.monotonic()
+    with pytest.raises(RequestCancelled):
+        scraper.scrape_papers(papers, max_workers=1, cancel_event=cancel_event)
+
+    assert time.monotonic() - begin < 0.3
+    assert len(started) == 1
+    after = get_cancellation_stats().stats()
+    assert after['scrapes_cancelled'] - before['scrapes_cancelled'] == 3
+    assert after['scrapes_abandoned'] - before['scrapes_abandoned'] == 1
+
+
+def test_scrape_papers_without_cancellation_completes(monkeypatch):
+    """An unset cancel event does not change the results"""
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, 'scrape_paper', lambda paper: dict(paper, abstract='text'))
+    papers = [{'title': str(i), 'link': f'https://example.com/{i}'} for i in range(3)]
+
+    results = scraper.scrape_papers(papers, cancel_event=threading.Event())
+    assert [paper['abstract'] for paper in results] == ['text'] * 3
+
+
+def test_polling_stops_when_cancelled(monkeypatch):
+    """A submitted job stops being polled once the request is cancelled"""
+    client = ScenarioClient(api_key="test_key", api_secret="test_secret", event_hub=None)
+    polls = []
+
+    def fake_request(method, endpoint, **kwargs):
+        polls.append(endpoint)
+        return {'job': {'status': 'in-progress', 'progress': 0.1}}
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+    before = get_cancellation_stats().stats()['scenario_jobs_abandoned']
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+
+    begin = time.monotonic()
+    with pytest.raises(RequestCancelled):
+        client._poll_and_get_urls('job-1', cancel_event=cancel_event)
+
+    # The first poll waits 2s; cancellation cuts that wait short
+    assert time.monotonic() - begin < 1.0
+    assert polls == ['jobs/job-1']
+    assert get_cancellation_stats().stats()['scenario_jobs_abandoned'] == before + 1
+
+
+def test_disconnect_stops_in_process_image_job():
+    """A running in-process job has its renders stopped when the client leaves"""
+    import asyncio
+    from backend import app as app_module
+    from backend.job_queue import MemoryJobQueue
+    from backend.worker import process_one
+
+    class FakeScenario:
+        def generate_image(self, cancel_event=None, **kwargs):
+            if not cancel_event.wait(5):
+                return ['https://cdn.example.com/late.png']
+            raise RequestCancelled("Stopped polling")
+
+    class GoneRequest:
+        async def is_disconnected(self):
+            return True
+
+    queue = MemoryJobQueue()
+    job_id = queue.enqueue({'prompt': 'p', 'preview': {'width': 512}})
+    worker = threading.Thread(target=process_one, args=(queue, FakeScenario(), 'api', app_module._background_cancel))
+    worker.start()
+    for _ in range(50):
+        if job_id in app_module._background_cancel:
+            break
+        time.sleep(0.01)
+
+    with pytest.raises(RequestCancelled):
+        asyncio.run(app_module.wait_for_job(queue, job_id, timeout=5, interval=0.01, http_request=GoneRequest()))
+    worker.join(2)
+
+    assert not worker.is_alive()
+    assert queue.get(job_id)['status'] == 'failure'
+    assert job_id not in app_module._background_cancel
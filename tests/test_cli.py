@@ -0,0 +1,199 @@
+"""
+Tests for the batch processing CLI
+"""
+
+import json
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from backend import cli
+from backend.cli import Checkpoint, read_queries, run_batch
+
+
+def fake_search(query, num_papers, skip_links):
+    """Return num_papers papers for a query, minus those already written"""
+    papers = [
+        {'title': f'{query} {i}', 'link': f'https://example.org/{query}/{i}', 'year': 2024, 'abstract': 'A'}
+        for i in range(num_papers)
+    ]
+    return [paper for paper in papers if paper['link'] not in skip_links]
+
+
+def read_output(path):
+    """Rows of a JSONL output file"""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_queries_skips_blanks_comments_and_repeats(tmp_path):
+    """Test that blank lines, comments and repeated queries are skipped"""
+    path = tmp_path / 'queries.txt'
+    path.write_text("graph neural networks\n\n# comment\n  protein folding \ngraph neural networks\n")
+
+    assert read_queries(str(path)) == ['graph neural networks', 'protein folding']
+
+
+def test_run_batch_writes_papers_and_checkpoints(tmp_path):
+    """Test that every paper is written and finished queries are checkpointed"""
+    output = str(tmp_path / 'out.jsonl')
+    checkpoint = Checkpoint(output)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        summary = run_batch(['a', 'b'], checkpoint, executor, num_papers=2, search=fake_search)
+    checkpoint.close()
+
+    rows = read_output(output)
+    assert sorted(row['link'] for row in rows) == [
+        'https://example.org/a/0', 'https://example.org/a/1',
+        'https://example.org/b/0', 'https://example.org/b/1',
+    ]
+    assert set(rows[0]) == {'query', 'title', 'link', 'year', 'abstract', 'image_urls'}
+    assert summary['completed'] == 2
+    assert summary['papers'] == 4
+    assert Checkpoint(output).done_queries == {'a', 'b'}
+
+
+def test_resume_skips_done_queries_and_written_papers(tmp_path):
+    """Test that a rerun skips finished queries and papers already written"""
+    output = tmp_path / 'out.jsonl'
+    # 'a' finished; 'b' had one paper written and a second cut off mid-line
+    (tmp_path / 'out.jsonl.checkpoint').write_text('{"query": "a"}\n')
+    output.write_text(
+        json.dumps({'query': 'b', 'title': 'b 0', 'link': 'https://example.org/b/0'}) + '\n'
+        + '{"query": "b", "tit'
+    )
+    searched = []
+
+    def search(query, num_papers, skip_links):
+        searched.append((query, set(skip_links)))
+        return fake_search(query, num_papers, skip_links)
+
+    checkpoint = Checkpoint(str(output))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        summary = run_batch(['a', 'b'], checkpoint, executor, num_papers=2, search=search)
+    checkpoint.close()
+
+    assert searched == [('b', {'https://example.org/b/0'})]
+    assert [row['link'] for row in read_output(output)] == ['https://example.org/b/0', 'https://example.org/b/1']
+    assert summary['skipped'] == 1
+    assert summary['completed'] == 1
+
+
+def test_failed_image_leaves_query_open_for_the_next_run(tmp_path):
+    """Test that a failed render keeps its query open and only it is redone"""
+    output = str(tmp_path / 'out.jsonl')
+    fail = {'https://example.org/a/1'}
+    rendered = []
+
+    def render(paper):
+        rendered.append(paper['link'])
+        if paper['link'] in fail:
+            raise RuntimeError('render failed')
+        return ['https://cdn.example.org/' + paper['title']]
+
+    checkpoint = Checkpoint(output)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        summary = run_batch(['a'], checkpoint, executor, num_papers=2, images=True, search=fake_search, render=render)
+    checkpoint.close()
+
+    assert summary['images_failed'] == 1
+    assert summary['failed'] == 1
+    assert read_output(output)[0]['image_urls'] == ['https://cdn.example.org/a 0']
+
+    fail.clear()
+    rendered.clear()
+    checkpoint = Checkpoint(output)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        summary = run_batch(['a'], checkpoint, executor, num_papers=2, images=True, search=fake_search, render=render)
+    checkpoint.close()
+
+    assert rendered == ['https://example.org/a/1']
+    assert summary['completed'] == 1
+    assert len(read_output(output)) == 2
+
+
+def test_search_task_scrapes_only_unwritten_papers(monkeypatch):
+    """Test that papers already in the output are not scraped again"""
+    class FakeSerper:
+        def search_scholar(self, query, num_results, keep_extra):
+            return [{'title': f'Paper {i}', 'link': f'https://example.org/{i}', 'year': 2024} for i in range(3)]
+
+    class FakeScraper:
+        def __init__(self):
+            self.scraped = []
+
+        def scrape_papers(self, papers, cancel_event=None):
+            self.scraped.extend(paper['link'] for paper in papers)
+            for paper in papers:
+                paper['abstract'] = 'Abstract'
+
+    scraper = FakeScraper()
+    monkeypatch.setattr(cli, '_worker', {
+        'serper': FakeSerper(),
+        'scraper': scraper,
+        'index': None,
+        'serper_slots': threading.Semaphore(1),
+    })
+
+    papers = cli.search_task('q', 2, {'https://example.org/0'})
+
+    assert [paper['link'] for paper in papers] == ['https://example.org/1']
+    assert scraper.scraped == ['https://example.org/1']
+
+
+def test_client_caches_missing_index(monkeypatch):
+    """Test that a factory returning None (no paper index) is called only once"""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return None
+
+    monkeypatch.setattr(cli, '_worker', {})
+    assert cli._client('index', factory) is None
+    assert cli._client('index', factory) is None
+    assert calls == [1]
+
+
+def test_abort_pool_does_not_wait_for_running_tasks():
+    """Test that an interrupted run stops the pool instead of waiting for renders"""
+    context = multiprocessing.get_context('spawn')
+    pids = context.SimpleQueue()
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=cli.report_pid, initargs=(pids,))
+    future = executor.submit(time.sleep, 60)
+    executor.submit(time.sleep, 60)
+    while not future.running() or pids.empty():
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    cli.abort_pool(executor, pids)
+    executor.shutdown()
+
+    assert time.monotonic() - start < 10
+    assert pids.empty()
+
+
+def test_main_shuts_the_pool_down_when_the_batch_fails(tmp_path, monkeypatch):
+    """Test that an error from run_batch still shuts the pool down"""
+    shutdowns = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            pass
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            shutdowns.append(cancel_futures)
+
+    def broken_batch(*args, **kwargs):
+        raise RuntimeError('checkpoint disk full')
+
+    monkeypatch.setattr(cli, 'ProcessPoolExecutor', FakePool)
+    monkeypatch.setattr(cli, 'run_batch', broken_batch)
+    monkeypatch.setattr(cli, 'configure_logging', lambda: False)
+    queries = tmp_path / 'queries.txt'
+    queries.write_text('protein folding\n')
+
+    with pytest.raises(RuntimeError):
+        cli.main([str(queries), '-o', str(tmp_path / 'out.jsonl')])
+    assert shutdowns == [True]
@@ -0,0 +1,85 @@
+"""
+Tests for response compression and the fast JSON response path
+"""
+
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from backend.compression import CompressionMiddleware, negotiate_encoding
+from backend.responses import FastJSONResponse, dumps
+
+LARGE_TEXT = "attention is all you need " * 200
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return FastJSONResponse({"text": LARGE_TEXT})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/image")
+    def image():
+        return Response(LARGE_TEXT.encode(), media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n" for i in range(100)), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation with q-values and server preference"""
+    available = ('zstd', 'br', 'gzip')
+    assert negotiate_encoding("gzip, br, zstd", available) == 'zstd'
+    assert negotiate_encoding("gzip, br;q=0.5", available) == 'gzip'
+    assert negotiate_encoding("gzip;q=0, identity", available) is None
+    assert negotiate_encoding("*", ('gzip',)) == 'gzip'
+    assert negotiate_encoding("br", ('gzip',)) is None
+
+
+def test_large_json_is_compressed(client):
+    """Test that bodies above the threshold are gzip-compressed"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(LARGE_TEXT) / 5
+    assert response.json() == {"text": LARGE_TEXT}
+
+
+def test_small_and_binary_bodies_pass_through(client):
+    """Test that small bodies and images are sent uncompressed"""
+    for path in ("/small", "/image"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+def test_identity_client_gets_plain_body(client):
+    """Test that clients without Accept-Encoding get the raw body"""
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"text": LARGE_TEXT}
+
+
+def test_streamed_body_is_compressed(client):
+    """Test that streamed responses are compressed chunk by chunk"""
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).decode() == "".join(f"line {i}\n" for i in range(100))
+
+
+def test_dumps_matches_json():
+    """Test that the fast encoder produces standard JSON"""
+    content = {"title": "Über Transformers", "year": None, "urls": [], "n": 3}
+    assert json.loads(dumps(content)) == content
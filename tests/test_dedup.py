@@ -0,0 +1,63 @@
+"""
+Tests for near-duplicate paper detection
+"""
+
+from backend.dedup import deduplicate_papers, find_duplicate_clusters
+
+
+def paper(title, link, snippet='', year=2025, abstract=None):
+    return {'title': title, 'link': link, 'snippet': snippet, 'year': year, 'abstract': abstract}
+
+
+ABSTRACT = "We propose a new network architecture based solely on attention mechanisms, dispensing with recurrence"
+
+
+def test_mirrors_are_clustered():
+    """Test that arXiv, PubMed and ResearchGate copies form one cluster"""
+    papers = [
+        paper("[PDF] Attention Is All You Need - ResearchGate", "https://www.researchgate.net/publication/1", ABSTRACT),
+        paper("Large language models for code generation: a survey", "https://arxiv.org/abs/2501.00002"),
+        paper("Attention is all you need.", "https://arxiv.org/abs/1706.03762", ABSTRACT),
+        paper("Attention Is All You Need", "https://pubmed.ncbi.nlm.nih.gov/1/", ABSTRACT),
+    ]
+    assert find_duplicate_clusters(papers) == [[0, 2, 3], [1]]
+
+
+def test_keeps_most_scrapable_copy_in_first_position():
+    """Test that the arXiv copy replaces the ResearchGate copy in place"""
+    papers = [
+        paper("Attention Is All You Need - ResearchGate", "https://www.researchgate.net/publication/1", ABSTRACT, year=None),
+        paper("Diffusion models beat GANs", "https://arxiv.org/abs/2105.05233"),
+        paper("Attention is all you need", "https://arxiv.org/abs/1706.03762", ABSTRACT, year=None),
+        paper("Attention Is All You Need", "https://pubmed.ncbi.nlm.nih.gov/1/", ABSTRACT, year=2017),
+    ]
+    kept = deduplicate_papers(papers)
+
+    assert [p['link'] for p in kept] == ["https://arxiv.org/abs/1706.03762", "https://arxiv.org/abs/2105.05233"]
+    assert kept[0]['year'] == 2017
+
+
+def test_copy_with_abstract_wins():
+    """Test that an already-scraped copy is preferred over scraping another"""
+    papers = [
+        paper("Attention is all you need", "https://arxiv.org/abs/1706.03762"),
+        paper("Attention Is All You Need", "https://pubmed.ncbi.nlm.nih.gov/1/", abstract="Known abstract"),
+    ]
+    assert deduplicate_papers(papers)[0]['abstract'] == "Known abstract"
+
+
+def test_numbered_titles_are_distinct():
+    """Test that numbered parts of a series are not merged"""
+    papers = [
+        paper("Graph neural networks part 1", "https://arxiv.org/abs/1"),
+        paper("Graph neural networks part 2", "https://arxiv.org/abs/2"),
+    ]
+    assert len(deduplicate_papers(papers)) == 2
+
+
+def test_limit_and_small_inputs():
+    """Test the result limit and trivial inputs"""
+    assert deduplicate_papers([]) == []
+    papers = [paper(f"Unrelated topic {word}", f"https://arxiv.org/abs/{i}")
+              for i, word in enumerate(["alpha", "quantum", "protein"])]
+    assert len(deduplicate_papers(papers, limit=2)) == 2
@@ -0,0 +1,81 @@
+"""
+Tests for the bulk NDJSON export
+"""
+
+import json
+import threading
+import time
+from fastapi.testclient import TestClient
+from backend import app as app_module
+
+
+def test_export_streams_rows_with_bounded_concurrency(monkeypatch):
+    """Every query's papers are streamed, at most `concurrency` at a time"""
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def fake_pipeline(query, num_papers, cancel_event=None, **kwargs):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        if query == 'broken':
+            raise RuntimeError('upstream down')
+        return [
+            {'title': f"{query} {i}", 'link': f"https://arxiv.org/abs/{query}{i}", 'snippet': 's', 'year': 2025, 'abstract': 'text'}
+            for i in range(num_papers)
+        ]
+
+    monkeypatch.setattr(app_module, 'get_serper_client', lambda: object())
+    monkeypatch.setattr(app_module, 'run_pipeline', fake_pipeline)
+    client = TestClient(app_module.app)
+
+    queries = [f"q{i}" for i in range(6)] + ['broken']
+    response = client.post('/api/export', json={'queries': queries, 'num_papers': 2, 'concurrency': 2})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    papers = [row for row in rows if 'error' not in row]
+    assert len(papers) == 12
+    assert {row['query'] for row in papers} == set(queries[:-1])
+    assert papers[0].keys() == {'query', 'title', 'link', 'year', 'abstract', 'image_urls'}
+    assert papers[0]['image_urls'] == []
+    assert [row for row in rows if 'error' in row] == [{'query': 'broken', 'error': 'upstream down'}]
+    assert state['peak'] == 2
+
+
+def test_export_rejects_empty_query_list():
+    """At least one query is required"""
+    client = TestClient(app_module.app)
+    assert client.post('/api/export', json={'queries': []}).status_code == 422
+
+
+def test_export_fills_image_urls_from_cached_renders(monkeypatch):
+    """Papers already rendered get their cached image URLs, others stay empty"""
+    rendered = app_module.build_image_prompt({'title': 'q 0', 'year': 2025, 'abstract': 'text'})
+
+    class FakeScenario:
+        def cached_images(self, prompt):
+            return ['https://cdn.example/0.png'] if prompt == rendered else []
+
+    def fake_pipeline(query, num_papers, cancel_event=None, **kwargs):
+        return [
+            {'title': f"{query} {i}", 'link': f"https://arxiv.org/abs/{i}", 'year': 2025, 'abstract': 'text'}
+            for i in range(num_papers)
+        ]
+
+    monkeypatch.setattr(app_module, 'get_serper_client', lambda: object())
+    monkeypatch.setattr(app_module, 'get_shared_cache', lambda: object())
+    monkeypatch.setattr(app_module, 'get_scenario_client', lambda: FakeScenario())
+    monkeypatch.setattr(app_module, 'get_store', lambda: None)
+    monkeypatch.setattr(app_module, 'run_pipeline', fake_pipeline)
+    client = TestClient(app_module.app)
+
+    response = client.post('/api/export', json={'queries': ['q'], 'num_papers': 2})
+    rows = {row['title']: row for row in map(json.loads, response.text.splitlines())}
+
+    assert rows['q 0']['image_urls'] == ['https://cdn.example/0.png']
+    assert rows['q 1']['image_urls'] == []
@@ -0,0 +1,176 @@
+"""
+Tests for hedged scrape fetches
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from backend import hedging as hedging_module
+from backend import scraper as scraper_module
+from backend.hedging import HedgeBudget, HostLatencyStats
+from backend.retry_policy import RetryBudget, RetryPolicy
+from backend.scraper import PaperScraper, ScraperError, alternate_url
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """Fresh latency stats (50ms default delay) and budget for each test"""
+    stats = HostLatencyStats(default_delay=0.05)
+    budget = HedgeBudget(ratio=0.5, burst=2)
+    monkeypatch.setattr(scraper_module, 'get_host_latency_stats', lambda: stats)
+    monkeypatch.setattr(scraper_module, 'get_hedge_budget', lambda: budget)
+    return stats, budget
+
+
+def test_alternate_url_mirrors():
+    """arXiv and PubMed have mirrors; other hosts are asked again"""
+    assert alternate_url('https://arxiv.org/abs/1706.03762') == 'https://export.arxiv.org/abs/1706.03762'
+    assert alternate_url('https://pubmed.ncbi.nlm.nih.gov/12345678/') == 'https://www.ncbi.nlm.nih.gov/pubmed/12345678'
+    assert alternate_url('https://example.com/paper') == 'https://example.com/paper'
+
+
+def test_hedge_delay_uses_host_p90():
+    """Hosts fall back to the default delay until they have enough samples"""
+    stats = HostLatencyStats(default_delay=2.0)
+    assert stats.hedge_delay('arxiv.org') == 2.0
+    for i in range(1, 11):
+        stats.record('arxiv.org', i / 10)
+    assert stats.hedge_delay('arxiv.org') == pytest.approx(0.91)
+
+
+def test_budget_limits_hedges():
+    """Each hedge spends a token; primaries earn them back slowly"""
+    budget = HedgeBudget(ratio=0.5, burst=1)
+    assert budget.try_hedge()
+    assert not budget.try_hedge()
+    budget.on_primary()
+    budget.on_primary()
+    assert budget.try_hedge()
+    assert budget.stats()['denied'] == 1
+    assert not HedgeBudget(ratio=0).try_hedge()
+
+
+def test_fast_fetch_is_not_hedged(hedging, monkeypatch):
+    """A fetch that beats the hedge delay sends one request"""
+    _, budget = hedging
+    calls = []
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', lambda url: calls.append(url) or 'html')
+
+    assert scraper._fetch_page('https://arxiv.org/abs/1') == 'html'
+    assert calls == ['https://arxiv.org/abs/1']
+    assert budget.stats()['hedges'] == 0
+
+
+def test_slow_fetch_is_hedged_to_mirror(hedging, monkeypatch):
+    """A slow primary is raced by the mirror, which answers first"""
+    _, budget = hedging
+    release = threading.Event()
+
+    def fetch(url):
+        if url.startswith('https://arxiv.org'):
+            release.wait(5)
+            return 'primary'
+        return 'mirror'
+
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', fetch)
+    try:
+        assert scraper._fetch_page('https://arxiv.org/abs/1') == 'mirror'
+    finally:
+        release.set()
+    assert budget.stats()['hedges_won'] == 1
+
+
+def test_hedges_do_not_queue_behind_primaries(hedging, monkeypatch):
+    """Test that a hedge runs even when every primary fetch thread is busy"""
+    primaries = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(PaperScraper, '_fetch_executors', {'fetch': primaries})
+    release = threading.Event()
+
+    def fetch(url):
+        if url.startswith('https://arxiv.org'):
+            release.wait(5)
+            return 'primary'
+        return 'mirror'
+
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', fetch)
+    try:
+        assert scraper._fetch_page('https://arxiv.org/abs/1') == 'mirror'
+    finally:
+        release.set()
+        primaries.shutdown()
+
+
+def test_failed_hedge_falls_back_to_primary(hedging, monkeypatch):
+    """A hedge that errors does not fail the fetch"""
+    def fetch(url):
+        if url.startswith('https://arxiv.org'):
+            time.sleep(0.2)
+            return 'primary'
+        raise requests.exceptions.ConnectionError('mirror down')
+
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', fetch)
+    assert scraper._fetch_page('https://arxiv.org/abs/1') == 'primary'
+
+
+def test_all_fetches_failing_raises(hedging, monkeypatch):
+    """ScraperError is raised once primary and hedge have both failed"""
+    def fetch(url):
+        time.sleep(0.1)
+        raise requests.exceptions.ConnectionError('down')
+
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', fetch)
+    monkeypatch.setattr(scraper, 'retry_policy', RetryPolicy('scraper', RetryBudget(), max_attempts=1))
+    with pytest.raises(ScraperError):
+        scraper._fetch_page('https://arxiv.org/abs/1')
+
+
+def test_time_queued_in_the_pool_does_not_trigger_a_hedge(hedging, monkeypatch):
+    """A fast fetch that waited for a free pool thread is not hedged"""
+    _, budget = hedging
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(PaperScraper, '_executor', classmethod(lambda cls, kind='fetch': executor))
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_once', lambda url: time.sleep(0.01) or 'html')
+
+    executor.submit(time.sleep, 0.2)
+    try:
+        assert scraper._fetch_page('https://arxiv.org/abs/1') == 'html'
+    finally:
+        executor.shutdown()
+    assert budget.stats()['hedges'] == 0
+
+
+def test_failed_fetches_are_timed(hedging, monkeypatch):
+    """Timeouts and error responses count towards the host's latency"""
+    stats, _ = hedging
+    scraper = PaperScraper()
+
+    def timeout(url, **kwargs):
+        time.sleep(0.05)
+        raise requests.exceptions.ReadTimeout('slow host')
+
+    monkeypatch.setattr(scraper.session, 'get', timeout)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        scraper._fetch_once('https://arxiv.org/abs/1')
+
+    host = stats.export()['arxiv.org']
+    assert host['samples'] == 1
+    assert host['p50'] >= 0.05
+
+
+def test_settings_are_read_on_first_use(monkeypatch):
+    """Test that hedge settings set after import (e.g. from .env) are used"""
+    monkeypatch.setattr(hedging_module, '_budget', None)
+    monkeypatch.setattr(hedging_module, '_latency_stats', None)
+    monkeypatch.setenv('SCRAPE_HEDGE_RATIO', '0')
+    monkeypatch.setenv('SCRAPE_HEDGE_DEFAULT_DELAY', '0.5')
+
+    assert not hedging_module.get_hedge_budget().try_hedge()
+    assert hedging_module.get_host_latency_stats().hedge_delay('arxiv.org') == 0.5
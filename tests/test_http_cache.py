@@ -0,0 +1,73 @@
+"""
+Tests for ETags and the /api/process response cache
+"""
+
+from backend.http_cache import ResponseCache, etag_matches, make_etag
+
+
+def test_etag_is_deterministic_and_content_sensitive():
+    """Test that equal content gets the same ETag whatever its key order"""
+    first = make_etag({'query': 'q', 'papers': [{'title': 'A', 'year': 2024}]})
+    reordered = make_etag({'papers': [{'year': 2024, 'title': 'A'}], 'query': 'q'})
+    changed = make_etag({'query': 'q', 'papers': [{'title': 'B', 'year': 2024}]})
+
+    assert first == reordered
+    assert first != changed
+    assert first.startswith('"') and first.endswith('"')
+
+
+def test_etag_matches_uses_weak_comparison():
+    """Test that If-None-Match matching ignores W/ prefixes and accepts lists and *"""
+    etag = '"abc"'
+
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", W/"abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_response_cache_fresh_stale_and_expired(monkeypatch):
+    """Test that entries go from fresh to stale to expired with matching headers"""
+    now = [1000.0]
+    monkeypatch.setattr('backend.http_cache.time.time', lambda: now[0])
+    cache = ResponseCache(max_age=60, stale_seconds=120)
+    key = cache.key('q', 5, False)
+
+    cache.put(key, {'query': 'q'}, '"e1"')
+    entry = cache.get(key)
+    assert cache.is_fresh(entry)
+
+    now[0] += 90
+    entry = cache.get(key)
+    assert entry is not None and not cache.is_fresh(entry)
+    assert cache.headers(entry) == {
+        'ETag': '"e1"',
+        'Cache-Control': 'public, max-age=60, stale-while-revalidate=120',
+        'Age': '90',
+    }
+
+    now[0] += 100
+    assert cache.get(key) is None
+
+
+def test_response_cache_single_refresh_per_key():
+    """Test that only one background refresh runs per key at a time"""
+    cache = ResponseCache()
+
+    assert cache.begin_refresh('k')
+    assert not cache.begin_refresh('k')
+    cache.end_refresh('k')
+    assert cache.begin_refresh('k')
+    assert cache.stats()['refreshes'] == 2
+
+
+def test_response_cache_keeps_max_entries():
+    """Test that the in-memory cache drops its oldest entries beyond max_entries"""
+    cache = ResponseCache(max_entries=2)
+    for i in range(3):
+        cache.put(f'k{i}', {'i': i}, f'"{i}"')
+
+    assert cache.get('k0') is None
+    assert cache.get('k2')['content'] == {'i': 2}
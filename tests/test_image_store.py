@@ -0,0 +1,92 @@
+"""
+Tests for the local image mirror
+"""
+
+from io import BytesIO
+import pytest
+from fastapi.testclient import TestClient
+from backend import app as app_module
+from backend.image_store import ImageStore
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image
+
+
+def make_png(size=(256, 256)) -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', size, (120, 30, 200)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.headers = {'Content-Type': 'image/png'}
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ImageStore(str(tmp_path / "images"), thumb_size=64)
+
+
+def test_put_is_content_addressed(store):
+    """Test that identical bytes map to the same digest and blob"""
+    data = make_png()
+    digest = store.put(data, 'image/png')
+    assert store.put(data, 'image/png') == digest
+    assert store.path_for(digest).endswith(f"{digest}.png")
+
+
+def test_variants_are_created(store):
+    """Test thumbnail and WebP variant generation"""
+    digest = store.put(make_png(), 'image/png')
+
+    with Image.open(store.path_for(digest, 'thumb')) as thumb:
+        assert thumb.format == 'WEBP'
+        assert max(thumb.size) == 64
+    with Image.open(store.path_for(digest, 'webp')) as full:
+        assert full.size == (256, 256)
+
+
+def test_mirror_downloads_once(store, monkeypatch):
+    """Test that a URL is only downloaded the first time"""
+    calls = []
+
+    def fake_get(url, timeout):
+        calls.append(url)
+        return FakeResponse(make_png())
+
+    monkeypatch.setattr('backend.image_store.requests.get', fake_get)
+    first = store.mirror('https://cdn.example.com/a.png')
+    second = store.mirror('https://cdn.example.com/a.png')
+
+    assert first == second
+    assert calls == ['https://cdn.example.com/a.png']
+
+
+def test_invalid_digest_is_rejected(store):
+    """Test that path traversal attempts do not resolve"""
+    assert store.path_for('../../etc/passwd') is None
+    assert store.path_for('a' * 64, 'huge') is None
+
+
+def test_serve_image_with_cache_headers_and_ranges(store, monkeypatch):
+    """Test that mirrored images are served immutable and support Range"""
+    digest = store.put(make_png(), 'image/png')
+    monkeypatch.setattr(app_module, 'get_store', lambda: store)
+    client = TestClient(app_module.app)
+
+    response = client.get(f"/api/images/{digest}?variant=thumb")
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'image/webp'
+    assert 'immutable' in response.headers['cache-control']
+
+    partial = client.get(f"/api/images/{digest}", headers={'Range': 'bytes=0-7'})
+    assert partial.status_code == 206
+    assert partial.headers['content-range'].startswith('bytes 0-7/')
+    assert partial.content == make_png()[:8]
+
+    assert client.get(f"/api/images/{'0' * 64}").status_code == 404
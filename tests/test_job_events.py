@@ -0,0 +1,99 @@
+"""
+Tests for Scenario completion webhooks
+"""
+
+import threading
+import time
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.job_events import JobEventHub, extract_job_id, get_job_event_hub
+from backend.scenario_client import ScenarioClient
+
+client = TestClient(app)
+
+
+def test_callback_wakes_waiter():
+    """Test that notify releases a waiting poller immediately"""
+    hub = JobEventHub()
+    threading.Timer(0.05, hub.notify, args=('job-1', {'status': 'success'})).start()
+
+    start = time.monotonic()
+    assert hub.wait('job-1', 5) == {'status': 'success'}
+    assert time.monotonic() - start < 1
+
+
+def test_early_callback_is_kept():
+    """Test that a callback arriving before the wait is not lost"""
+    hub = JobEventHub()
+    assert hub.notify('job-1', {'status': 'success'}) is False
+    assert hub.wait('job-1', 0) == {'status': 'success'}
+
+
+def test_wait_times_out():
+    """Test that waiting without a callback returns None"""
+    assert JobEventHub().wait('job-1', 0.01) is None
+
+
+def test_extract_job_id():
+    """Test job ID lookup in the supported callback shapes"""
+    assert extract_job_id({'jobId': 'a'}) == 'a'
+    assert extract_job_id({'job': {'jobId': 'b'}}) == 'b'
+    assert extract_job_id({'data': {'id': 'c'}}) == 'c'
+    assert extract_job_id({}) is None
+
+
+def test_poll_resolves_on_callback(monkeypatch):
+    """Test that a job completes on the callback, not the next safety-net poll"""
+    hub = JobEventHub()
+    scenario = ScenarioClient(api_key="test_key", event_hub=hub)
+    state = {'status': 'in-progress', 'gets': 0}
+
+    def fake_request(method, endpoint, **kwargs):
+        state['gets'] += 1
+        return {'job': {'status': state['status'], 'images': ['https://cdn.example.com/a.png']}}
+
+    def finish():
+        state['status'] = 'success'
+        hub.notify('job-1', {'job': {'jobId': 'job-1', 'status': 'success'}})
+
+    monkeypatch.setattr(scenario, '_make_request', fake_request)
+    threading.Timer(0.1, finish).start()
+
+    start = time.monotonic()
+    assert scenario._poll_and_get_urls('job-1') == ['https://cdn.example.com/a.png']
+    assert time.monotonic() - start < 2
+    assert state['gets'] == 2
+
+
+def test_webhook_endpoint_notifies_hub():
+    """Test the local stand-in callback against the endpoint"""
+    response = client.post("/api/webhooks/scenario", json={'job': {'jobId': 'job-42', 'status': 'success'}})
+    assert response.status_code == 200
+    assert response.json()['job_id'] == 'job-42'
+    assert get_job_event_hub().wait('job-42', 0)['job']['status'] == 'success'
+
+
+def test_webhook_endpoint_rejects_bad_payload():
+    """Test that callbacks without a job ID are rejected"""
+    assert client.post("/api/webhooks/scenario", json={'nothing': True}).status_code == 400
+
+
+def test_webhook_secret(monkeypatch):
+    """Test shared-secret verification"""
+    monkeypatch.setenv('SCENARIO_WEBHOOK_SECRET', 's3cret')
+    payload = {'jobId': 'job-7'}
+
+    assert client.post("/api/webhooks/scenario", json=payload).status_code == 401
+    ok = client.post("/api/webhooks/scenario", json=payload, headers={'X-Webhook-Secret': 's3cret'})
+    assert ok.status_code == 200
+
+
+def test_only_the_api_process_waits_on_callbacks(monkeypatch):
+    """Test that worker-side clients keep normal polling when webhooks are enabled"""
+    from backend import app as app_module
+    monkeypatch.setenv('SCENARIO_WEBHOOK_ENABLED', 'true')
+    monkeypatch.setenv('SCENARIO_API_KEY', 'test_key')
+    monkeypatch.setattr(app_module, '_clients', {})
+
+    assert ScenarioClient().event_hub is None
+    assert app_module.get_scenario_client().event_hub is get_job_event_hub()
@@ -0,0 +1,188 @@
+"""
+Tests for the image generation job queue and worker
+"""
+
+import pytest
+from backend.job_queue import JobQueue, SQLiteJobQueue, MemoryJobQueue, JobQueueError, get_job_queue
+from backend.worker import process_one, run_task
+
+
+class FakeScenario:
+    """Stand-in for ScenarioClient that records prompts"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.prompts = []
+
+    def generate_image(self, prompt, width=1024, height=1024, samples=1, **kwargs):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("boom")
+        return [f"https://cdn.example.com/{width}/{len(self.prompts)}.png"]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_enqueue_and_get(queue):
+    """Test that enqueued jobs are stored as queued"""
+    job_id = queue.enqueue({'prompt': 'hello'})
+    job = queue.get(job_id)
+    assert job['status'] == 'queued'
+    assert job['payload'] == {'prompt': 'hello'}
+    assert job['result'] is None
+
+
+def test_claim_is_fifo_and_exclusive(queue):
+    """Test that jobs are claimed oldest first and only once"""
+    first = queue.enqueue({'prompt': 'a'})
+    second = queue.enqueue({'prompt': 'b'})
+
+    assert queue.claim('w1')['id'] == first
+    assert queue.claim('w2')['id'] == second
+    assert queue.claim('w3') is None
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """Test that a job held by a dead worker is handed out again"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), lease_seconds=0)
+    job_id = queue.enqueue({'prompt': 'a'})
+    assert queue.claim('w1')['id'] == job_id
+    assert queue.claim('w2')['id'] == job_id
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(tmp_path):
+    """Test that only the current lease holder can update, complete or fail a job"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), lease_seconds=0)
+    job_id = queue.enqueue({'prompt': 'a'})
+    queue.claim('w1')
+    queue.claim('w2')
+
+    assert not queue.update(job_id, 'w1', {'preview_urls': ['old.png']})
+    assert not queue.complete(job_id, 'w1', {'image_urls': ['old.png']})
+    assert not queue.fail(job_id, 'w1', 'boom')
+    assert queue.get(job_id)['status'] == 'in-progress'
+
+    assert queue.complete(job_id, 'w2', {'image_urls': ['new.png']})
+    assert queue.get(job_id)['result'] == {'image_urls': ['new.png']}
+    assert not queue.fail(job_id, 'w2', 'late')
+
+
+def test_memory_queue_checks_the_lease_holder():
+    """Test that the in-memory store only accepts results from the claiming worker"""
+    queue = MemoryJobQueue()
+    job_id = queue.enqueue({'prompt': 'a'})
+    queue.claim('w1')
+
+    assert not queue.complete(job_id, 'w2', {'image_urls': ['x.png']})
+    assert queue.fail(job_id, 'w1', 'boom')
+    assert queue.get(job_id)['error'] == 'boom'
+
+
+def test_job_queue_is_abstract():
+    """Test that a backend missing part of the interface cannot be instantiated"""
+    class Partial(JobQueue):
+        def enqueue(self, payload, priority=0):
+            return 'id'
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_worker_completes_job(queue):
+    """Test that the worker stores results in the shared result store"""
+    job_id = queue.enqueue({'prompt': 'draw this'})
+    scenario = FakeScenario()
+
+    assert process_one(queue, scenario, 'w1') is True
+    job = queue.get(job_id)
+    assert job['status'] == 'success'
+    assert job['result'] == {'image_urls': ['https://cdn.example.com/1024/1.png']}
+    assert scenario.prompts == ['draw this']
+
+
+def test_worker_records_failure(queue):
+    """Test that generation errors mark the job as failed"""
+    job_id = queue.enqueue({'prompt': 'draw this'})
+
+    process_one(queue, FakeScenario(fail=True), 'w1')
+    job = queue.get(job_id)
+    assert job['status'] == 'failure'
+    assert 'boom' in job['error']
+
+
+def test_worker_idle_on_empty_queue(queue):
+    """Test that the worker reports an empty queue"""
+    assert process_one(queue, FakeScenario(), 'w1') is False
+
+
+def test_get_job_queue_from_env(monkeypatch, tmp_path):
+    """Test queue backend selection from environment"""
+    monkeypatch.delenv('IMAGE_QUEUE_BACKEND', raising=False)
+    assert get_job_queue() is None
+
+    monkeypatch.setenv('IMAGE_QUEUE_BACKEND', 'sqlite')
+    monkeypatch.setenv('IMAGE_QUEUE_PATH', str(tmp_path / "q.db"))
+    assert isinstance(get_job_queue(), SQLiteJobQueue)
+
+    monkeypatch.setenv('IMAGE_QUEUE_BACKEND', 'carrier-pigeon')
+    with pytest.raises(JobQueueError):
+        get_job_queue()
+
+
+def test_memory_queue_claims_by_priority():
+    """Test that the in-process queue serves lower priority values first"""
+    queue = MemoryJobQueue()
+    low = queue.enqueue({'prompt': 'a'}, priority=5)
+    high = queue.enqueue({'prompt': 'b'}, priority=0)
+
+    assert queue.claim('w')['id'] == high
+    assert queue.claim('w')['id'] == low
+    assert queue.claim('w') is None
+
+
+def test_preview_task_reports_preview_first():
+    """Test that preview mode publishes the preview before the full render"""
+    partials = []
+    result = run_task(
+        FakeScenario(),
+        {'prompt': 'draw', 'preview': {'width': 512, 'height': 512, 'steps': 8}},
+        partials.append
+    )
+
+    assert len(partials) == 1
+    assert partials[0]['preview_urls'][0].startswith('https://cdn.example.com/512/')
+    assert result['image_urls'][0].startswith('https://cdn.example.com/1024/')
+    assert result['preview_urls'] == partials[0]['preview_urls']
+
+
+def test_preview_result_visible_while_running(queue):
+    """Test that partial results are stored on a running job"""
+    job_id = queue.enqueue({'prompt': 'draw'})
+    queue.claim('w1')
+    queue.update(job_id, 'w1', {'preview_urls': ['p.png']})
+
+    job = queue.get(job_id)
+    assert job['status'] == 'in-progress'
+    assert job['result'] == {'preview_urls': ['p.png']}
+
+
+@pytest.mark.parametrize('make_queue', [
+    lambda tmp_path: SQLiteJobQueue(str(tmp_path / "jobs.db")),
+    lambda tmp_path: MemoryJobQueue(),
+])
+def test_cancel_only_unclaimed_jobs(make_queue, tmp_path):
+    """Test that cancel fails queued jobs and leaves claimed ones running"""
+    queue = make_queue(tmp_path)
+    claimed = queue.enqueue({'prompt': 'a'})
+    waiting = queue.enqueue({'prompt': 'b'})
+    assert queue.claim('worker-1')['id'] == claimed
+
+    assert queue.cancel(waiting, 'Cancelled: client disconnected')
+    assert not queue.cancel(claimed)
+    assert queue.get(waiting)['status'] == 'failure'
+    assert queue.get(waiting)['error'] == 'Cancelled: client disconnected'
+    assert queue.get(claimed)['status'] == 'in-progress'
+    assert queue.claim('worker-2') is None
@@ -0,0 +1,201 @@
+"""
+Tests for API key pools
+"""
+
+import base64
+import pytest
+import requests
+from backend import key_pool
+from backend.key_pool import KeyPin, KeyPool, get_key_pool, key_pool_stats, keys_from_env, mask_key
+from backend.serper_client import SerperClient
+from backend.scenario_client import ScenarioClient
+
+
+def make_response(status=200, headers=None, body=b'{}'):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+def make_pool(secrets=('key-aaaa', 'key-bbbb'), **kwargs):
+    now = [100.0]
+    pool = KeyPool('test', secrets, clock=lambda: now[0], **kwargs)
+    return pool, now
+
+
+def test_keys_from_env_prefers_pool(monkeypatch):
+    """Test that the key list variable wins over the single-key one"""
+    monkeypatch.setenv('TEST_API_KEYS', ' a1, b2 ,,')
+    monkeypatch.setenv('TEST_API_KEY', 'single')
+    assert keys_from_env('TEST_API_KEYS', 'TEST_API_KEY') == ['a1', 'b2']
+
+    monkeypatch.delenv('TEST_API_KEYS')
+    assert keys_from_env('TEST_API_KEYS', 'TEST_API_KEY') == ['single']
+
+
+def test_mask_key_hides_secret():
+    """Test that masked keys show only their last 4 characters"""
+    assert mask_key('abcdefgh1234') == '…1234'
+    assert mask_key('abcdefgh1234:topsecret') == '…1234'
+    assert mask_key('short') == '…'
+
+
+def test_balances_by_remaining_quota():
+    """Test that requests go to the key with the most quota left"""
+    pool, _ = make_pool(rate_limit=10)
+    first = pool.acquire()
+    pool.release(first, make_response())
+    second = pool.acquire()
+    pool.release(second, make_response())
+    assert first is not second
+
+    # A key reporting more quota left takes the following requests
+    pool.release(pool.acquire(exclude=[second]), make_response(headers={'X-RateLimit-Remaining': '50'}))
+    assert pool.acquire() is first
+
+
+def test_rate_limited_key_cools_down_and_fails_over():
+    """Test that a 429 cools a key down and the request moves to another key"""
+    pool, now = make_pool(cooldown=30)
+    used = []
+
+    def send(key):
+        used.append(key.secret)
+        if key.secret == 'key-aaaa' and len(used) == 1:
+            return make_response(429, {'Retry-After': '10'})
+        return make_response()
+
+    assert pool.call(send).status_code == 200
+    assert used == ['key-aaaa', 'key-bbbb']
+    stats = pool.stats()
+    assert stats['failovers'] == 1
+    assert stats['per_key'][0]['rate_limited'] == 1
+    assert stats['per_key'][0]['cooldown_remaining'] == 10
+
+    # Skipped while cooling down, back once the Retry-After has passed
+    assert pool.acquire() is pool.keys[1]
+    now[0] += 61
+    assert pool.acquire() is pool.keys[0]
+
+
+def test_failover_always_moves_off_a_429():
+    """Test that a retried request never goes back to the key that got a 429"""
+    pool, _ = make_pool(('key-aaaa', 'key-bbbb', 'key-cccc'))
+    used = []
+
+    def send(key):
+        used.append(key.secret)
+        return make_response(429) if len(used) < 3 else make_response()
+
+    assert pool.call(send).status_code == 200
+    assert len(set(used)) == 3
+    assert pool.stats()['failovers'] == 2
+
+
+def test_all_keys_cooling_returns_last_429_then_uses_first_recovered():
+    """Test that with every key cooling the last 429 is returned, then the first recovered key is used"""
+    pool, now = make_pool(cooldown=30)
+    pool.keys[0].cooldown_until = now[0] + 5
+    pool.keys[1].cooldown_until = now[0] + 20
+
+    assert pool.acquire() is pool.keys[0]
+    assert pool.stats()['all_cooling'] == 1
+
+    response = pool.call(lambda key: make_response(429))
+    assert response.status_code == 429
+
+
+def test_pin_keeps_requests_on_one_key():
+    """Test that a pinned sequence of requests stays on one key"""
+    pool, _ = make_pool()
+    pin = KeyPin()
+    used = []
+
+    def send(key):
+        used.append(key.secret)
+        return make_response()
+
+    for _ in range(4):
+        pool.call(send, pin)
+
+    assert len(set(used)) == 1
+    assert pin.key.secret == used[0]
+
+
+def test_network_error_counts_and_releases():
+    """Test that a network error is counted and the key's slot released"""
+    pool, _ = make_pool(('key-aaaa',))
+
+    def send(key):
+        raise requests.ConnectionError('down')
+
+    with pytest.raises(requests.ConnectionError):
+        pool.call(send)
+    key_stats = pool.stats()['per_key'][0]
+    assert key_stats['errors'] == 1
+    assert key_stats['in_flight'] == 0
+
+
+def test_serper_client_spreads_requests_over_pool(monkeypatch):
+    """Test that the Serper client spreads its requests over the key pool"""
+    monkeypatch.delenv('SERPER_API_KEY', raising=False)
+    monkeypatch.setenv('SERPER_API_KEYS', 'serper-key-1111,serper-key-2222')
+    client = SerperClient(cache=None)
+    sent = []
+
+    def fake_post(url, json, headers, timeout):
+        sent.append(headers['X-API-KEY'])
+        if headers['X-API-KEY'] == 'serper-key-1111':
+            return make_response(429, {'Retry-After': '60'})
+        return make_response(body=b'{"organic": []}')
+
+    monkeypatch.setattr(client.session, 'post', fake_post)
+
+    assert client.api_key == 'serper-key-1111'
+    assert client._make_request({'q': 'x'}) == {'organic': []}
+    assert client._make_request({'q': 'y'}) == {'organic': []}
+    assert sent == ['serper-key-1111', 'serper-key-2222', 'serper-key-2222']
+
+
+def test_scenario_job_stays_on_submitting_account(monkeypatch):
+    """Test that a Scenario job's polls use the account that submitted it"""
+    monkeypatch.setenv('SCENARIO_API_KEYS', 'scen-key-1111:s1,scen-key-2222:s2')
+    client = ScenarioClient(cache=None)
+    auth = {
+        'Basic ' + base64.b64encode(b'scen-key-1111:s1').decode(): 'one',
+        'Basic ' + base64.b64encode(b'scen-key-2222:s2').decode(): 'two',
+    }
+    accounts = []
+
+    def fake_request(method, url, headers, timeout, **kwargs):
+        accounts.append(auth[headers['Authorization']])
+        if url.endswith('txt2img'):
+            return make_response(body=b'{"job": {"jobId": "j1"}}')
+        return make_response(body=b'{"job": {"status": "success", "images": ["https://cdn.example.com/1.png"]}}')
+
+    monkeypatch.setattr(client.session, 'request', fake_request)
+    monkeypatch.setattr(client, '_wait_for_next_poll', lambda *args, **kwargs: None)
+    # Another request just used the first account: the job goes elsewhere
+    client._make_request('GET', 'models')
+
+    urls = client.generate_image('prompt')
+
+    assert urls == ['https://cdn.example.com/1.png']
+    assert client.api_key == 'scen-key-1111'
+    assert accounts == ['one', 'two', 'two']
+
+
+def test_clients_with_other_keys_get_their_own_pool(monkeypatch):
+    """Test that a client with other credentials does not replace the shared pool"""
+    monkeypatch.setattr(key_pool, '_pools', {})
+    shared = get_key_pool('serper', ['key-aaaa', 'key-bbbb'])
+    other = get_key_pool('serper', ['key-cccc'])
+
+    assert get_key_pool('serper', ['key-aaaa', 'key-bbbb']) is shared
+    assert other is not shared
+
+    stats = key_pool_stats()['serper']
+    assert stats['keys'] == 3
+    assert [key['key'] for key in stats['per_key']] == [mask_key('key-aaaa'), mask_key('key-bbbb'), mask_key('key-cccc')]
@@ -0,0 +1,100 @@
+"""
+Tests for the queue-based logging pipeline
+"""
+
+import io
+import json
+import logging
+import threading
+import pytest
+from backend import log_setup
+from backend.log_setup import SamplingFilter, configure_logging, parse_sample_rates, shutdown_logging
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Install the pipeline on a fresh root logger writing to a buffer"""
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+
+    def install(**env):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        assert configure_logging(stream=stream, force=True) is True
+        return stream
+
+    yield install
+
+    shutdown_logging()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+def make_record(category=None, level=logging.INFO):
+    record = logging.makeLogRecord({'msg': 'line', 'levelno': level, 'levelname': logging.getLevelName(level)})
+    if category:
+        record.category = category
+    return record
+
+
+def test_parse_sample_rates():
+    """Test sampling spec parsing with clamping and bad pairs ignored"""
+    assert parse_sample_rates("poll=0.1, fetch=2,bad,http=x") == {'poll': 0.1, 'fetch': 1.0}
+
+
+def test_sampling_filter_keeps_one_in_n():
+    """Test that a 0.1 rate keeps every tenth record, starting with the first"""
+    sampler = SamplingFilter({'poll': 0.1})
+    kept = [sampler.filter(make_record('poll')) for _ in range(30)]
+    assert kept.count(True) == 3 and kept[0] is True
+    assert sampler.dropped == {'poll': 27}
+
+
+def test_sampling_spares_warnings_and_untagged_records():
+    """Test that warnings and records without a category are never sampled"""
+    sampler = SamplingFilter({'poll': 0.0})
+    assert sampler.filter(make_record('poll', logging.WARNING))
+    assert sampler.filter(make_record())
+    assert not sampler.filter(make_record('poll'))
+
+
+def test_formatting_happens_on_listener_thread(pipeline):
+    """Test that messages are interpolated off the calling thread"""
+    stream = pipeline(LOG_LEVEL='INFO')
+    formatted_on = []
+
+    class Arg:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "value"
+
+    logging.getLogger('backend.test').info("lazy %s", Arg())
+    logging.getLogger('backend.test').debug("skipped %s", Arg())
+    shutdown_logging()
+
+    assert "lazy value" in stream.getvalue()
+    assert len(formatted_on) == 1
+    assert formatted_on[0] is not threading.current_thread()
+
+
+def test_json_format_includes_category(pipeline):
+    """Test structured output with extras as fields"""
+    stream = pipeline(LOG_FORMAT='json', LOG_SAMPLE_RATES='fetch=1')
+    logging.getLogger('backend.scraper').info("Fetching: %s", "https://arxiv.org/abs/1", extra={'category': 'fetch'})
+    shutdown_logging()
+
+    entry = json.loads(stream.getvalue().strip())
+    assert entry['message'] == "Fetching: https://arxiv.org/abs/1"
+    assert entry['category'] == 'fetch'
+    assert entry['logger'] == 'backend.scraper'
+
+
+def test_stats_report_sampled_records(pipeline):
+    """Test that sampled-out records are counted"""
+    pipeline(LOG_SAMPLE_RATES='poll=0.5')
+    for _ in range(4):
+        logging.getLogger('backend.test').info("poll", extra={'category': 'poll'})
+    stats = log_setup.logging_stats()
+    assert stats['pipeline'] is True
+    assert stats['sampled_out'] == {'poll': 2}
@@ -0,0 +1,126 @@
+"""
+Tests for per-request memory accounting
+"""
+
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.memory import (
+    PARSE_OVERHEAD, RequestMemory, current_request_memory, get_memory_stats, track_request_memory
+)
+from backend.profiling import bind, stage
+from backend.scraper import FetchedPage, OverMemoryBudget, PageTooLarge, PaperScraper
+from backend.shared_cache import SharedCache
+
+ABSTRACT = "We study the effect of memory ceilings on scraping workloads. " * 4
+PAGE = FetchedPage(f"<html><body><div class='abstract'>{ABSTRACT}</div></body></html>".encode(), 'utf-8')
+
+
+class FakeRaw:
+    """Wire-level body stand-in"""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def tell(self):
+        return self.size
+
+
+class FakeResponse:
+    """Streaming response stand-in"""
+
+    def __init__(self, body: bytes, headers=None):
+        self.body = body
+        self.headers = headers or {}
+        self.raw = FakeRaw(len(body))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def test_budget_skips_pages_that_do_not_fit():
+    """Reservations count the parse overhead and are refused past the limit"""
+    account = RequestMemory(limit_bytes=10 * PARSE_OVERHEAD)
+    first = account.reserve(6)
+    assert first == 6 * PARSE_OVERHEAD
+    assert account.reserve(6) == 0
+    account.release(first)
+    assert account.reserve(6)
+    assert account.summary()['skipped'] == 1
+    assert account.summary()['peak_bytes'] == 6 * PARSE_OVERHEAD
+
+
+def test_fetch_stops_reading_oversized_pages(monkeypatch):
+    """Pages over MAX_PAGE_BYTES are refused by header or while streaming"""
+    monkeypatch.setenv('MAX_PAGE_BYTES', '1000')
+    scraper = PaperScraper()
+
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: FakeResponse(b'x' * 500))
+    assert scraper._fetch_once('https://example.com/small') == FetchedPage(b'x' * 500, None)
+
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: FakeResponse(b'x' * 5000))
+    with pytest.raises(PageTooLarge):
+        scraper._fetch_once('https://example.com/streamed')
+
+    monkeypatch.setattr(scraper.session, 'get', lambda url, **kwargs: FakeResponse(b'', {'Content-Length': '5000'}))
+    with pytest.raises(PageTooLarge):
+        scraper._fetch_once('https://example.com/declared')
+
+
+def test_scrape_respects_request_budget(monkeypatch):
+    """A page that does not fit the request's budget is skipped, not parsed"""
+    scraper = PaperScraper()
+    monkeypatch.setattr(scraper, '_fetch_page', lambda url: PAGE)
+
+    with track_request_memory(limit_bytes=len(PAGE.content) * PARSE_OVERHEAD) as account:
+        assert scraper.scrape_generic('https://example.com/fits') == ABSTRACT.strip()
+        assert account.in_use == 0
+
+    before = get_memory_stats().stats()['pages_skipped_over_budget']
+    with track_request_memory(limit_bytes=len(PAGE.content)) as account:
+        with pytest.raises(OverMemoryBudget):
+            scraper.scrape_generic('https://example.com/too-big')
+    assert get_memory_stats().stats()['pages_skipped_over_budget'] == before + 1
+
+
+def test_budget_skip_is_not_negative_cached(monkeypatch, tmp_path):
+    """Test that a page skipped for one busy request is scraped by the next"""
+    scraper = PaperScraper(cache=SharedCache(str(tmp_path / 'cache.db')))
+    monkeypatch.setattr(scraper, '_fetch_page', lambda url: PAGE)
+
+    with track_request_memory(limit_bytes=len(PAGE.content)):
+        assert scraper.scrape_paper({'link': 'https://example.com/paper'})['abstract'] is None
+    with track_request_memory(limit_bytes=len(PAGE.content) * PARSE_OVERHEAD):
+        assert scraper.scrape_paper({'link': 'https://example.com/paper'})['abstract'] == ABSTRACT.strip()
+
+
+def test_bind_carries_budget_into_pool_threads():
+    """Scrape threads account against the request that started them"""
+    with track_request_memory(limit_bytes=0) as account:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            seen = list(executor.map(bind(lambda _: current_request_memory(), 'scrape'), range(2)))
+    assert seen == [account, account]
+
+
+def test_stage_records_allocations_when_tracing():
+    """Per-stage allocations are recorded only while tracemalloc runs"""
+    tracemalloc.start()
+    try:
+        with stage('test.alloc'):
+            kept = bytearray(512 * 1024)
+    finally:
+        tracemalloc.stop()
+    entry = get_memory_stats().stats()['stages']['test.alloc']
+    assert entry['calls'] == 1
+    assert entry['net_allocated_kb'] >= 500
+    del kept
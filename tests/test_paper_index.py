@@ -0,0 +1,115 @@
+"""
+Tests for the local paper index and local-first pipeline
+"""
+
+import pytest
+from backend.paper_index import PaperIndex
+from backend.pipeline import run_pipeline
+
+
+@pytest.fixture
+def index(tmp_path):
+    return PaperIndex(str(tmp_path / "papers.db"))
+
+
+def make_paper(n, abstract=None, year=2025, title=None):
+    return {
+        'title': title or f'Graph neural networks part {n}',
+        'link': f'https://arxiv.org/abs/2501.{n:05d}',
+        'snippet': f'Snippet {n}',
+        'year': year,
+        'abstract': abstract,
+    }
+
+
+class FakeSerper:
+    MIN_YEAR = 2025
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def search_scholar(self, query, num_results=10, keep_extra=False):
+        self.calls += 1
+        results = self.results if keep_extra else self.results[:num_results]
+        return [dict(paper) for paper in results]
+
+
+class FakeScraper:
+    def __init__(self):
+        self.scraped = []
+
+    def scrape_papers(self, papers, max_workers=5, cancel_event=None):
+        for paper in papers:
+            self.scraped.append(paper['link'])
+            paper['abstract'] = f"Abstract for {paper['title']}"
+        return papers
+
+
+def test_search_matches_all_terms(index):
+    """Test full-text search over title, snippet and abstract"""
+    index.add_papers([
+        make_paper(1, abstract='We study message passing.'),
+        make_paper(2, title='Diffusion models for images'),
+    ])
+
+    results = index.search('graph message passing')
+    assert [paper['link'] for paper in results] == [make_paper(1)['link']]
+    assert results[0]['abstract'] == 'We study message passing.'
+
+
+def test_upsert_keeps_existing_abstract(index):
+    """Test that a later hit without an abstract does not erase it"""
+    index.add_papers([make_paper(1, abstract='Scraped abstract')])
+    index.add_papers([make_paper(1, abstract=None)])
+
+    assert index.count() == 1
+    assert index.search('graph')[0]['abstract'] == 'Scraped abstract'
+
+
+def test_search_ignores_fts_syntax(index):
+    """Test that user input cannot inject FTS5 operators"""
+    index.add_papers([make_paper(1)])
+    assert index.search('graph" OR "x') == []
+    assert index.search('***') == []
+
+
+def test_search_filters_old_years(index):
+    """Test the minimum-year filter"""
+    index.add_papers([make_paper(1, year=2019), make_paper(2, year=2025)])
+    results = index.search('graph', min_year=2025)
+    assert [paper['year'] for paper in results] == [2025]
+
+
+def test_pipeline_indexes_results(index):
+    """Test that Serper hits and scraped abstracts are written to the index"""
+    serper = FakeSerper([make_paper(n) for n in range(1, 4)])
+    papers = run_pipeline('graph', 2, serper, FakeScraper(), index=index)
+
+    assert len(papers) == 2
+    assert index.count() == 3
+    assert index.search('graph part 1')[0]['abstract'].startswith('Abstract for')
+
+
+def test_local_first_skips_serper_when_index_is_enough(index):
+    """Test that local-first answers from the index without calling Serper"""
+    index.add_papers([make_paper(n, abstract=f'Known abstract {n}') for n in range(1, 4)])
+    serper = FakeSerper([])
+    scraper = FakeScraper()
+
+    papers = run_pipeline('graph', 3, serper, scraper, index=index, local_first=True)
+    assert len(papers) == 3
+    assert serper.calls == 0
+    assert scraper.scraped == []
+
+
+def test_local_first_tops_up_missing_results(index):
+    """Test that Serper only fills the gap and known papers are not rescraped"""
+    index.add_papers([make_paper(1, abstract='Known abstract')])
+    serper = FakeSerper([make_paper(n) for n in range(1, 4)])
+    scraper = FakeScraper()
+
+    papers = run_pipeline('graph', 3, serper, scraper, index=index, local_first=True)
+    assert [paper['link'] for paper in papers] == [make_paper(n)['link'] for n in range(1, 4)]
+    assert serper.calls == 1
+    assert make_paper(1)['link'] not in scraper.scraped
@@ -0,0 +1,92 @@
+"""
+Tests for adaptive Scenario polling
+"""
+
+import pytest
+from backend.poll_stats import JobDurationStats
+from backend.scenario_client import ScenarioClient
+
+SHAPE = ('flux.1-dev', 1024, 1024, 28)
+
+
+def seeded_stats(durations):
+    stats = JobDurationStats()
+    for duration in durations:
+        stats.record(SHAPE, duration, polls=3, detection_delay=1.0)
+    return stats
+
+
+def test_fallback_without_history():
+    """Test that the fixed schedule is used for unknown job shapes"""
+    stats = JobDurationStats()
+    assert stats.next_interval(SHAPE, elapsed=0, fallback=3) == 3
+    assert stats.initial_wait(SHAPE) == 0
+
+
+def test_polls_target_duration_quantiles():
+    """Test that polls are scheduled at the next unreached quantile"""
+    stats = seeded_stats([20, 22, 24, 26, 28])
+    assert stats.initial_wait(SHAPE) == pytest.approx(21)
+    # p50 = 24s, so a job at 22.5s waits until then
+    assert stats.next_interval(SHAPE, elapsed=22.5) == pytest.approx(1.5)
+    # Past every quantile: fall back
+    assert stats.next_interval(SHAPE, elapsed=40, fallback=5) == 5
+
+
+def test_progress_extrapolation():
+    """Test ETA extrapolation from two progress observations"""
+    stats = JobDurationStats()
+    # 10% per second from 50% at t=5 -> 5 s left
+    interval = stats.next_interval(SHAPE, elapsed=5, progress=(5, 0.5), previous_progress=(4, 0.4))
+    assert interval == pytest.approx(5)
+
+
+def test_interval_is_bounded():
+    """Test the minimum and maximum waits, and the growing floor"""
+    stats = JobDurationStats()
+    assert stats.next_interval(SHAPE, elapsed=1, progress=(1, 0.99)) == stats.MIN_INTERVAL
+    assert stats.next_interval(SHAPE, elapsed=1, progress=(1, 0.01)) == stats.MAX_INTERVAL
+    assert stats.next_interval(SHAPE, elapsed=1, attempt=10, progress=(1, 0.99)) == 3 * stats.MIN_INTERVAL
+
+
+def test_export():
+    """Test exported statistics per job shape"""
+    exported = seeded_stats([10, 20, 30, 40, 50]).export()
+    entry = exported['flux.1-dev:1024x1024:28']
+    assert entry['samples'] == 5
+    assert entry['p50'] == 30
+    assert entry['polls_per_job'] == 3
+
+
+def test_client_records_durations(monkeypatch):
+    """Test that polling records the job duration for its shape"""
+    stats = JobDurationStats()
+    scenario = ScenarioClient(api_key="test_key", duration_stats=stats)
+    monkeypatch.setattr(scenario, '_make_request', lambda method, endpoint, **kwargs: {
+        'job': {'status': 'success', 'images': ['https://cdn.example.com/a.png']}
+    })
+
+    assert scenario._poll_and_get_urls('job-1', shape=SHAPE) == ['https://cdn.example.com/a.png']
+    assert stats.export()['flux.1-dev:1024x1024:28']['jobs'] == 1
+
+
+def test_done_at_first_poll_after_initial_wait(monkeypatch):
+    """Test that a job done at the delayed first poll is timed from the end of the wait"""
+    import time
+
+    stats = seeded_stats([20, 22, 24, 26, 28])
+    recorded = []
+    monkeypatch.setattr(stats, 'record', lambda shape, **kwargs: recorded.append(kwargs))
+    scenario = ScenarioClient(api_key="test_key", duration_stats=stats, event_hub=None)
+    monkeypatch.setattr(scenario, '_make_request', lambda method, endpoint, **kwargs: {
+        'job': {'status': 'success', 'images': ['https://cdn.example.com/a.png']}
+    })
+    # The initial wait already took up the job's first 21s
+    monkeypatch.setattr(scenario, '_wait_for_next_poll', lambda *args: None)
+    submitted_at = time.monotonic() - 21
+
+    scenario._poll_and_get_urls('job-1', shape=SHAPE, submitted_at=submitted_at)
+
+    assert recorded[0]['duration'] == pytest.approx(21, abs=0.5)
+    assert recorded[0]['detection_delay'] < 0.5
+    assert recorded[0]['polls'] == 1
@@ -0,0 +1,83 @@
+"""
+Tests for per-request profiling
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from backend import app as app_module
+from backend.profiling import Profile, bind, current_profile, stage
+
+
+def busy_scrape(seconds=0.05):
+    """Burn CPU so the sampler catches this frame"""
+    end = time.perf_counter() + seconds
+    with stage('scrape.parse'):
+        while time.perf_counter() < end:
+            pass
+    return current_profile() is not None
+
+
+def test_bind_and_stage_are_noops_without_profile():
+    """Nothing is wrapped or timed outside a profiled request"""
+    assert bind(busy_scrape, 'scrape') is busy_scrape
+    with stage('serper'):
+        pass
+
+
+def test_profile_samples_pool_threads():
+    """Threads bound to the profile are sampled and time their stages"""
+    profile = Profile('test', interval=0.001).start()
+
+    def pipeline():
+        with stage('scrape'):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                return list(executor.map(bind(busy_scrape, 'scrape'), [0.05, 0.05]))
+
+    assert profile.wrap(pipeline, 'pipeline')() == [True, True]
+    result = profile.stop()
+
+    assert result['samples'] > 0
+    assert result['stages']['scrape']['calls'] == 1
+    assert result['stages']['scrape.parse']['calls'] == 2
+    assert any(line.startswith('scrape;') and 'busy_scrape' in line for line in result['folded'].splitlines())
+    assert 'scrape;dur=' in profile.server_timing()
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    """API client with an admin token and a CPU-bound fake pipeline"""
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(app_module, 'get_serper_client', lambda: object())
+
+    def fake_pipeline(**kwargs):
+        busy_scrape(0.05)
+        return []
+
+    monkeypatch.setattr(app_module, 'run_pipeline', fake_pipeline)
+    return TestClient(app_module.app)
+
+
+def test_profile_requires_admin_token(admin_client):
+    """?profile=1 without the admin token is rejected"""
+    response = admin_client.post('/api/process?profile=1', json={'query': 'q', 'num_papers': 1})
+    assert response.status_code == 403
+    assert admin_client.get('/api/profiles/whatever').status_code == 403
+
+
+def test_profiled_request_is_retrievable(admin_client):
+    """A profiled request names its profile, which admins can fetch"""
+    headers = {'X-Admin-Token': 'secret'}
+    response = admin_client.post('/api/process?profile=1', json={'query': 'q', 'num_papers': 1}, headers=headers)
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    assert 'scrape.parse;dur=' in response.headers['Server-Timing']
+
+    result = admin_client.get(f'/api/profiles/{profile_id}', headers=headers).json()
+    assert result['stages']['scrape.parse']['calls'] == 1
+    folded = admin_client.get(f'/api/profiles/{profile_id}?format=folded', headers=headers)
+    assert 'busy_scrape' in folded.text
+
+    unprofiled = admin_client.post('/api/process', json={'query': 'q', 'num_papers': 1})
+    assert 'X-Profile-Id' not in unprofiled.headers
@@ -0,0 +1,126 @@
+"""
+Tests for the shared retry policy
+"""
+
+import pytest
+import requests
+from backend import retry_policy
+from backend.retry_policy import RetryBudget, RetryPolicy, is_retryable, retry_after
+
+
+class FlakyError(Exception):
+    """Client error wrapping a requests exception, like SerperAPIError"""
+    pass
+
+
+def http_error(status, headers=None):
+    """HTTPError carrying a response with the given status"""
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+def wrapped(error):
+    """Re-raise as a client error the way the clients do"""
+    try:
+        raise FlakyError(str(error)) from error
+    except FlakyError as e:
+        return e
+
+
+def make_policy(budget=None, max_attempts=3):
+    """Policy that records its waits instead of sleeping"""
+    waits = []
+    policy = RetryPolicy('test', budget or RetryBudget(), max_attempts=max_attempts, sleep=waits.append)
+    return policy, waits
+
+
+def failing(errors, result='ok'):
+    """Callable that raises the given errors in turn, then returns result"""
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    func.calls = calls
+    return func
+
+
+def test_retryable_classification():
+    """Network errors, 429 and 5xx retry; other 4xx and plain errors do not"""
+    assert is_retryable(wrapped(requests.exceptions.ConnectionError()))
+    assert is_retryable(wrapped(http_error(503)))
+    assert is_retryable(http_error(429))
+    assert not is_retryable(wrapped(http_error(401)))
+    assert not is_retryable(ValueError('bad json'))
+
+
+def test_retries_until_success():
+    """Transient failures are retried with jittered waits inside the ceiling"""
+    policy, waits = make_policy()
+    func = failing([wrapped(http_error(502)), wrapped(http_error(502))])
+
+    assert policy.call(func) == 'ok'
+    assert len(func.calls) == 3
+    assert 0 <= waits[0] <= 1.0 and 0 <= waits[1] <= 2.0
+    assert policy.stats()['retries'] == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    """A 404 is not retried"""
+    policy, waits = make_policy()
+    func = failing([wrapped(http_error(404))])
+    with pytest.raises(FlakyError):
+        policy.call(func)
+    assert len(func.calls) == 1 and waits == []
+
+
+def test_attempts_exhausted():
+    """The last error is raised once max_attempts is reached"""
+    policy, _ = make_policy(max_attempts=2)
+    func = failing([requests.exceptions.Timeout()] * 3)
+    with pytest.raises(requests.exceptions.Timeout):
+        policy.call(func)
+    assert len(func.calls) == 2
+    assert policy.stats()['exhausted'] == 1
+
+
+def test_retry_after_is_honoured():
+    """A Retry-After header replaces the backoff; an excessive one stops retrying"""
+    assert retry_after(wrapped(http_error(429, {'Retry-After': '3'}))) == 3.0
+    assert retry_after(http_error(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+
+    policy, waits = make_policy()
+    assert policy.call(failing([http_error(429, {'Retry-After': '3'})])) == 'ok'
+    assert waits == [3.0]
+
+    func = failing([http_error(429, {'Retry-After': '120'})])
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy.call(func)
+    assert len(func.calls) == 1
+
+
+def test_budget_denies_retries_across_policies():
+    """Policies share one budget, so a failing upstream gets few retries"""
+    budget = RetryBudget(ratio=0.1, burst=1)
+    first, _ = make_policy(budget)
+    second, _ = make_policy(budget)
+
+    assert first.call(failing([requests.exceptions.ConnectionError()])) == 'ok'
+    with pytest.raises(requests.exceptions.ConnectionError):
+        second.call(failing([requests.exceptions.ConnectionError()]))
+    assert second.stats()['denied'] == 1
+
+
+def test_budget_reads_settings_on_first_use(monkeypatch):
+    """Test that RETRY_BUDGET_RATIO set after import (e.g. from .env) is used"""
+    monkeypatch.setattr(retry_policy, '_budget', None)
+    monkeypatch.setattr(retry_policy, '_policies', {})
+    monkeypatch.setenv('RETRY_BUDGET_RATIO', '0.5')
+
+    assert retry_policy.get_retry_budget().ratio == 0.5
+    assert retry_policy.get_retry_policy('serper').budget is retry_policy.get_retry_budget()
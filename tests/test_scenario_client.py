@@ -0,0 +1,85 @@
+"""
+Tests for Scenario API Client
+"""
+
+import threading
+import time
+import pytest
+from backend.scenario_client import ScenarioClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Scenario client with a fake asset endpoint"""
+    ScenarioClient._asset_url_cache.clear()
+    client = ScenarioClient(api_key="test_key", api_secret="test_secret")
+    client.calls = []
+    lock = threading.Lock()
+
+    def fake_request(method, endpoint, **kwargs):
+        with lock:
+            client.calls.append(endpoint)
+        time.sleep(0.1)
+        asset_id = endpoint.split('/')[-1]
+        if asset_id == 'missing':
+            return {'asset': {}}
+        return {'asset': {'url': f"https://cdn.example.com/{asset_id}.png"}}
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+    yield client
+    ScenarioClient._asset_url_cache.clear()
+
+
+def job_with_assets(*asset_ids):
+    return {'job': {'status': 'success', 'metadata': {'assetIds': list(asset_ids)}}}
+
+
+def test_scenario_client_headers():
+    """Test that basic auth headers are set"""
+    client = ScenarioClient(api_key="test_key", api_secret="test_secret")
+    assert client.headers['Authorization'].startswith('Basic ')
+
+
+def test_extract_direct_urls(client):
+    """Test that URLs already in the job response are used without asset lookups"""
+    job_data = {'job': {'images': [{'url': 'https://cdn.example.com/a.png'}]}}
+    assert client._extract_image_urls(job_data) == ['https://cdn.example.com/a.png']
+    assert client.calls == []
+
+
+def test_asset_lookups_run_concurrently(client):
+    """Test that several assets are resolved in parallel, in asset order"""
+    start = time.monotonic()
+    urls = client._extract_image_urls(job_with_assets('a1', 'a2', 'a3', 'a4'))
+    elapsed = time.monotonic() - start
+
+    assert urls == [f"https://cdn.example.com/a{i}.png" for i in range(1, 5)]
+    assert elapsed < 0.3
+
+
+def test_asset_urls_are_cached(client):
+    """Test that repeated job views reuse resolved asset URLs"""
+    client._extract_image_urls(job_with_assets('a1', 'a2'))
+    client.calls.clear()
+
+    urls = client._extract_image_urls(job_with_assets('a1', 'a2', 'a3'))
+    assert urls == [f"https://cdn.example.com/a{i}.png" for i in range(1, 4)]
+    assert client.calls == ['assets/a3']
+
+
+def test_unresolved_assets_are_skipped_and_not_cached(client):
+    """Test that assets without a URL are dropped and retried next time"""
+    assert client._extract_image_urls(job_with_assets('a1', 'missing')) == ['https://cdn.example.com/a1.png']
+    assert 'missing' not in ScenarioClient._asset_url_cache
+
+
+def test_cached_asset_urls_expire(client, monkeypatch):
+    """Test that signed asset URLs are fetched again once past the cache TTL"""
+    client._extract_image_urls(job_with_assets('a1'))
+    monkeypatch.setattr(ScenarioClient, 'ASSET_CACHE_TTL', -1)
+    client._extract_image_urls(job_with_assets('a2'))
+    client.calls.clear()
+
+    urls = client._extract_image_urls(job_with_assets('a1', 'a2'))
+    assert urls == ['https://cdn.example.com/a1.png', 'https://cdn.example.com/a2.png']
+    assert client.calls == ['assets/a2']
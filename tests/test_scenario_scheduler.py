@@ -0,0 +1,132 @@
+"""
+Tests for the Scenario submission scheduler
+"""
+
+import time
+import threading
+import pytest
+from backend.scenario_scheduler import SubmissionScheduler, SubmissionCancelled
+
+
+def test_in_flight_cap():
+    """Test that no more than max_in_flight slots are held at once"""
+    scheduler = SubmissionScheduler(max_in_flight=2, rate=1000, burst=10)
+    scheduler.acquire()
+    scheduler.acquire()
+
+    acquired = threading.Event()
+
+    def third():
+        scheduler.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=third)
+    thread.start()
+    assert not acquired.wait(0.2)
+
+    scheduler.release()
+    assert acquired.wait(1)
+    thread.join()
+    assert scheduler.stats()['in_flight'] == 2
+
+
+def test_token_bucket_rate():
+    """Test that submissions beyond the burst are paced by the rate"""
+    scheduler = SubmissionScheduler(max_in_flight=10, rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire()
+    # First is free, the next two each wait ~1/20 s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_priority_order():
+    """Test that lower priority values are served first"""
+    scheduler = SubmissionScheduler(max_in_flight=1, rate=1000, burst=10)
+    scheduler.acquire()
+
+    order = []
+
+    def waiter(priority):
+        scheduler.acquire(priority=priority)
+        order.append(priority)
+        scheduler.release()
+
+    threads = [threading.Thread(target=waiter, args=(p,)) for p in (5, 1, 3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == [1, 3, 5]
+
+
+def test_cancel_queued_submission():
+    """Test that setting the cancel event drops a queued submission"""
+    scheduler = SubmissionScheduler(max_in_flight=1, rate=1000, burst=10)
+    scheduler.acquire()
+
+    cancel_event = threading.Event()
+    errors = []
+
+    def waiter():
+        try:
+            scheduler.acquire(cancel_event=cancel_event)
+        except SubmissionCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    cancel_event.set()
+    thread.join(1)
+
+    assert len(errors) == 1
+    stats = scheduler.stats()
+    assert stats['cancelled'] == 1
+    assert stats['queued'] == 0
+    assert stats['in_flight'] == 1
+
+
+def test_cancel_waiter_behind_the_head():
+    """Test that cancelling a waiter not at the head does not block the ones after it"""
+    scheduler = SubmissionScheduler(max_in_flight=1, rate=1000, burst=10)
+    scheduler.acquire()
+
+    cancel_b = threading.Event()
+    acquired = []
+
+    def waiter(name, priority, cancel_event=None):
+        try:
+            scheduler.acquire(priority=priority, cancel_event=cancel_event)
+        except SubmissionCancelled:
+            return
+        acquired.append(name)
+        scheduler.release()
+
+    threads = [
+        threading.Thread(target=waiter, args=('a', 1), daemon=True),
+        threading.Thread(target=waiter, args=('b', 2, cancel_b), daemon=True),
+        threading.Thread(target=waiter, args=('c', 3), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    cancel_b.set()
+    time.sleep(0.2)
+    scheduler.release()
+    for thread in threads:
+        thread.join(2)
+
+    assert acquired == ['a', 'c']
+    assert scheduler.stats()['queued'] == 0
+
+
+def test_invalid_configuration():
+    """Test that nonsensical limits are rejected"""
+    with pytest.raises(ValueError):
+        SubmissionScheduler(max_in_flight=0)
+    with pytest.raises(ValueError):
+        SubmissionScheduler(rate=0)
@@ -0,0 +1,232 @@
+"""
+Tests for cursor-based "load more" pagination
+"""
+
+import time
+import pytest
+from fastapi.testclient import TestClient
+from backend.app import app
+from backend.pipeline import has_more, next_page, run_pipeline
+from backend.search_sessions import SearchSessionStore, decode_cursor, encode_cursor
+from backend.shared_cache import SharedCache
+
+client = TestClient(app)
+
+
+def make_paper(n):
+    return {
+        'title': f'Sparse attention study {n}',
+        'link': f'https://arxiv.org/abs/2502.{n:05d}',
+        'snippet': f'Snippet {n}',
+        'year': 2025,
+    }
+
+
+class PagedSerper:
+    """Serper stand-in returning 2 * num_results papers per page"""
+    MIN_YEAR = 2025
+
+    def __init__(self, total):
+        self.total = total
+        self.pages = []
+
+    def search_scholar(self, query, num_results=10, keep_extra=False, page=1):
+        self.pages.append(page)
+        per_page = num_results * 2
+        start = (page - 1) * per_page
+        return [make_paper(n) for n in range(start, min(start + per_page, self.total))]
+
+
+class FakeScraper:
+    def __init__(self):
+        self.scraped = []
+
+    def scrape_papers(self, papers, max_workers=5, cancel_event=None):
+        for paper in papers:
+            self.scraped.append(paper['link'])
+            paper['abstract'] = f"Abstract for {paper['title']}"
+        return papers
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode to what was encoded and reject garbage"""
+    assert decode_cursor(encode_cursor('abc_-1', 15)) == ('abc_-1', 15)
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor!')
+
+
+def test_next_page_reuses_fetched_results():
+    """Test that later pages come from the first Serper page before fetching more"""
+    serper, scraper = PagedSerper(total=13), FakeScraper()
+    session = {}
+
+    first = run_pipeline('attention', 3, serper, scraper, session=session)
+    assert [p['link'] for p in first] == [make_paper(n)['link'] for n in range(3)]
+    assert len(scraper.scraped) == 3
+
+    second = next_page(session, 3, serper, scraper)
+    assert [p['link'] for p in second] == [make_paper(n)['link'] for n in range(3, 6)]
+    assert serper.pages == [1]
+    # Only the new slice was scraped
+    assert len(scraper.scraped) == 6
+
+    third = next_page(session, 6, serper, scraper)
+    assert [p['link'] for p in third] == [make_paper(n)['link'] for n in range(6, 9)]
+    assert serper.pages == [1, 2]
+
+
+def test_repeated_page_is_not_rescraped():
+    """Test that asking for the same offset again reuses the scraped abstracts"""
+    serper, scraper = PagedSerper(total=12), FakeScraper()
+    session = {}
+    run_pipeline('attention', 3, serper, scraper, session=session)
+
+    next_page(session, 3, serper, scraper)
+    again = next_page(session, 3, serper, scraper)
+    assert len(scraper.scraped) == 6
+    assert all(paper['abstract'] for paper in again)
+
+
+def test_session_is_exhausted_when_serper_runs_out():
+    """Test that has_more turns false once every result was returned"""
+    serper, scraper = PagedSerper(total=7), FakeScraper()
+    session = {}
+    run_pipeline('attention', 3, serper, scraper, session=session)
+
+    next_page(session, 3, serper, scraper)
+    last = next_page(session, 6, serper, scraper)
+    assert len(last) == 1
+    assert not has_more(session, 7)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_session_store(shared, tmp_path):
+    """Test in-memory and shared-cache session storage"""
+    cache = SharedCache(str(tmp_path / "cache.db")) if shared else None
+    store = SearchSessionStore(cache=cache, ttl=60)
+    session_id = store.create({'query': 'q', 'results': [make_paper(1)]})
+    assert store.get(session_id)['results'][0]['link'] == make_paper(1)['link']
+    assert store.get('unknown') is None
+
+    expired = SearchSessionStore(cache=cache, ttl=-1)
+    assert expired.get(expired.create({'query': 'q'})) is None
+
+
+def test_load_more_endpoint(monkeypatch):
+    """Test /api/process followed by /api/process/next"""
+    from backend import app as app_module
+
+    serper, scraper = PagedSerper(total=9), FakeScraper()
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: serper)
+    monkeypatch.setattr(app_module, "get_scraper", lambda: scraper)
+    monkeypatch.setattr(app_module, "get_index", lambda: None)
+    store = SearchSessionStore()
+    monkeypatch.setattr(app_module, "get_search_sessions", lambda: store)
+
+    first = client.post("/api/process", json={"query": "attention", "num_papers": 4}).json()
+    assert len(first["papers"]) == 4
+    assert first["next_cursor"]
+
+    second = client.post("/api/process/next", json={"cursor": first["next_cursor"]}).json()
+    assert [p["link"] for p in second["papers"]] == [make_paper(n)["link"] for n in range(4, 8)]
+    assert second["papers"][0]["abstract"]
+
+    third = client.post("/api/process/next", json={"cursor": second["next_cursor"]}).json()
+    assert len(third["papers"]) == 1
+    assert third["next_cursor"] is None
+    # Page 3 came back empty, which ends the search
+    assert serper.pages == [1, 2, 3]
+
+
+def test_load_more_unknown_cursor():
+    """Test that unknown and malformed cursors are rejected"""
+    assert client.post("/api/process/next", json={"cursor": encode_cursor("missing", 5)}).status_code == 404
+    assert client.post("/api/process/next", json={"cursor": "%%%"}).status_code == 400
+
+
+def test_load_more_rejects_offsets_never_issued(monkeypatch):
+    """Test that a cursor with a forged offset is rejected without calling Serper"""
+    from backend import app as app_module
+
+    serper, scraper = PagedSerper(total=200), FakeScraper()
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: serper)
+    monkeypatch.setattr(app_module, "get_scraper", lambda: scraper)
+    monkeypatch.setattr(app_module, "get_index", lambda: None)
+    store = SearchSessionStore()
+    monkeypatch.setattr(app_module, "get_search_sessions", lambda: store)
+
+    first = client.post("/api/process", json={"query": "forged offsets", "num_papers": 2}).json()
+    session_id, offset = decode_cursor(first["next_cursor"])
+    assert offset == 2
+
+    forged = client.post("/api/process/next", json={"cursor": encode_cursor(session_id, 150)})
+    assert forged.status_code == 400
+    assert serper.pages == [1]
+
+    second = client.post("/api/process/next", json={"cursor": first["next_cursor"]}).json()
+    assert decode_cursor(second["next_cursor"]) == (session_id, 4)
+    assert client.post("/api/process/next", json={"cursor": second["next_cursor"]}).status_code == 200
+
+
+def test_cached_search_with_more_results_is_revalidated(monkeypatch):
+    """Test that a search with a next page keeps its cursor, ETag and 304 when cached"""
+    from backend import app as app_module
+    from backend.http_cache import ResponseCache
+
+    serper, scraper = PagedSerper(total=9), FakeScraper()
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: serper)
+    monkeypatch.setattr(app_module, "get_scraper", lambda: scraper)
+    monkeypatch.setattr(app_module, "get_index", lambda: None)
+    store = SearchSessionStore(ttl=60)
+    monkeypatch.setattr(app_module, "get_search_sessions", lambda: store)
+    cache = ResponseCache(max_age=300, stale_seconds=600)
+    monkeypatch.setattr(app_module, "get_response_cache", lambda: cache)
+
+    params = {"query": "shared cursors", "num_papers": 4}
+    first = client.get("/api/process", params=params)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public")
+    assert first.json()["next_cursor"]
+
+    again = client.get("/api/process", params=params)
+    assert again.json()["next_cursor"] == first.json()["next_cursor"]
+    assert again.headers["etag"] == etag
+    assert client.get("/api/process", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    # Clients served the same body continue the same session
+    pages = [client.post("/api/process/next", json={"cursor": first.json()["next_cursor"]}).json() for _ in range(2)]
+    assert pages[0]["papers"] == pages[1]["papers"]
+    assert len(serper.pages) == 1
+
+    # The session outlives the cached body (900s), not just its own 60s TTL
+    session_id, _ = decode_cursor(first.json()["next_cursor"])
+    assert store._sessions[session_id][0] - time.monotonic() > 800
+
+
+def test_shared_session_keeps_the_copy_that_fetched_further(monkeypatch):
+    """Test that a client saving a stale copy of a shared session does not undo another's progress"""
+    from backend import app as app_module
+
+    serper, scraper = PagedSerper(total=30), FakeScraper()
+    monkeypatch.setattr(app_module, "get_serper_client", lambda: serper)
+    monkeypatch.setattr(app_module, "get_scraper", lambda: scraper)
+    monkeypatch.setattr(app_module, "get_index", lambda: None)
+    store = SearchSessionStore()
+    monkeypatch.setattr(app_module, "get_search_sessions", lambda: store)
+
+    first = client.post("/api/process", json={"query": "shared", "num_papers": 4}).json()
+    session_id, _ = decode_cursor(first["next_cursor"])
+    stale = store.get(session_id)
+
+    second = client.post("/api/process/next", json={"cursor": first["next_cursor"]}).json()
+    third = client.post("/api/process/next", json={"cursor": second["next_cursor"]}).json()
+
+    # Another client read the session before those pages and saves after them
+    real_get = store.get
+    reads = iter([stale])
+    monkeypatch.setattr(store, "get", lambda sid: next(reads, None) or real_get(sid))
+    assert client.post("/api/process/next", json={"cursor": first["next_cursor"]}).status_code == 200
+
+    fourth = client.post("/api/process/next", json={"cursor": third["next_cursor"]})
+    assert fourth.status_code == 200
+    assert [p["link"] for p in fourth.json()["papers"]] == [make_paper(n)["link"] for n in range(12, 16)]
@@ -0,0 +1,102 @@
+"""
+Tests for per-host abstract selector learning
+"""
+
+from bs4 import BeautifulSoup
+from backend import scraper as scraper_module
+from backend.scraper import ABSTRACT_SELECTORS, PaperScraper
+from backend.selector_stats import SelectorStats
+
+ABSTRACT = 'We study the problem of learning selectors. ' * 5
+
+
+def test_order_puts_best_selector_first():
+    """Test that a host's winning selector is tried first, other hosts keep the default order"""
+    stats = SelectorStats()
+    assert stats.order('arxiv.org', ABSTRACT_SELECTORS) == list(ABSTRACT_SELECTORS)
+
+    stats.record('arxiv.org', 'id:abstract', 7)
+    order = stats.order('arxiv.org', ABSTRACT_SELECTORS)
+
+    assert order[0] == 'id:abstract'
+    assert sorted(order) == sorted(ABSTRACT_SELECTORS)
+    assert stats.order('pubmed.ncbi.nlm.nih.gov', ABSTRACT_SELECTORS)[0] == 'class:abstract'
+
+
+def test_recent_outcomes_overtake_old_ones():
+    """Test that a new layout's selector overtakes the old one as scores decay"""
+    stats = SelectorStats()
+    for _ in range(20):
+        stats.record('example.org', 'class:abstract', 1)
+    for _ in range(20):
+        stats.record('example.org', 'id:abst', 9)
+
+    assert stats.order('example.org', ABSTRACT_SELECTORS)[0] == 'id:abst'
+
+
+def test_export_reports_rates_and_work():
+    """Test the per-host success/empty rates and selectors tried per page"""
+    stats = SelectorStats()
+    stats.record('example.org', 'id:abstract', 1)
+    stats.record('example.org', 'id:abstract', 1)
+    stats.record('example.org', None, 12)
+
+    host = stats.export()['example.org']
+    assert host['pages'] == 3
+    assert host['best'] == 'id:abstract'
+    assert host['success_rate'] == 0.667
+    assert host['empty_rate'] == 0.333
+    assert host['selectors_per_page'] == 4.67
+    assert host['hits'] == {'id:abstract': 2}
+
+
+def test_stats_survive_restart(tmp_path):
+    """Test that saved stats are loaded again and a broken file is ignored"""
+    path = str(tmp_path / 'stats' / 'selectors.json')
+    stats = SelectorStats(path)
+    stats.record('arxiv.org', 'class:abstract', 1)
+    stats.save()
+
+    reloaded = SelectorStats(path)
+    assert reloaded.export() == stats.export()
+
+    (tmp_path / 'broken.json').write_text('{not json')
+    assert SelectorStats(str(tmp_path / 'broken.json')).export() == {}
+
+
+def test_extract_abstract_tries_learned_selector_first(monkeypatch):
+    """Test that extraction records the winning selector and falls back on a miss"""
+    stats = SelectorStats()
+    monkeypatch.setattr(scraper_module, 'get_selector_stats', lambda: stats)
+    page = BeautifulSoup(f'<div id="abst">{ABSTRACT}</div>', 'html.parser')
+    scraper = PaperScraper(cache=None)
+
+    assert scraper._extract_abstract(page, 'example.org') == ABSTRACT.strip()
+    assert scraper._extract_abstract(page, 'example.org') == ABSTRACT.strip()
+
+    host = stats.export()['example.org']
+    assert host['hits'] == {'id:abst': 2}
+    assert host['selectors_per_page'] == (ABSTRACT_SELECTORS.index('id:abst') + 2) / 2
+
+    # A miss on the learned selector falls back to the full list
+    page = BeautifulSoup(f'<meta name="description" content="{ABSTRACT}">', 'html.parser')
+    assert scraper._extract_abstract(page, 'example.org') == ABSTRACT.strip()
+    assert stats.export()['example.org']['hits']['meta:name=description'] == 1
+
+
+def test_meta_description_is_never_promoted(monkeypatch):
+    """Test that a meta-only page does not make the meta description win over the abstract"""
+    stats = SelectorStats()
+    monkeypatch.setattr(scraper_module, 'get_selector_stats', lambda: stats)
+    scraper = PaperScraper(cache=None)
+    meta = 'A truncated description of the paper that is still long enough to pass. ' * 2
+    meta_only = BeautifulSoup(f'<meta name="description" content="{meta}">', 'html.parser')
+    full = BeautifulSoup(
+        f'<meta name="description" content="{meta}"><div class="abstract">{ABSTRACT}</div>',
+        'html.parser'
+    )
+
+    assert scraper._extract_abstract(meta_only, 'journal.example') == meta.strip()
+    assert stats.order('journal.example', ABSTRACT_SELECTORS) == list(ABSTRACT_SELECTORS)
+    for _ in range(3):
+        assert scraper._extract_abstract(full, 'journal.example') == ABSTRACT.strip()
@@ -0,0 +1,130 @@
+"""
+Tests for the cross-process shared cache
+"""
+
+import threading
+import time
+import pytest
+from backend.scenario_client import ScenarioClient
+from backend.scraper import PaperScraper
+from backend.shared_cache import SharedCache, SharedCacheError
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def test_set_get_and_expiry(path):
+    """Test basic storage and TTL expiry"""
+    cache = SharedCache(path)
+    cache.set("k", {"a": 1}, ttl=60)
+    assert cache.get("k") == {"a": 1}
+
+    cache.set("old", [1], ttl=-1)
+    assert cache.get("old", "missing") == "missing"
+    assert cache.purge() == 1
+
+
+def test_concurrent_callers_compute_once(path):
+    """Test that callers in other 'processes' wait for the first computation"""
+    caches = [SharedCache(path, poll_interval=0.01) for _ in range(4)]
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["result"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda c=c: results.append(c.get_or_compute("key", compute, ttl=60)))
+        for c in caches
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 4
+    assert sum(c.stats()['waits'] for c in caches) == 3
+
+
+def test_failure_releases_lease(path):
+    """Test that a failed computation lets the next caller compute"""
+    cache = SharedCache(path)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("key", fail, ttl=60)
+    assert cache.get_or_compute("key", lambda: "ok", ttl=60) == "ok"
+
+
+def test_expired_lease_is_taken_over(path):
+    """Test that a lease left by a dead process expires"""
+    dead = SharedCache(path)
+    assert dead._lookup_or_lease("key", 0.05, "dead-owner") == ('leased', None)
+
+    cache = SharedCache(path, poll_interval=0.01)
+    assert cache.get_or_compute("key", lambda: "recomputed", ttl=60) == "recomputed"
+
+
+def test_none_is_cached_only_with_negative_ttl(path):
+    """Test negative caching of None results"""
+    cache = SharedCache(path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None
+
+    cache.get_or_compute("a", compute, ttl=60)
+    cache.get_or_compute("a", compute, ttl=60)
+    assert len(calls) == 2
+
+    cache.get_or_compute("b", compute, ttl=60, negative_ttl=60)
+    assert cache.get_or_compute("b", compute, ttl=60, negative_ttl=60) is None
+    assert len(calls) == 3
+
+
+def test_cancel_while_waiting(path):
+    """Test that a waiter can give up on another process's computation"""
+    SharedCache(path)._lookup_or_lease("key", 60, "other-owner")
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(SharedCacheError):
+        SharedCache(path).get_or_compute("key", lambda: "x", ttl=60, cancel_event=cancel_event)
+
+
+def test_scrapers_share_abstracts(path, monkeypatch):
+    """Test that two scraper instances scrape a URL only once"""
+    calls = []
+
+    def fake_scrape(self, url):
+        calls.append(url)
+        return "An abstract " * 20
+
+    monkeypatch.setattr(PaperScraper, "scrape_generic", fake_scrape)
+    first = PaperScraper(cache=SharedCache(path))
+    second = PaperScraper(cache=SharedCache(path))
+
+    first.scrape_paper({"link": "https://arxiv.org/abs/1"})
+    paper = second.scrape_paper({"link": "https://arxiv.org/abs/1"})
+
+    assert paper["abstract"].startswith("An abstract")
+    assert calls == ["https://arxiv.org/abs/1"]
+
+
+def test_cached_images_finds_earlier_renders(path, monkeypatch):
+    """Test that a render is found by prompt without submitting a new job"""
+    monkeypatch.setattr(ScenarioClient, "_generate", lambda self, *args: ["https://cdn.example/1.png"])
+    client = ScenarioClient(api_key="key:secret", cache=SharedCache(path))
+
+    assert client.cached_images("a prompt") == []
+    client.generate_image(prompt="a prompt")
+
+    assert client.cached_images("a prompt") == ["https://cdn.example/1.png"]
+    assert client.cached_images("a prompt", width=512) == []
@@ -0,0 +1,78 @@
+"""
+Start-up tests: import cost of backend.app and the lifespan
+"""
+
+import os
+import sys
+import json
+import subprocess
+from fastapi.testclient import TestClient
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only loaded on first use, never while importing the app
+LAZY_MODULES = ('bs4', 'numpy', 'PIL')
+
+# Generous: catches regressions such as a new eager heavy import, not noise
+IMPORT_BUDGET_MS = 5000
+
+IMPORT_SCRIPT = """
+import sys, json, time
+started = time.perf_counter()
+import backend.app
+print(json.dumps({
+    'import_ms': (time.perf_counter() - started) * 1000,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+def parse_importtime(stderr: str, top: int = 10):
+    """Modules with the highest self time in a -X importtime report as (self_us, module)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        entries.append((int(self_us), name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def test_app_import_is_lazy_and_within_budget():
+    """Importing the app must not pull in heavy optional modules"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print(f"\nbackend.app imported in {report['import_ms']:.0f}ms; slowest imports:")
+    for self_us, name in parse_importtime(result.stderr):
+        print(f"  {self_us / 1000:8.1f}ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in report['modules']]
+    assert eager == [], f"Imported at start-up: {eager}"
+    assert report['import_ms'] < IMPORT_BUDGET_MS
+
+
+def test_lifespan_records_startup_timings(monkeypatch):
+    """Start-up builds the shared clients once and reports its timings"""
+    from backend import app as app_module
+
+    monkeypatch.setenv('SERPER_API_KEY', 'test-key')
+    monkeypatch.setenv('PAPER_INDEX_PATH', '')
+    monkeypatch.delenv('WARMUP_UPSTREAMS', raising=False)
+
+    with TestClient(app_module.app) as test_client:
+        startup = test_client.get('/api/stats').json()['startup']
+        assert startup['import_ms'] > 0
+        assert 'lifespan_ms' in startup and 'serper_ms' in startup
+        assert app_module.get_serper_client() is app_module.get_serper_client()
+        assert app_module.get_scraper() is app_module.get_scraper()
+
+    # Shutdown closes and drops the clients
+    assert app_module._clients == {}
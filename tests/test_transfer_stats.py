@@ -0,0 +1,101 @@
+"""
+Tests for byte-level page fetching and transfer statistics
+"""
+
+import gzip
+import importlib.util
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend.scraper import FetchedPage, PaperScraper, declared_charset
+from backend.transfer_stats import HostTransferStats, get_transfer_stats
+
+ABSTRACT = 'Über die Kompressibilität wissenschaftlicher Seiten – eine Studie. ' * 3
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves one gzip-compressed page"""
+
+    body = f"<html><body><div class='abstract'>{ABSTRACT}</div>{'<p>filler</p>' * 200}</body></html>".encode()
+
+    def do_GET(self):
+        compressed = gzip.compress(self.body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(compressed)))
+        self.end_headers()
+        self.wfile.write(compressed)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_accept_encoding_lists_only_decodable_encodings():
+    """Test that Accept-Encoding only offers encodings that can be decoded here"""
+    offered = [name.strip() for name in PaperScraper.HEADERS['Accept-Encoding'].split(',')]
+
+    assert offered[:2] == ['gzip', 'deflate']
+    assert ('br' in offered) == any(importlib.util.find_spec(m) for m in ('brotli', 'brotlicffi'))
+    assert ('zstd' in offered) == (importlib.util.find_spec('zstandard') is not None)
+
+
+def test_declared_charset():
+    """Test that the charset is read from Content-Type and normalised"""
+    assert declared_charset('text/html; charset=UTF-8') == 'utf-8'
+    assert declared_charset('text/html; charset="ISO-8859-1"') == 'iso-8859-1'
+    assert declared_charset('text/html') is None
+    assert declared_charset(None) is None
+
+
+def test_transfer_stats_ratios():
+    """Test that wire and decoded bytes are summed per host with their ratio"""
+    stats = HostTransferStats()
+    stats.record('arxiv.org', 1000, 4000, 'gzip')
+    stats.record('arxiv.org', 3000, 4000, 'identity')
+
+    exported = stats.export()
+    assert exported['wire_ratio'] == 0.5
+    assert exported['hosts']['arxiv.org'] == {
+        'pages': 2,
+        'wire_bytes': 4000,
+        'decoded_bytes': 8000,
+        'encodings': {'gzip': 1, 'identity': 1},
+        'wire_ratio': 0.5,
+    }
+
+
+def test_fetch_returns_bytes_and_records_wire_size(server):
+    """Test that a fetch returns the decoded bytes and records the compressed size"""
+    scraper = PaperScraper(cache=None)
+
+    page = scraper._fetch_once(f"http://{server}/paper")
+
+    assert page == FetchedPage(PageHandler.body, 'utf-8')
+    host = get_transfer_stats().export()['hosts'][server]
+    assert host['encodings'] == {'gzip': 1}
+    assert host['decoded_bytes'] == len(PageHandler.body)
+    assert host['wire_bytes'] == len(gzip.compress(PageHandler.body))
+
+
+@pytest.mark.parametrize('page', [
+    FetchedPage(f"<div class='abstract'>{ABSTRACT}</div>".encode('cp1252'), 'windows-1252'),
+    FetchedPage(f"<meta charset='windows-1252'><div class='abstract'>{ABSTRACT}</div>".encode('cp1252'), None),
+    FetchedPage(f"<div class='abstract'>{ABSTRACT}</div>".encode(), None),
+])
+def test_scrape_decodes_with_declared_charset(monkeypatch, page):
+    """Test that pages are decoded with the header charset, then the meta charset, then UTF-8"""
+    scraper = PaperScraper(cache=None)
+    monkeypatch.setattr(scraper, '_fetch_page', lambda url: page)
+
+    assert scraper.scrape_generic('https://example.com/paper') == ABSTRACT.strip()